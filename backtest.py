@@ -1,130 +1,195 @@
 import time
-import datetime
-import matplotlib.pyplot as plt
-import pandas as pd
-from binance.client import Client
+import numpy as np
 from config import *
-from bot_trader import CryptoTrader
+from kline_cache import KlineCache
+from resample import resample
+from indicators import calculate_indicators_batch, calculate_entry_scores
+from exits import simular_saidas, selecionar_sem_sobreposicao
+from ledger import TradeLedger
+import config as cfg
+
+# Ajustes do backtest sobre o config.py, comuns a backtest.py, sweep.py e montecarlo.py
+AJUSTES_BACKTEST = {
+    'QUANTIDADE_CANDLES': 150,          # <- AUMENTADO
+    'SCORE_MINIMO_ENTRADA': 60,         # <- REDUZIDO
+    'VOLUME_MULTIPLIER': 1.2,           # <- REDUZIDO
+    'TEMPO_MAXIMO_OPERACAO': 60 * 60,
+    'LOG_FILE': '/tmp/backtest.log',
+    'LOG_LEVEL': 'ERROR',
+}
+
+
+def config_backtest():
+    """Configuração do config.py com os AJUSTES_BACKTEST"""
+    config = {nome: getattr(cfg, nome) for nome in dir(cfg) if nome.isupper()}
+    config.update(AJUSTES_BACKTEST)
+    return config
+
+
+def carregar_series(config, client=None):
+    """Carrega do cache local (baixando só o que falta) os candles de cada par do backtest"""
+    dias = config.get('DIAS_BACKTEST', 30)
+    fim = int(time.time() * 1000)
+    inicio = fim - dias * 24 * 60 * 60 * 1000
+
+    # Klines persistidos em disco: só o período que falta é baixado
+    cache = KlineCache(
+        client,
+        config.get('CACHE_KLINES_DIR', 'cache_klines'),
+        offline=config.get('BACKTEST_OFFLINE', False)
+    )
+    # Com INTERVALO_BASE (ex.: '1m') só a série base é baixada/armazenada e o INTERVALO é gerado localmente
+    base = config.get('INTERVALO_BASE') or config['INTERVALO']
+    series = {pair: cache.load(pair, base, inicio, fim) for pair in config['PARES_MONITORADOS']}
+    if base != config['INTERVALO']:
+        series = {pair: resample(serie, config['INTERVALO'], incluir_parcial=False) for pair, serie in series.items()}
+    return series
+
+
+def simular_par(serie, config, indicadores_batch=None):
+    """
+    Simula as entradas de um par sobre a série de candles. Retorna as operações
+    como colunas (entrada_ts, saida_ts, preco_entrada, preco_saida, motivo), com
+    uma unidade por operação e sem taxas.
+    """
+    total_candles = len(serie['close'])
+
+    # Indicadores calculados uma única vez para todo o histórico
+    if indicadores_batch is None:
+        indicadores_batch = calculate_indicators_batch(
+            serie['open'], serie['high'], serie['low'], serie['close'], serie['volume'], config
+        )
+
+    # Score e condição de entrada de todo o histórico de uma vez; a entrada no
+    # candle i usa a janela klines[i-QUANTIDADE_CANDLES:i], que termina no candle i-1
+    _, entrada = calculate_entry_scores(indicadores_batch, config)
+    entradas = np.flatnonzero(entrada[config['QUANTIDADE_CANDLES'] - 1:total_candles - 1]) + config['QUANTIDADE_CANDLES']
+
+    # Saídas de todas as entradas de uma vez sobre as colunas de máxima/mínima
+    entry_price = np.asarray(serie['close'])[entradas - 1]
+    stop_loss = entry_price * (1 - config['STOP_LOSS_PCT'])
+    take_profit = entry_price * (1 + config['TAKE_PROFIT_PCT'])
+    indice, preco, motivo = simular_saidas(
+        entradas, stop_loss, take_profit,
+        serie['high'], serie['low'], serie['close'],
+        horizonte=config.get('HORIZONTE_SAIDA_CANDLES', 12),  # até 1 hora depois em 5m
+        opens=serie['open'],
+        politica=config.get('POLITICA_SL_TP_MESMO_CANDLE', 'stop')
+    )
+
+    close_time = np.asarray(serie['close_time'])
+    return {
+        'entrada_ts': close_time[entradas - 1] // 1000,
+        'saida_ts': close_time[indice] // 1000,
+        'preco_entrada': entry_price,
+        'preco_saida': preco,
+        'motivo': motivo
+    }
 
-class BacktestTrader(CryptoTrader):
-    def __init__(self, config):
-        super().__init__(config)
-        self.resultados = {pair: [] for pair in config['PARES_MONITORADOS']}
-        self.resultados['total'] = []
 
-    def start_backtest(self):
-        dias = 30
-        intervalo = self.config['INTERVALO']
-        minutos_por_candle = int(intervalo.replace('m', ''))
-        total_candles = int((60 * 24 * dias) / minutos_por_candle)
+def registrar_operacoes(ledger, operacoes, posicao_unica=False):
+    """
+    Anexa as operações de todos os pares (par -> saída de simular_par) ao ledger, na
+    ordem de saída. Com `posicao_unica`, aplica a regra do bot ao vivo (uma posição
+    por vez entre todos os pares) às entradas ordenadas pelo instante; no mesmo
+    instante vale a ordem dos pares em `operacoes`.
+    """
+    pares = [pair for pair in operacoes if len(operacoes[pair]['saida_ts'])]
+    if not pares:
+        return
+    colunas = {
+        coluna: np.concatenate([operacoes[pair][coluna] for pair in pares])
+        for coluna in ('entrada_ts', 'saida_ts', 'preco_entrada', 'preco_saida', 'motivo')
+    }
+    par = np.concatenate([np.full(len(operacoes[pair]['saida_ts']), ledger.pares.index(pair)) for pair in pares])
+    if posicao_unica:
+        ordem = np.argsort(colunas['entrada_ts'], kind='stable')
+        ordem = ordem[selecionar_sem_sobreposicao(colunas['entrada_ts'][ordem], colunas['saida_ts'][ordem])]
+        colunas = {coluna: valores[ordem] for coluna, valores in colunas.items()}
+        par = par[ordem]
+    ordem = np.argsort(colunas['saida_ts'], kind='stable')
+    ledger.extend(
+        par[ordem], colunas['entrada_ts'][ordem], colunas['saida_ts'][ordem],
+        colunas['preco_entrada'][ordem], colunas['preco_saida'][ordem], motivo=colunas['motivo'][ordem]
+    )
+
+
+class BacktestTrader:
+    def __init__(self, config, client=None):
+        """Backtest sobre o histórico em cache, sem o construtor do bot ao vivo (nenhuma consulta à conta)"""
+        self.config = config
+        # Só o modo online precisa de client, e apenas para baixar os klines que faltam no cache
+        if client is None and not config.get('BACKTEST_OFFLINE', False):
+            from binance.client import Client
+            client = Client(config['API_KEY'], config['API_SECRET'])
+        self.client = client
+        self.ledger = TradeLedger(config['PARES_MONITORADOS'])
 
+    def start_backtest(self):
+        series = carregar_series(self.config, self.client)
+
+        if self.config.get('BACKTEST_REPLAY', False):
+            # Saídas do bot ao vivo (tempo expirado, expansão, SL/TP por volatilidade, posição única)
+            from replay import ReplayEngine
+            print("\n🔁 Replay com a lógica do bot ao vivo")
+            engine = ReplayEngine(self.config, series)
+            engine.run()
+            self.ledger = engine.ledger
+            return
+
+        operacoes = {}
         for pair in self.config['PARES_MONITORADOS']:
             print(f"\n🔍 Backtest em: {pair}")
-            klines = self.client.get_klines(
-                symbol=pair,
-                interval=intervalo,
-                limit=total_candles
-            )
-
-            for i in range(self.config['QUANTIDADE_CANDLES'], len(klines)):
-                subset = klines[i - self.config['QUANTIDADE_CANDLES']:i]
-                indicadores = self.calculate_indicators(subset)
-                score = self.calculate_entry_score(indicadores)
-
-                entry_conditions = (
-                    score >= self.config['SCORE_MINIMO_ENTRADA'] and
-                    indicadores['volume_ratio'] > self.config['VOLUME_MULTIPLIER']
-                )
-
-                if entry_conditions:
-                    entry_price = indicadores['price']
-                    stop_loss = entry_price * (1 - self.config['STOP_LOSS_PCT'])
-                    take_profit = entry_price * (1 + self.config['TAKE_PROFIT_PCT'])
-
-                    future_klines = klines[i:i+12]  # até 1 hora depois
-                    for future_k in future_klines:
-                        high = float(future_k[2])
-                        low = float(future_k[3])
-                        close_time = future_k[6] // 1000
-
-                        if low <= stop_loss:
-                            lucro = stop_loss - entry_price
-                            self.resultados[pair].append((close_time, lucro))
-                            self.resultados['total'].append((close_time, lucro))
-                            break
-                        elif high >= take_profit:
-                            lucro = take_profit - entry_price
-                            self.resultados[pair].append((close_time, lucro))
-                            self.resultados['total'].append((close_time, lucro))
-                            break
-                    else:
-                        last_price = float(future_klines[-1][4])
-                        lucro = last_price - entry_price
-                        self.resultados[pair].append((close_time, lucro))
-                        self.resultados['total'].append((close_time, lucro))
-
-    def plot_resultados(self):
+            operacoes[pair] = simular_par(series[pair], self.config)
+        # Opcional: uma posição por vez entre todos os pares, como no bot ao vivo
+        registrar_operacoes(self.ledger, operacoes, self.config.get('POSICAO_UNICA_BACKTEST', False))
+
+    def plot_resultados(self, arquivo='lucro_backtest.png'):
+        """Todos os pares numa única figura (backend Agg), com as curvas reduzidas a GRAFICO_PONTOS pontos"""
+        from plots import grafico_ledger
+
+        desenhados = grafico_ledger(
+            self.ledger, arquivo,
+            pontos=self.config.get('GRAFICO_PONTOS', 2000),
+            metodo=self.config.get('GRAFICO_REDUCAO', 'lttb'),
+            titulo='Lucro Acumulado (30 dias)'
+        )
         for pair in self.config['PARES_MONITORADOS']:
-            dados = self.resultados.get(pair, [])
-            if not dados:
+            if pair not in desenhados:
                 print(f"⚠️ Sem dados de lucro para {pair}")
-                continue
+        if desenhados:
+            print(f"📈 Gráfico salvo: {arquivo}")
 
-            df = pd.DataFrame(dados, columns=['timestamp', 'lucro'])
-            df['data'] = pd.to_datetime(df['timestamp'], unit='s')
-            df['lucro_acumulado'] = df['lucro'].cumsum()
-            lucro_total = df['lucro_acumulado'].iloc[-1]
-            entradas = len(df)
-
-            # Gera gráfico
-            plt.figure(figsize=(10, 6))
-            plt.plot(df['data'], df['lucro_acumulado'], label=f'{pair}')
-            plt.title(f'{pair} - Lucro Acumulado (30 dias)\n'
-                      f'Lucro total: {lucro_total:.4f} USDT | Entradas: {entradas}')
-            plt.xlabel('Data')
-            plt.ylabel('Lucro (USDT)')
-            plt.grid(True)
-            plt.legend()
-            plt.tight_layout()
-
-            # Salva gráfico
-            nome_arquivo = f'lucro_{pair}.jpg'
-            plt.savefig(nome_arquivo)
-            plt.close()
-
-            print(f"📈 Gráfico salvo: {nome_arquivo}")
     def gerar_relatorio_final(self):
         relatorio = []
-        lucro_total = 0
-        entradas_total = 0
 
         relatorio.append("🔎 RELATÓRIO FINAL BACKTEST (últimos 30 dias)\n")
         relatorio.append("="*50 + "\n")
 
         for pair in self.config['PARES_MONITORADOS']:
-            dados = self.resultados.get(pair, [])
-            if not dados:
+            resumo = self.ledger.resumo(pair)
+            if not resumo['operacoes']:
                 continue
 
-            df = pd.DataFrame(dados, columns=['timestamp', 'lucro'])
-            df['data'] = pd.to_datetime(df['timestamp'], unit='s')
-            df['lucro_acumulado'] = df['lucro'].cumsum()
-
-            lucro_par = df['lucro_acumulado'].iloc[-1]
-            entradas_par = len(df)
-
             relatorio.append(f"{pair}:")
-            relatorio.append(f"  Entradas: {entradas_par}")
-            relatorio.append(f"  Lucro/Prejuízo: {lucro_par:.4f} USDT\n")
-
-            lucro_total += lucro_par
-            entradas_total += entradas_par
+            relatorio.append(f"  Entradas: {resumo['operacoes']}")
+            relatorio.append(f"  Lucro/Prejuízo: {resumo['lucro']:.4f} USDT")
+            relatorio.append(f"  Taxa de acerto: {resumo['taxa_acerto']:.1%} | Drawdown máximo: {resumo['max_drawdown']:.4f} USDT\n")
 
+        total = self.ledger.resumo()
         relatorio.append("="*50)
-        relatorio.append(f"Total de Entradas: {entradas_total}")
-        relatorio.append(f"Lucro/Prejuízo Final: {lucro_total:.4f} USDT")
+        relatorio.append(f"Total de Entradas: {total['operacoes']}")
+        relatorio.append(f"Lucro/Prejuízo Final: {total['lucro']:.4f} USDT")
+        relatorio.append(f"Drawdown Máximo: {total['max_drawdown']:.4f} USDT")
+        relatorio.append(f"Taxa de Acerto: {total['taxa_acerto']:.1%} | Fator de Lucro: {total['fator_lucro']:.2f} | Sharpe por operação: {total['sharpe']:.3f}")
         relatorio.append("="*50)
 
+        # Distribuição do resultado se as mesmas operações viessem em outra ordem/amostra
+        if self.config.get('MONTE_CARLO_SIMULACOES', 0) and total['operacoes']:
+            from montecarlo import analisar_ledger, formatar
+            relatorio.extend(formatar(analisar_ledger(self.ledger, self.config)))
+            relatorio.append("="*50)
+
         # Salva no arquivo
         with open("relatorio_backtest.txt", "w") as f:
             f.write("\n".join(relatorio))
@@ -134,38 +199,7 @@ class BacktestTrader(CryptoTrader):
 if __name__ == "__main__":
     print("🚀 Iniciando Backtest dos últimos 30 dias")
 
-    config = {
-        'API_KEY': API_KEY,
-        'API_SECRET': API_SECRET,
-        'PARES_MONITORADOS': PARES_MONITORADOS,
-        'INTERVALO': INTERVALO,
-        'QUANTIDADE_CANDLES': 150,        # <- AUMENTADO
-        'TAKE_PROFIT_PCT': TAKE_PROFIT_PCT,
-        'STOP_LOSS_PCT': STOP_LOSS_PCT,
-        'VALOR_OPERACAO_USD': VALOR_OPERACAO_USD,
-        'SCORE_MINIMO_ENTRADA': 60,        # <- REDUZIDO
-        'VOLUME_MULTIPLIER': 1.2,          # <- REDUZIDO
-        'RSI_PERIODO': RSI_PERIODO,
-        'MACD_PERIODO_RAPIDO': MACD_PERIODO_RAPIDO,
-        'MACD_PERIODO_LENTO': MACD_PERIODO_LENTO,
-        'MACD_PERIODO_SINAL': MACD_PERIODO_SINAL,
-        'SMA_CURTA': SMA_CURTA,
-        'SMA_LONGA': SMA_LONGA,
-        'EMA_CURTA': EMA_CURTA,
-        'EMA_LONGA': EMA_LONGA,
-        'BB_PERIODO': BB_PERIODO,
-        'BB_DESVIOS': BB_DESVIOS,
-        'STOCH_K_PERIODO': STOCH_K_PERIODO,
-        'STOCH_D_PERIODO': STOCH_D_PERIODO,
-        'LOG_FILE': '/tmp/backtest.log',
-        'LOG_LEVEL': 'ERROR',
-        'TEMPO_MAXIMO_OPERACAO': 60 * 60,
-        'EXPANSAO_TEMPO_PREJUIZO': EXPANSAO_TEMPO_PREJUIZO,
-        'VOLATILIDADE_MAXIMA_SL': VOLATILIDADE_MAXIMA_SL,
-        'SALDO_MINIMO_USD': SALDO_MINIMO_USD,
-        'VALOR_MINIMO_RESIDUAL': VALOR_MINIMO_RESIDUAL
-    }
-
+    config = config_backtest()
     backtester = BacktestTrader(config)
     backtester.start_backtest()
     backtester.plot_resultados()
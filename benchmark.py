@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Benchmarks dos caminhos críticos (indicadores, score e backtest) sobre candles
+sintéticos determinísticos, sem rede nem credenciais.
+
+Mede o melhor tempo de `--repeticoes` execuções, a vazão (candles/s e pares/s) e o
+pico de memória (tracemalloc, numa execução separada para não distorcer o tempo).
+Com `--baseline`, compara contra um JSON salvo e termina com erro se alguma
+vazão cair ou o pico de memória subir além de `--tolerancia`. O caso
+`inicializacao` mede a importação dos pontos de entrada num interpretador novo
+e falha se passar do ORCAMENTO_INICIALIZACAO; os casos em VAZAO_MINIMA falham
+abaixo da vazão mínima.
+
+Exemplos:
+    python3 benchmark.py --salvar-baseline benchmark_baseline.json
+    python3 benchmark.py --baseline benchmark_baseline.json
+    python3 benchmark.py --tamanhos 100,10000 --casos indicadores_lote,score
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import config as cfg
+from indicators import calculate_indicators_batch, calculate_entry_score, calculate_entry_scores, indicators_at, stack_indicators
+from incremental import IncrementalIndicators
+from kline_cache import KlineCache, interval_to_ms
+from ledger import TradeLedger
+from sim_exchange import SimulatedClient, gerar_candles_sinteticos
+
+TAMANHOS_PADRAO = (100, 10_000, 1_000_000)
+# Casos por candle em Python puro são medidos sobre no máximo este número de candles
+LIMITE_POR_CANDLE = 20_000
+# Candles por par no replay (o custo cresce com as operações, não só com os candles)
+LIMITE_REPLAY = 100_000
+# Vazão mínima (candles/s) exigida dos casos a partir de 10k candles por par
+VAZAO_MINIMA = {'replay': 100_000}
+# Segundos para importar cada ponto de entrada (o backtest offline não carrega binance/matplotlib/pandas)
+ORCAMENTO_INICIALIZACAO = {'backtest': 0.5, 'sweep': 0.5, 'main': 1.5}
+
+
+def config_benchmark():
+    """Configuração do config.py sem logs em disco"""
+    config = {nome: getattr(cfg, nome) for nome in dir(cfg) if nome.isupper()}
+    config.update(LOG_FILE=os.devnull, LOG_LEVEL='ERROR', EVENTOS_ARQUIVO=None, POSICAO_ARQUIVO=None,
+                  BACKTEST_OFFLINE=True)
+    return config
+
+
+def gerar_series(pares, n, intervalo, fim_ms=None):
+    """Uma série sintética por par terminando em `fim_ms` (padrão: agora)"""
+    passo = interval_to_ms(intervalo)
+    fim_ms = fim_ms or int(time.time() * 1000)
+    inicio = fim_ms - fim_ms % passo - n * passo
+    return {
+        pair: gerar_candles_sinteticos(n, intervalo, preco_inicial=10.0 ** (k % 4), seed=k, inicio_ms=inicio)
+        for k, pair in enumerate(pares)
+    }
+
+
+def _trader(config, series):
+    from bot_trader import CryptoTrader
+
+    client = SimulatedClient(series, config['INTERVALO'], saldo_inicial=0, aquecimento=0)
+    return CryptoTrader(config, client=client, clock=client.clock)
+
+
+class Caso:
+    """
+    Um caminho crítico: `preparar` (fora da medição) devolve a função medida, os
+    candles processados e os pares (None quando o caso mede um único par amostrado)
+    """
+
+    def __init__(self, nome, preparar):
+        self.nome = nome
+        self.preparar = preparar
+
+
+def _indicadores_janela(config, series, trader):
+    serie = next(iter(series.values()))
+    janela = config['QUANTIDADE_CANDLES']
+    total = max(1, min(len(serie['close']) - janela + 1, LIMITE_POR_CANDLE))
+    colunas = {c: serie[c] for c in ('open', 'high', 'low', 'close', 'volume')}
+
+    def rodar():
+        for i in range(total):
+            trader.calculate_indicators({c: v[i:i + janela] for c, v in colunas.items()})
+    return rodar, total, None
+
+
+def _indicadores_lote(config, series, trader):
+    def rodar():
+        for s in series.values():
+            calculate_indicators_batch(s['open'], s['high'], s['low'], s['close'], s['volume'], config)
+    return rodar, sum(len(s['close']) for s in series.values()), len(series)
+
+
+def _indicadores_incremental(config, series, trader):
+    serie = next(iter(series.values()))
+    janela = config['QUANTIDADE_CANDLES']
+    total = min(len(serie['close']), janela + LIMITE_POR_CANDLE)
+    candles = [
+        {c: serie[c][i] for c in ('open', 'high', 'low', 'close', 'volume', 'close_time')}
+        for i in range(total)
+    ]
+
+    def rodar():
+        state = IncrementalIndicators(config, janela)
+        for candle in candles:
+            state.update(candle)
+    return rodar, total, None
+
+
+def _score(config, series, trader):
+    serie = next(iter(series.values()))
+    batch = calculate_indicators_batch(serie['open'], serie['high'], serie['low'], serie['close'], serie['volume'], config)
+    inicio = min(config['QUANTIDADE_CANDLES'], len(serie['close'])) - 1
+    indicadores = [indicators_at(batch, i) for i in range(inicio, min(len(serie['close']), inicio + LIMITE_POR_CANDLE))]
+
+    def rodar():
+        for ind in indicadores:
+            calculate_entry_score(ind, config)
+    return rodar, len(indicadores), None
+
+
+def _score_lote(config, series, trader):
+    batches = [
+        calculate_indicators_batch(s['open'], s['high'], s['low'], s['close'], s['volume'], config)
+        for s in series.values()
+    ]
+    matriz = stack_indicators(batches)
+
+    def rodar():
+        calculate_entry_scores(matriz, config)
+    return rodar, matriz['price'].size, len(series)
+
+
+def _backtest(config, series, trader):
+    from backtest import BacktestTrader
+
+    n = len(next(iter(series.values()))['close'])
+    diretorio = os.path.join(config['CACHE_KLINES_DIR'], str(n))
+    cache = KlineCache(None, diretorio)
+    for pair, serie in series.items():
+        cache._append(cache._path(pair, config['INTERVALO']), serie, 0)
+
+    config = dict(
+        config,
+        PARES_MONITORADOS=list(series),
+        CACHE_KLINES_DIR=diretorio,
+        DIAS_BACKTEST=math.ceil(n * interval_to_ms(config['INTERVALO']) / 86_400_000) + 1
+    )
+    backtester = BacktestTrader(config)
+
+    def rodar():
+        backtester.ledger = TradeLedger(list(series))
+        with contextlib.redirect_stdout(io.StringIO()):
+            backtester.start_backtest()
+    return rodar, n * len(series), len(series)
+
+
+def _replay(config, series, trader):
+    from replay import ReplayEngine
+
+    series = {pair: {c: v[-LIMITE_REPLAY:] for c, v in s.items()} for pair, s in series.items()}
+
+    def rodar():
+        ReplayEngine(config, series).run()
+    return rodar, sum(len(s['close']) for s in series.values()), len(series)
+
+
+def _grafico(config, series, trader):
+    from plots import grafico_ledger
+
+    # Uma operação por candle em cada par: o pior caso de histórico para o gráfico
+    ledger = TradeLedger(list(series))
+    for pair, s in series.items():
+        ts = np.asarray(s['close_time']) // 1000
+        ledger.extend(pair, ts, ts, s['open'], s['close'])
+
+    def rodar():
+        grafico_ledger(ledger, io.BytesIO(), config.get('GRAFICO_PONTOS', 2000), config.get('GRAFICO_REDUCAO', 'lttb'))
+    return rodar, len(ledger), len(series)
+
+
+CASOS = {c.nome: c for c in (
+    Caso('indicadores_janela', _indicadores_janela),
+    Caso('indicadores_lote', _indicadores_lote),
+    Caso('indicadores_incremental', _indicadores_incremental),
+    Caso('score', _score),
+    Caso('score_lote', _score_lote),
+    Caso('backtest', _backtest),
+    Caso('replay', _replay),
+    Caso('grafico', _grafico),
+)}
+
+
+def medir(rodar, candles, pares, repeticoes):
+    """Melhor tempo de `repeticoes` execuções e pico de memória de uma execução extra"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        rodar()
+        tempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    try:
+        rodar()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    melhor = max(min(tempos), 1e-9)
+    return {
+        'segundos': melhor,
+        'candles': candles,
+        'candles_por_s': candles / melhor,
+        'pares_por_s': pares / melhor if pares else None,
+        'pico_memoria_mb': pico / 2**20
+    }
+
+
+def medir_inicializacao(repeticoes):
+    """Melhor tempo de `python -c "import <ponto de entrada>"` num processo novo"""
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    resultados = {}
+    for modulo, orcamento in ORCAMENTO_INICIALIZACAO.items():
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            subprocess.run([sys.executable, '-c', f'import {modulo}'], cwd=diretorio, check=True)
+            tempos.append(time.perf_counter() - inicio)
+        chave = f"inicializacao@{modulo}"
+        resultados[chave] = {'segundos': min(tempos), 'orcamento_s': orcamento}
+        print(f"{chave:32s} {min(tempos)*1000:10.2f} ms | orçamento: {orcamento*1000:.0f} ms")
+    return resultados
+
+
+def executar(casos, tamanhos, pares, repeticoes):
+    resultados = {}
+    with tempfile.TemporaryDirectory(prefix='benchmark_klines_') as diretorio:
+        config = dict(config_benchmark(), CACHE_KLINES_DIR=diretorio)
+        for n in tamanhos:
+            series = gerar_series(pares, n, config['INTERVALO'])
+            trader = _trader(config, series)
+            for nome in casos:
+                rodar, candles, n_pares = CASOS[nome].preparar(config, series, trader)
+                chave = f"{nome}@{n}"
+                resultados[chave] = r = medir(rodar, candles, n_pares, repeticoes)
+                if nome in VAZAO_MINIMA and n >= 10_000:
+                    r['vazao_minima'] = VAZAO_MINIMA[nome]
+                pares_s = f"{r['pares_por_s']:10,.1f}" if r['pares_por_s'] is not None else f"{'-':>10s}"
+                print(f"{chave:32s} {r['segundos']*1000:10.2f} ms | {r['candles_por_s']:14,.0f} candles/s | "
+                      f"{pares_s} pares/s | {r['pico_memoria_mb']:8.2f} MB")
+    return resultados
+
+
+def comparar(resultados, baseline, tolerancia):
+    """Lista de regressões (vazão menor ou memória maior que a baseline além da tolerância)"""
+    regressoes = []
+    for chave, atual in resultados.items():
+        base = baseline.get(chave)
+        if base is None or 'candles_por_s' not in atual:
+            continue
+        # Medições abaixo de 1 ms são ruído do timer, não regressão
+        lento = atual['segundos'] >= 1e-3 and atual['candles_por_s'] < base['candles_por_s'] * (1 - tolerancia)
+        if lento:
+            regressoes.append(
+                f"{chave}: vazão {atual['candles_por_s']:,.0f} < baseline {base['candles_por_s']:,.0f} candles/s "
+                f"({atual['candles_por_s'] / base['candles_por_s'] - 1:+.1%})"
+            )
+        if atual['pico_memoria_mb'] > base['pico_memoria_mb'] * (1 + tolerancia) + 0.1:
+            regressoes.append(
+                f"{chave}: memória {atual['pico_memoria_mb']:.2f} > baseline {base['pico_memoria_mb']:.2f} MB"
+            )
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos críticos do bot")
+    parser.add_argument('--tamanhos', default=','.join(map(str, TAMANHOS_PADRAO)), help='Candles por par')
+    parser.add_argument('--casos', default=','.join(list(CASOS) + ['inicializacao']), help='Casos separados por vírgula')
+    parser.add_argument('--pares', type=int, default=3, help='Pares sintéticos')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--baseline', help='JSON de referência para detectar regressões')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='Variação aceita em relação à baseline')
+    parser.add_argument('--salvar-baseline', help='Salva os resultados como nova baseline')
+    parser.add_argument('--saida', help='Salva os resultados em JSON')
+    args = parser.parse_args()
+
+    casos = args.casos.split(',')
+    desconhecidos = set(casos) - set(CASOS) - {'inicializacao'}
+    if desconhecidos:
+        parser.error(f"Casos desconhecidos: {sorted(desconhecidos)} (disponíveis: {list(CASOS) + ['inicializacao']})")
+    tamanhos = [int(t) for t in args.tamanhos.split(',')]
+    pares = [f"SIM{k}USDT" for k in range(args.pares)]
+
+    resultados = {}
+    if 'inicializacao' in casos:
+        resultados.update(medir_inicializacao(args.repeticoes))
+    casos = [c for c in casos if c != 'inicializacao']
+    if casos:
+        resultados.update(executar(casos, tamanhos, pares, args.repeticoes))
+
+    for destino in (args.saida, args.salvar_baseline):
+        if destino:
+            with open(destino, 'w') as f:
+                json.dump(resultados, f, indent=2)
+            print(f"📄 Resultados salvos: {destino}")
+
+    regressoes = [
+        f"{chave}: {r['segundos']*1000:.0f} ms > orçamento de {r['orcamento_s']*1000:.0f} ms"
+        for chave, r in resultados.items() if 'orcamento_s' in r and r['segundos'] > r['orcamento_s']
+    ] + [
+        f"{chave}: {r['candles_por_s']:,.0f} < vazão mínima de {r['vazao_minima']:,.0f} candles/s"
+        for chave, r in resultados.items() if 'vazao_minima' in r and r['candles_por_s'] < r['vazao_minima']
+    ]
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressoes += comparar(resultados, json.load(f), args.tolerancia)
+    if regressoes:
+        print("\n❌ REGRESSÕES DE DESEMPENHO:")
+        for r in regressoes:
+            print(f"   - {r}")
+        sys.exit(1)
+    print("\n✅ Sem regressões (orçamento de inicialização e baseline)")
+
+
+if __name__ == "__main__":
+    main()
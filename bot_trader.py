@@ -1,19 +1,79 @@
 import time
+import asyncio
+import contextlib
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from logging.handlers import RotatingFileHandler
 from binance.client import Client
 from binance.enums import *
 from binance.exceptions import BinanceAPIException
-from tenacity import retry, stop_after_attempt, wait_exponential
+from requests.adapters import HTTPAdapter
+from tenacity import Retrying, stop_after_attempt, wait_exponential
+from candles import CandleStore, klines_to_arrays
+from indicators import calculate_indicators_batch, calculate_entry_score, calculate_entry_scores, stack_indicators
+from incremental import IncrementalIndicators, indicators_match
+from symbol_rules import SymbolRules
+from universe import filtrar_universo
+from market_cache import PriceCache, AccountSnapshot
+from metrics import Metricas, ClienteInstrumentado
+from logs import iniciar_fila_logs, EventLog
+from position_store import PositionStore
+from rate_limit import RequestScheduler, PRIORIDADE_SAIDA, PRIORIDADE_NORMAL, PRIORIDADE_SCAN
 
 class CryptoTrader:
-    def __init__(self, config):
-        """Inicializa o bot com persistência de operações"""
+    def __init__(self, config, client=None, clock=None):
+        """
+        Inicializa o bot com persistência de operações.
+
+        `client` substitui o Client da Binance (ex.: sim_exchange.SimulatedClient) e
+        `clock` o módulo time (objeto com time() e sleep()) para rodar em tempo simulado.
+        """
         self.config = config
-        self.client = Client(config['API_KEY'], config['API_SECRET'])
+        # Latências por etapa e chamadas por endpoint (client instrumentado)
+        self.metrics = Metricas(config.get('METRICAS_JANELA', 1000))
+        self._metrics_saved_at = 0
+        self.clock = clock if clock is not None else time
+        client = client if client is not None else Client(config['API_KEY'], config['API_SECRET'])
+        # Peso REST por minuto controlado antes do envio; saídas passam na frente da varredura
+        self.scheduler = None
+        if config.get('LIMITE_PESO_MINUTO'):
+            self.scheduler = RequestScheduler(client, config['LIMITE_PESO_MINUTO'], self.clock)
+            client = self.scheduler
+        self.client = ClienteInstrumentado(client, self.metrics)
+        # Sinais, ordens e execuções em JSONL, separados do log de texto
+        self.events = EventLog(config.get('EVENTOS_ARQUIVO'), self.clock)
         self.setup_logging()
         self.current_position = None
+        # Chamado como on_close(pair, position, order, motivo) a cada posição encerrada por venda
+        self.on_close = None
+        self._sell_reason = None
+        # Posição persistida a cada mudança para sobreviver a reinícios
+        self.positions = PositionStore(config.get('POSICAO_ARQUIVO'))
+        # Protege current_position entre o loop de scan e o watchdog de SL/TP
+        self._position_lock = threading.RLock()
+        # Tentativas das ordens criadas uma vez, esperando no relógio do bot (simulado no replay)
+        self._retrying = Retrying(
+            stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), sleep=self.clock.sleep
+        )
+        self._watchdog = None
+        self._watchdog_stop = threading.Event()
+        # Candles por par convertidos uma única vez ao chegarem da API
+        self.candles = CandleStore(max(self.config['QUANTIDADE_CANDLES'], 20))
+        self.indicator_states = {}
+        self.indicator_checks = {}
+        self._scan_executor = None
+        self._universe = []
+        # Preços e saldos compartilhados: um snapshot por ciclo para todos os consumidores
+        self.prices = PriceCache(self.client, self.config.get('PRECOS_IDADE_MAXIMA', 5), self.clock)
+        self.account = AccountSnapshot(self.client, self.config.get('SALDOS_IDADE_MAXIMA', 30), self.clock)
+        self._universe_at = 0
+        self.symbol_rules = SymbolRules(self.client, self.config.get('REGRAS_PARES_TTL', 3600), self.clock)
+        try:
+            self.symbol_rules.load()
+        except Exception as e:
+            self.logger.error("Erro ao carregar regras dos pares: %s", e)
         
         # Verifica operações existentes ao iniciar
         self.check_existing_position()
@@ -23,7 +83,7 @@ class CryptoTrader:
         self.logger.info("╚════════════════════════════════════╝")
 
     def setup_logging(self):
-        """Configuração do sistema de logs"""
+        """Configuração do sistema de logs (gravação em segundo plano, fora do caminho das ordens)"""
         self.logger = logging.getLogger('CryptoTraderPro')
         self.logger.setLevel(self.config['LOG_LEVEL'])
         
@@ -42,16 +102,15 @@ class CryptoTrader:
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(formatter)
         
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
-
-    def calculate_indicators(self, klines):
-        """Calcula todos os indicadores técnicos"""
-        closes = np.array([float(k[4]) for k in klines])
-        highs = np.array([float(k[2]) for k in klines])
-        lows = np.array([float(k[3]) for k in klines])
-        volumes = np.array([float(k[5]) for k in klines])
-        opens = np.array([float(k[1]) for k in klines])
+        self._log_listener = iniciar_fila_logs(self.logger, file_handler, console_handler)
+
+    def calculate_indicators(self, candles):
+        """Calcula todos os indicadores técnicos a partir das colunas de candles"""
+        closes = candles['close']
+        highs = candles['high']
+        lows = candles['low']
+        volumes = candles['volume']
+        opens = candles['open']
         
         indicators = {
             'price': closes[-1],
@@ -103,6 +162,49 @@ class CryptoTrader:
         
         return indicators
 
+    def calculate_indicators_batch(self, candles):
+        """Calcula os indicadores de todo o histórico de uma vez (arrays alinhados aos candles)"""
+        return calculate_indicators_batch(
+            candles['open'], candles['high'], candles['low'],
+            candles['close'], candles['volume'], self.config
+        )
+
+    def update_indicator_state(self, pair):
+        """Atualiza o estado incremental do par só com os candles novos/revisados do buffer"""
+        buffer = self.candles[pair]
+        janela = self.config['QUANTIDADE_CANDLES']
+        state = self.indicator_states.get(pair)
+        close_times = buffer.column('close_time')
+
+        novos = -1
+        if state is not None and state.last_close_time is not None:
+            pos = np.searchsorted(close_times, state.last_close_time)
+            if pos < len(close_times) and close_times[pos] == state.last_close_time:
+                novos = len(close_times) - pos - 1
+
+        if novos < 0 or novos >= janela:
+            # Sem estado ou buffer sem continuidade: reconstrói a partir da janela
+            state = IncrementalIndicators.from_candles(self.config, buffer.window(janela))
+            self.indicator_states[pair] = state
+        else:
+            recentes = buffer.window(novos + 1)
+            candle = lambda i: {coluna: recentes[coluna][i] for coluna in recentes}
+            state.revise_last(candle(0))
+            for i in range(1, novos + 1):
+                state.update(candle(i))
+
+        # Confere periodicamente o caminho incremental contra o cálculo completo
+        checks = self.indicator_checks.get(pair, 0) + 1
+        self.indicator_checks[pair] = checks
+        if checks % self.config.get('VERIFICACAO_CONSISTENCIA_CICLOS', 100) == 0:
+            divergentes = indicators_match(state.values(), self.calculate_indicators(buffer.window(janela)))
+            if divergentes:
+                self.logger.error("❌ INDICADORES INCREMENTAIS DIVERGENTES | %s | %s | Reconstruindo estado", pair, divergentes)
+                state = IncrementalIndicators.from_candles(self.config, buffer.window(janela))
+                self.indicator_states[pair] = state
+
+        return state.values()
+
     def is_bullish_candle(self, open, close):
         return close > open
 
@@ -116,76 +218,108 @@ class CryptoTrader:
 
     def calculate_entry_score(self, indicators):
         """Calcula score baseado em múltiplos fatores"""
-        score = 0
-        
-        # 1. Tendência (30 pontos)
-        if indicators['ema_short'] > indicators['ema_long']:
-            score += 20
-        if indicators['sma_short'] > indicators['sma_long']:
-            score += 10
-            
-        # 2. Momentum (25 pontos)
-        if indicators['rsi'] > 30 and indicators['rsi'] < 70:
-            score += 15
-        if indicators['macd_hist'] > 0:
-            score += 10
-            
-        # 3. Volatilidade (20 pontos)
-        if indicators['price'] > indicators['bb_lower'] and indicators['price'] < indicators['bb_upper']:
-            score += 10
-        if indicators['bb_width'] > 0.05:  # Bandas suficientemente largas
-            score += 10
-            
-        # 4. Estocástico (15 pontos)
-        if indicators['stoch_k'] > indicators['stoch_d'] and indicators['stoch_k'] < 80:
-            score += 15
-            
-        # 5. Volume (10 pontos)
-        if indicators['volume_ratio'] > self.config['VOLUME_MULTIPLIER']:
-            score += 10
-            
-        # 6. Padrões de Candles (10 pontos)
-        if indicators['bullish']:
-            score += 5
-        if indicators['engulfing']:
-            score += 5
-            
-        return score
+        return calculate_entry_score(indicators, self.config)
+
+    def set_position(self, position):
+        """Troca a posição atual e grava o snapshot"""
+        self.current_position = position
+        self.save_position()
+
+    def save_position(self):
+        """Grava o snapshot da posição atual (chamado após cada alteração em current_position)"""
+        try:
+            self.positions.save(self.current_position)
+        except OSError as e:
+            self.logger.error("Erro ao gravar snapshot da posição: %s", e)
+
+    def restore_position(self):
+        """
+        Recupera a posição do snapshot conferindo o saldo com uma única consulta à conta.
+        Retorna True se a posição foi restaurada ou se o snapshot indicava nenhuma posição.
+        """
+        valido, position = self.positions.load()
+        if not valido:
+            return False
+        if position is None:
+            self.logger.info("📭 SNAPSHOT SEM POSIÇÃO ABERTA")
+            return True
+
+        self.account.refresh()
+        free_balance, locked_balance = self.account.balance(position['pair'].replace('USDT', ''))
+        total_balance = free_balance + locked_balance
+        if total_balance * position['entry_price'] < self.config.get('SALDO_MINIMO_USD', 6):
+            # Posição encerrada fora do bot enquanto ele estava parado
+            self.logger.warning("⚠️ SNAPSHOT SEM SALDO | %s | Descartando posição salva", position['pair'])
+            self.set_position(None)
+            return False
+
+        position['quantity'] = min(position['quantity'], total_balance)
+        self.set_position(position)
+        self.logger.warning(
+            "♻️ POSIÇÃO RESTAURADA DO SNAPSHOT | %s | Entrada: %.4f | SL: %.4f | TP: %.4f",
+            position['pair'], position['entry_price'], position['stop_loss'], position['take_profit']
+        )
+        return True
 
     def check_existing_position(self):
         """Verifica e recupera operações existentes ao iniciar, ignorando saldos pequenos"""
+        # Snapshot local da posição: dispensa preços e klines quando confere com o saldo
+        try:
+            if self.restore_position():
+                return
+        except Exception as e:
+            self.logger.error("Erro ao restaurar snapshot da posição: %s", e)
+
+        # Um snapshot da conta e um de preços em vez de duas chamadas por par
+        try:
+            self.account.refresh()
+            self.prices.refresh()
+        except Exception as e:
+            self.logger.error("Erro ao consultar conta/preços: %s", e)
+            return
+
         for pair in self.config['PARES_MONITORADOS']:
             try:
                 base_asset = pair.replace('USDT', '')
-                balance = self.client.get_asset_balance(asset=base_asset)
-                free_balance = float(balance['free'])
-                locked_balance = float(balance['locked'])
+                free_balance, locked_balance = self.account.balance(base_asset)
                 total_balance = free_balance + locked_balance
             
                 if total_balance > 0:
                     # Verifica valor do saldo em USDT
-                    ticker = self.client.get_symbol_ticker(symbol=pair)
-                    current_price = float(ticker['price'])
+                    current_price = self.prices.price(pair)
                     balance_value = total_balance * current_price
                 
                     if balance_value < self.config.get('SALDO_MINIMO_USD', 6):  # Ignora saldos menores que $6
-                        self.logger.warning(f"⚠️ SALDO INSIGNIFICANTE | {pair} | Valor: ${balance_value:.2f} | Ignorando...")
+                        self.logger.warning("⚠️ SALDO INSIGNIFICANTE | %s | Valor: $%.2f | Ignorando...", pair, balance_value)
                         continue
                     
-                    self.current_position = {
+                    self.set_position({
                         'pair': pair,
                         'entry_price': current_price,
                         'quantity': total_balance,
-                        'opened_at': time.time() - self.config['TEMPO_MAXIMO_OPERACAO']/2,
+                        'opened_at': self.clock.time() - self.config['TEMPO_MAXIMO_OPERACAO']/2,
+                        'entry_time': None,  # Desconhecido: posição aberta fora do bot
+                        'expansions': 0,
                         'stop_loss': 0,
                         'take_profit': 0
-                    }
+                    })
                     self.recalculate_sl_tp()
-                    self.logger.warning(f"⚠️ OPERAÇÃO EXISTENTE RECUPERADA | {pair} | Valor: ${balance_value:.2f}")
+                    self.logger.warning("⚠️ OPERAÇÃO EXISTENTE RECUPERADA | %s | Valor: $%.2f", pair, balance_value)
                     break
                 
             except Exception as e:
-                self.logger.error(f"Erro ao verificar posição em {pair}: {str(e)}")
+                self.logger.error("Erro ao verificar posição em %s: %s", pair, e)
+
+    def recent_closes(self, pair, limit):
+        """
+        Fechamentos dos últimos `limit` candles. Clients com colunas em memória
+        (SimulatedClient.get_klines_columns) evitam montar e converter klines em texto.
+        """
+        colunas = getattr(self.client, 'get_klines_columns', None)
+        if colunas is not None:
+            return colunas(pair, self.config['INTERVALO'], limit, ('close',))['close']
+        klines = self.client.get_klines(symbol=pair, interval=self.config['INTERVALO'], limit=limit)
+        return klines_to_arrays(klines)['close']
 
     def recalculate_sl_tp(self):
         """Recalcula stop loss e take profit dinamicamente"""
@@ -194,12 +328,8 @@ class CryptoTrader:
             
         pair = self.current_position['pair']
         try:
-            klines = self.client.get_klines(
-                symbol=pair,
-                interval=self.config['INTERVALO'],
-                limit=20
-            )
-            closes = np.array([float(k[4]) for k in klines])
+            # Só os 20 candles desta consulta: não passam pelo buffer compartilhado do par
+            closes = self.recent_closes(pair, 20)
             volatility = np.std(closes) / np.mean(closes)
             
             # Cálculo dinâmico com limites
@@ -210,255 +340,532 @@ class CryptoTrader:
             tp_multiplier = sl_multiplier * 2  # Risk-reward 1:2
             
             self.current_position.update({
-                'stop_loss': self.current_position['entry_price'] * (1 - sl_multiplier),
-                'take_profit': self.current_position['entry_price'] * (1 + tp_multiplier)
+                'stop_loss': float(self.current_position['entry_price'] * (1 - sl_multiplier)),
+                'take_profit': float(self.current_position['entry_price'] * (1 + tp_multiplier))
             })
+            self.save_position()
             
             self.logger.info(
-                f"🔄 SL/TP RECALCULADOS | "
-                f"SL: {sl_multiplier*100:.1f}% | "
-                f"TP: {tp_multiplier*100:.1f}% | "
-                f"Preço Entrada: {self.current_position['entry_price']:.4f}"
+                "🔄 SL/TP RECALCULADOS | SL: %.1f%% | TP: %.1f%% | Preço Entrada: %.4f",
+                sl_multiplier * 100, tp_multiplier * 100, self.current_position['entry_price']
             )
             
         except Exception as e:
-            self.logger.error(f"Erro ao recalcular SL/TP: {str(e)}")
+            self.logger.error("Erro ao recalcular SL/TP: %s", e)
 
-    def check_stop_loss_take_profit(self):
-        """Gestão avançada de SL/TP com tempo expandido"""
+    def check_stop_loss_take_profit(self, current_price=None, verbose=True, pair=None):
+        """
+        Gestão avançada de SL/TP com tempo expandido (current_price vem do feed ou do
+        watchdog quando disponível). `verbose=False` omite o log de posição ativa nas
+        verificações de alta frequência. Com `pair`, o preço só é aplicado se a posição
+        aberta ainda for desse par.
+        """
         if not self.current_position:
             return
+        with self._position_lock, self.priority(PRIORIDADE_SAIDA):
+            if not self.current_position:
+                return
+            if pair is not None and self.current_position['pair'] != pair:
+                # Posição fechada (e talvez reaberta em outro par) enquanto o preço era obtido
+                return
+            with self.metrics.medir('verificacao_sl_tp'):
+                self._check_stop_loss_take_profit(current_price, verbose)
+
+    def _check_stop_loss_take_profit(self, current_price, verbose):
             
         pair = self.current_position['pair']
         try:
-            ticker = self.client.get_symbol_ticker(symbol=pair)
-            current_price = float(ticker['price'])
+            if current_price is None:
+                with self.metrics.medir('ticker'):
+                    current_price = self.prices.price(pair)
             entry_price = self.current_position['entry_price']
             profit_pct = (current_price - entry_price) / entry_price * 100
-            elapsed = time.time() - self.current_position['opened_at']
-            remaining_time = max(0, self.config['TEMPO_MAXIMO_OPERACAO'] - elapsed)
+            elapsed = self.clock.time() - self.current_position['opened_at']
+            max_time = self.position_max_time()
+            remaining_time = max(0, max_time - elapsed)
             
             is_profitable = current_price > entry_price
             
             # Verificação de tempo expirado
-            if elapsed > self.config['TEMPO_MAXIMO_OPERACAO']:
+            if elapsed > max_time:
                 if is_profitable:
-                    self.logger.warning(f"⏰ TEMPO EXPIRADO COM LUCRO: {profit_pct:.2f}% - VENDENDO")
+                    self.logger.warning("⏰ TEMPO EXPIRADO COM LUCRO: %.2f%% - VENDENDO", profit_pct)
+                    self.register_signal(pair, 'sell', motivo='tempo', preco=current_price)
                     self.execute_trade(pair, 'sell')
                 else:
-                    # Expande o tempo e ajusta SL
-                    new_max_time = self.config['TEMPO_MAXIMO_OPERACAO'] * self.config['EXPANSAO_TEMPO_PREJUIZO']
-                    self.current_position['opened_at'] = time.time() - (new_max_time * 0.8)
+                    # Expande o limite atual em EXPANSAO_TEMPO_PREJUIZO (contando a partir de agora
+                    # se o prazo já passou há mais tempo, ex.: bot parado) e ajusta SL
+                    new_max_time = max(max_time, elapsed) + max_time * (self.config['EXPANSAO_TEMPO_PREJUIZO'] - 1)
+                    self.current_position['max_time'] = new_max_time
+                    self.current_position['expansions'] = self.current_position.get('expansions', 0) + 1
+                    self.save_position()
                     self.recalculate_sl_tp()
                     self.logger.warning(
-                        f"⏰ TEMPO EXPANDIDO | "
-                        f"Prejuízo: {abs(profit_pct):.2f}% | "
-                        f"Novo Limite: {new_max_time/60:.1f} min"
+                        "⏰ TEMPO EXPANDIDO | Prejuízo: %.2f%% | Novo Limite: %.1f min",
+                        abs(profit_pct), new_max_time / 60
                     )
                 return
                 
             # Verificação normal de SL/TP
             if current_price <= self.current_position['stop_loss']:
-                self.logger.warning(f"🛑 STOP LOSS ATINGIDO: {profit_pct:.2f}%")
+                self.logger.warning("🛑 STOP LOSS ATINGIDO: %.2f%%", profit_pct)
+                self.register_signal(pair, 'sell', motivo='stop_loss', preco=current_price)
                 self.execute_trade(pair, 'sell')
             elif current_price >= self.current_position['take_profit']:
-                self.logger.warning(f"🎯 TAKE PROFIT ATINGIDO: {profit_pct:.2f}%")
+                self.logger.warning("🎯 TAKE PROFIT ATINGIDO: %.2f%%", profit_pct)
+                self.register_signal(pair, 'sell', motivo='take_profit', preco=current_price)
                 self.execute_trade(pair, 'sell')
-            else:
+            elif verbose:
                 self.logger.info(
-                    f"📊 POSIÇÃO ATIVA | {pair} | "
-                    f"Lucro: {profit_pct:.2f}% | "
-                    f"Tempo Restante: {remaining_time/60:.1f} min"
+                    "📊 POSIÇÃO ATIVA | %s | Lucro: %.2f%% | Tempo Restante: %.1f min",
+                    pair, profit_pct, remaining_time / 60
                 )
                 
         except Exception as e:
-            self.logger.error(f"ERRO AO VERIFICAR SL/TP: {str(e)}")
+            self.logger.error("ERRO AO VERIFICAR SL/TP: %s", e)
 
-    def analyze_pair(self, pair):
-        """Analisa um par usando múltiplos indicadores"""
-        try:
-            klines = self.client.get_klines(
+    def position_max_time(self):
+        """Tempo máximo da posição aberta (o expandido, depois de uma expansão)"""
+        return self.current_position.get('max_time', self.config['TEMPO_MAXIMO_OPERACAO'])
+
+    def priority(self, nivel):
+        """Prioridade das chamadas REST desta thread no agendador (no-op sem agendador)"""
+        if self.scheduler is None:
+            return contextlib.nullcontext()
+        return self.scheduler.prioridade(nivel)
+
+    def fetch_klines(self, pair):
+        """Busca os candles de análise do par"""
+        with self.priority(PRIORIDADE_SCAN):
+            return self.client.get_klines(
                 symbol=pair,
                 interval=self.config['INTERVALO'],
                 limit=self.config['QUANTIDADE_CANDLES']
             )
-            
+
+    def analyze_pair(self, pair):
+        """Analisa um par usando múltiplos indicadores"""
+        try:
+            with self.metrics.medir('analise_par'):
+                with self.metrics.medir('klines'):
+                    klines = self.fetch_klines(pair)
+                return self.evaluate_pair(pair, klines)[0]
+        except Exception as e:
+            self.logger.error("Erro ao analisar %s: %s", pair, e)
+            return None
+
+    def pair_indicators(self, pair, klines=None):
+        """Incorpora os klines novos ao buffer e retorna os indicadores do par (None sem candles suficientes)"""
+        if klines is not None:
             if len(klines) < self.config['QUANTIDADE_CANDLES']:
                 return None
-                
-            indicators = self.calculate_indicators(klines)
+            self.candles.ingest_klines(pair, klines)
+        elif len(self.candles[pair]) < self.config['QUANTIDADE_CANDLES']:
+            return None
+        with self.metrics.medir('indicadores'):
+            return self.update_indicator_state(pair)
+
+    def evaluate_pair(self, pair, klines=None):
+        """Avalia os candles do par (novos klines são incorporados ao buffer antes). Retorna (sinal, score)"""
+        indicators = self.pair_indicators(pair, klines)
+        if indicators is None:
+            return None, None
+        with self.metrics.medir('score'):
             score = self.calculate_entry_score(indicators)
-            
-            # Condições de entrada
-            entry_conditions = (
-                score >= self.config['SCORE_MINIMO_ENTRADA'] and
-                indicators['volume_ratio'] > self.config['VOLUME_MULTIPLIER'] and
-                not self.current_position
-            )
-            
-            # Condições de saída
-            exit_conditions = (
-                self.current_position and 
-                self.current_position['pair'] == pair and
-                (indicators['price'] >= self.current_position['take_profit'] or
-                 indicators['price'] <= self.current_position['stop_loss'] or
-                 time.time() - self.current_position['opened_at'] > self.config['TEMPO_MAXIMO_OPERACAO'])
+        return self.decide(pair, indicators, score), score
+
+    def decide(self, pair, indicators, score):
+        """Sinal de compra/venda do par a partir dos indicadores e do score já calculados"""
+        # Condições de entrada
+        entry_conditions = (
+            score >= self.config['SCORE_MINIMO_ENTRADA'] and
+            indicators['volume_ratio'] > self.config['VOLUME_MULTIPLIER'] and
+            not self.current_position
+        )
+        
+        # Condições de saída
+        exit_conditions = (
+            self.current_position and 
+            self.current_position['pair'] == pair and
+            (indicators['price'] >= self.current_position['take_profit'] or
+             indicators['price'] <= self.current_position['stop_loss'] or
+             self.clock.time() - self.current_position['opened_at'] > self.position_max_time())
+        )
+        
+        if entry_conditions:
+            self.logger.info(
+                "📈 %s | Score: %s/%s | RSI: %.1f | MACD: %.4f",
+                pair, score, self.config['SCORE_MINIMO_ENTRADA'], indicators['rsi'], indicators['macd_hist']
             )
-            
-            if entry_conditions:
-                self.logger.info(f"📈 {pair} | Score: {score}/{self.config['SCORE_MINIMO_ENTRADA']} | RSI: {indicators['rsi']:.1f} | MACD: {indicators['macd_hist']:.4f}")
-                return 'buy'
-            elif exit_conditions:
-                return 'sell'
-                
-        except Exception as e:
-            self.logger.error(f"Erro ao analisar {pair}: {str(e)}")
+            self.register_signal(pair, 'buy', score=score, indicadores=dict(indicators))
+            return 'buy'
+        elif exit_conditions:
+            self.register_signal(pair, 'sell', motivo='avaliacao', score=score, indicadores=dict(indicators))
+            return 'sell'
+        return None
+
+    def register_signal(self, pair, side, **campos):
+        """Marca o sinal para a latência sinal-execução e grava o evento com o contexto da decisão"""
+        self.metrics.sinal(pair, side)
+        if side == 'sell':
+            self._sell_reason = campos.get('motivo')
+        self.events.registrar('sinal', par=pair, lado=side, **campos)
+
+    async def _fetch_all_klines(self, pairs):
+        """Baixa os candles de todos os pares em paralelo, com no máximo SCAN_CONCORRENCIA requisições simultâneas"""
+        loop = asyncio.get_running_loop()
+
+        async def fetch(pair):
+            try:
+                return pair, await loop.run_in_executor(self._scan_executor, self.fetch_klines, pair)
+            except Exception as e:
+                self.logger.error("Erro ao analisar %s: %s", pair, e)
+                return pair, None
+
+        return await asyncio.gather(*(fetch(pair) for pair in pairs))
+
+    def candidate_pairs(self):
+        """Pares a analisar no ciclo: lista fixa ou os melhores do universo USDT (pré-filtro de 24h)"""
+        if not self.config.get('UNIVERSO_DINAMICO', False):
+            return self.config['PARES_MONITORADOS']
+        if self.clock.time() - self._universe_at > self.config.get('UNIVERSO_ATUALIZACAO', 300):
+            try:
+                with self.priority(PRIORIDADE_SCAN):
+                    tickers = self.client.get_ticker()
+                self._universe = filtrar_universo(tickers, self.config)
+                self._universe_at = self.clock.time()
+                self.logger.info("🌐 UNIVERSO ATUALIZADO | %d pares | %s", len(self._universe), self._universe)
+            except Exception as e:
+                self.logger.error("Erro ao atualizar universo: %s", e)
+        return self._universe or self.config['PARES_MONITORADOS']
+
+    def scan_pairs_async(self):
+        """Varre todos os pares de uma vez e retorna o par com o melhor sinal de compra (ou None)"""
+        if self._scan_executor is None:
+            concorrencia = self.config.get('SCAN_CONCORRENCIA', 10)
+            self._scan_executor = ThreadPoolExecutor(max_workers=concorrencia)
+            # Uma conexão HTTP por worker, evitando descartar conexões do pool
+            if hasattr(self.client, 'session'):
+                adapter = HTTPAdapter(pool_connections=concorrencia, pool_maxsize=concorrencia)
+                self.client.session.mount('https://', adapter)
+
+        resultados = asyncio.run(self._fetch_all_klines(self.candidate_pairs()))
+
+        avaliados = []
+        for pair, klines in resultados:
+            if klines is None:
+                continue
+            try:
+                indicators = self.pair_indicators(pair, klines)
+            except Exception as e:
+                self.logger.error("Erro ao analisar %s: %s", pair, e)
+                continue
+            if indicators is not None:
+                avaliados.append((pair, indicators))
+        if not avaliados:
             return None
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+        # Score de todos os pares numa única passada vetorizada
+        with self.metrics.medir('score'):
+            scores, _ = calculate_entry_scores(stack_indicators([ind for _, ind in avaliados]), self.config)
+
+        melhor_par, melhor_score = None, None
+        for (pair, indicators), score in zip(avaliados, scores[:, 0].tolist()):
+            try:
+                signal = self.decide(pair, indicators, score)
+            except Exception as e:
+                self.logger.error("Erro ao analisar %s: %s", pair, e)
+                continue
+            if signal == 'buy' and (melhor_score is None or score > melhor_score):
+                melhor_par, melhor_score = pair, score
+        return melhor_par
+
+    def last_price(self, pair):
+        """Último preço conhecido do par: candle mais recente do buffer ou, sem ele, o cache de preços"""
+        if len(self.candles[pair]):
+            return float(self.candles[pair].column('close', 1)[0])
+        return self.prices.price(pair)
+
+    def fill_price(self, order, pair):
+        """Preço médio executado da ordem a mercado (ticker se a resposta não trouxer os fills)"""
+        executed = float(order.get('executedQty', 0) or 0)
+        if executed > 0:
+            return float(order['cummulativeQuoteQty']) / executed
+        return self.last_price(pair)
+
     def execute_trade(self, pair, side):
-        """Execução robusta com tratamento de LOT_SIZE"""
+        """Execução robusta com tratamento de LOT_SIZE (regras do par vêm do cache), até 3 tentativas"""
+        return self._retrying(self._execute_trade_locked, pair, side)
+
+    def _execute_trade_locked(self, pair, side):
+        # Um único executor por vez: quem chega depois encontra a posição já atualizada
+        with self._position_lock, self.priority(PRIORIDADE_SAIDA if side == 'sell' else PRIORIDADE_NORMAL):
+            self._execute_trade(pair, side)
+
+    def _execute_trade(self, pair, side):
         try:
-            ticker = self.client.get_symbol_ticker(symbol=pair)
-            current_price = float(ticker['price'])
-            
             if side == 'buy':
-                # Calcula quantidade
-                quantity = round(self.config['VALOR_OPERACAO_USD'] / current_price, 8)
-                
-                # Verifica limites do par
-                symbol_info = self.client.get_symbol_info(pair)
-                filters = {f['filterType']: f for f in symbol_info['filters']}
-                step_size = float(filters['LOT_SIZE']['stepSize'])
-                min_qty = float(filters['LOT_SIZE']['minQty'])
-                
-                # Ajusta quantidade
-                quantity = round(quantity - (quantity % step_size), 8)
-                quantity = max(quantity, min_qty)
+                if self.current_position:
+                    self.logger.warning("⚠️ COMPRA IGNORADA | %s | Posição aberta em %s", pair, self.current_position['pair'])
+                    return
+
+                # Calcula quantidade pelo último preço conhecido
+                reference_price = self.last_price(pair)
+                with self.metrics.medir('regras_par'):
+                    rules = self.symbol_rules.get(pair)
+                    quantity = self.symbol_rules.round_quantity(pair, self.config['VALOR_OPERACAO_USD'] / reference_price)
+                quantity = max(quantity, rules['min_qty'])
                 
                 # Executa ordem
+                self.events.registrar('ordem', par=pair, lado='buy', quantidade=quantity, preco_referencia=reference_price)
                 order = self.client.create_order(
                     symbol=pair,
                     side=SIDE_BUY,
                     type=ORDER_TYPE_MARKET,
-                    quantity=quantity
+                    quantity=format(quantity, 'f')
                 )
+                self.account.invalidate()
+                self.metrics.execucao(pair, 'buy')
+                current_price = self.fill_price(order, pair)
+                self.register_fill(pair, 'buy', order, current_price)
                 
                 # Armazena posição
-                self.current_position = {
+                self.set_position({
                     'pair': pair,
                     'entry_price': current_price,
-                    'quantity': quantity,
-                    'opened_at': time.time(),
+                    'quantity': float(quantity),
+                    'opened_at': self.clock.time(),
+                    'entry_time': self.clock.time(),
+                    'expansions': 0,
                     'stop_loss': current_price * (1 - self.config['STOP_LOSS_PCT']),
                     'take_profit': current_price * (1 + self.config['TAKE_PROFIT_PCT'])
-                }
+                })
                 
-                self.logger.info(f"✅ COMPRA {pair} | {quantity} @ {current_price:.4f} | SL: {self.current_position['stop_loss']:.4f} | TP: {self.current_position['take_profit']:.4f}")
+                self.logger.info(
+                    "✅ COMPRA %s | %s @ %.4f | SL: %.4f | TP: %.4f",
+                    pair, quantity, current_price, self.current_position['stop_loss'], self.current_position['take_profit']
+                )
                 
             elif side == 'sell':
                 if not self.current_position or self.current_position['pair'] != pair:
                     return
                     
-                # Obtém regras do par
-                symbol_info = self.client.get_symbol_info(pair)
-                lot_size = next(f for f in symbol_info['filters'] if f['filterType'] == 'LOT_SIZE')
-                step_size = float(lot_size['stepSize'])
-                min_qty = float(lot_size['minQty'])
-                
                 # Obtém e ajusta quantidade
-                balance = self.client.get_asset_balance(asset=pair.replace('USDT', ''))
-                available = float(balance['free'])
-                quantity = (available // step_size) * step_size
-                quantity = round(quantity, 8)
+                with self.metrics.medir('regras_par'):
+                    rules = self.symbol_rules.get(pair)
+                with self.metrics.medir('saldo'):
+                    available, _ = self.account.balance(pair.replace('USDT', ''))
+                quantity = self.symbol_rules.round_quantity(pair, available)
                 
-                if quantity < min_qty:
-                    self.logger.warning(f"⚠️ SALDO RESIDUAL | Qtd: {quantity} < Mín: {min_qty}")
-                    self.current_position = None
+                if quantity < rules['min_qty']:
+                    self.logger.warning("⚠️ SALDO RESIDUAL | Qtd: %s < Mín: %s", quantity, rules['min_qty'])
+                    self.set_position(None)
                     return
                     
                 # Executa venda
+                self.events.registrar('ordem', par=pair, lado='sell', quantidade=quantity)
                 order = self.client.create_order(
                     symbol=pair,
                     side=SIDE_SELL,
                     type=ORDER_TYPE_MARKET,
-                    quantity=quantity
+                    quantity=format(quantity, 'f')
                 )
+                self.account.invalidate()
+                self.metrics.execucao(pair, 'sell')
+                current_price = self.fill_price(order, pair)
+                quantity = float(quantity)
                 
                 # Registra resultado
-                entry_price = self.current_position['entry_price']
+                position = self.current_position
+                entry_price = position['entry_price']
                 profit = (current_price - entry_price) * quantity
                 profit_pct = (profit / (entry_price * quantity)) * 100
+                self.register_fill(pair, 'sell', order, current_price, preco_entrada=entry_price, lucro=profit)
                 
                 self.logger.info(
-                    f"✅ VENDA CONCLUÍDA | {pair} | "
-                    f"Qtd: {quantity} | "
-                    f"Lucro: {profit:.4f} USDT ({profit_pct:.2f}%)"
+                    "✅ VENDA CONCLUÍDA | %s | Qtd: %s | Lucro: %.4f USDT (%.2f%%)",
+                    pair, quantity, profit, profit_pct
                 )
                 
-                self.current_position = None
+                self.set_position(None)
+                motivo, self._sell_reason = self._sell_reason or 'outro', None
+                if self.on_close is not None:
+                    self.on_close(pair, position, order, motivo)
                 
         except BinanceAPIException as e:
+            self.events.registrar('erro_ordem', par=pair, lado=side, codigo=e.code, mensagem=e.message)
+            if "Filter failure" in str(e):
+                # Regras do par podem ter mudado: descarta o cache antes de tentar de novo
+                self.symbol_rules.invalidate(pair)
             if "LOT_SIZE" in str(e):
                 self.adjust_and_retry_sell(pair)
             else:
-                self.logger.error(f"API ERROR: {e.status_code} - {e.message}")
+                self.logger.error("API ERROR: %s - %s", e.status_code, e.message)
         except Exception as e:
-            self.logger.error(f"ERRO NA ORDEM: {str(e)}")
+            self.logger.error("ERRO NA ORDEM: %s", e)
             raise
 
+    def register_fill(self, pair, side, order, price, **campos):
+        """Evento de execução com os dados da resposta da ordem"""
+        self.events.registrar(
+            'execucao', par=pair, lado=side, order_id=order.get('orderId'), preco=price,
+            quantidade=order.get('executedQty'), valor=order.get('cummulativeQuoteQty'),
+            fills=order.get('fills', []), **campos
+        )
+
     def adjust_and_retry_sell(self, pair):
         """Ajusta quantidade e tenta vender novamente"""
         try:
-            symbol_info = self.client.get_symbol_info(pair)
-            lot_size = next(f for f in symbol_info['filters'] if f['filterType'] == 'LOT_SIZE')
-            step_size = float(lot_size['stepSize'])
-            min_qty = float(lot_size['minQty'])
-            
-            balance = self.client.get_asset_balance(asset=pair.replace('USDT', ''))
-            available = float(balance['free'])
-            adjusted_qty = (available // step_size) * step_size
+            rules = self.symbol_rules.get(pair)
+            self.account.invalidate()
+            available, _ = self.account.balance(pair.replace('USDT', ''))
+            adjusted_qty = self.symbol_rules.round_quantity(pair, available)
             
-            if adjusted_qty >= min_qty:
-                self.logger.warning(f"♻️ AJUSTANDO QTD: {adjusted_qty} (Original: {available})")
+            if adjusted_qty >= rules['min_qty']:
+                self.logger.warning("♻️ AJUSTANDO QTD: %s (Original: %s)", adjusted_qty, available)
                 self.execute_trade(pair, 'sell')
             else:
-                self.logger.error(f"❌ QTD AJUSTADA INSUFICIENTE: {adjusted_qty} < {min_qty}")
-                self.current_position = None
+                self.logger.error("❌ QTD AJUSTADA INSUFICIENTE: %s < %s", adjusted_qty, rules['min_qty'])
+                self.set_position(None)
                 
         except Exception as e:
-            self.logger.error(f"FALHA NO AJUSTE: {str(e)}")
-            self.current_position = None
+            self.logger.error("FALHA NO AJUSTE: %s", e)
+            self.set_position(None)
+
+    def start_watchdog(self):
+        """Inicia a thread que vigia SL/TP da posição aberta a cada WATCHDOG_INTERVALO segundos"""
+        if self._watchdog is not None and self._watchdog.is_alive():
+            return
+        self._watchdog_stop.clear()
+        self._watchdog = threading.Thread(target=self._watch_position, name='watchdog-sl-tp', daemon=True)
+        self._watchdog.start()
+
+    def stop_watchdog(self):
+        self._watchdog_stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=5)
+            self._watchdog = None
+
+    def _watch_position(self):
+        """Consulta só o ticker do par em posição e vende assim que SL/TP/tempo for atingido"""
+        intervalo = self.config.get('WATCHDOG_INTERVALO', 0.5)
+        while not self._watchdog_stop.wait(intervalo):
+            position = self.current_position
+            if not position:
+                continue
+            pair = position['pair']
+            try:
+                with self.metrics.medir('watchdog_ticker'), self.priority(PRIORIDADE_SAIDA):
+                    price = float(self.client.get_symbol_ticker(symbol=pair)['price'])
+                self.prices.update(pair, price)
+                self.check_stop_loss_take_profit(price, verbose=False, pair=pair)
+            except Exception as e:
+                self.logger.error("ERRO NO WATCHDOG | %s: %s", pair, e)
 
     def run(self):
-        """Loop principal com gestão de operações contínuas"""
+        """Loop principal com gestão de operações contínuas (SL/TP também vigiados pelo watchdog)"""
         self.logger.info("🚀 INICIANDO OPERAÇÕES")
+        if self.config.get('WATCHDOG_ATIVO', True):
+            self.start_watchdog()
+        try:
+            self._run_loop()
+        finally:
+            self.stop_watchdog()
+
+    def _run_loop(self):
         while True:
             try:
+                self.export_metrics()
+
                 # 1. Verifica SL/TP e tempo
                 self.check_stop_loss_take_profit()
                 
                 # 2. Se posição aberta, aguarda
                 if self.current_position:
-                    time.sleep(self.config['VERIFICACAO_INTERVALO'])
+                    self.clock.sleep(self.config['VERIFICACAO_INTERVALO'])
                     continue
                     
                 # 3. Busca novas oportunidades
-                for pair in self.config['PARES_MONITORADOS']:
-                    signal = self.analyze_pair(pair)
-                    if signal == 'buy':
+                if self.config.get('SCAN_ASSINCRONO', False):
+                    pair = self.scan_pairs_async()
+                    if pair:
                         self.execute_trade(pair, 'buy')
-                        break
+                else:
+                    for pair in self.candidate_pairs():
+                        signal = self.analyze_pair(pair)
+                        if signal == 'buy':
+                            self.execute_trade(pair, 'buy')
+                            break
                         
-                time.sleep(self.config['VERIFICACAO_INTERVALO'])
+                self.clock.sleep(self.config['VERIFICACAO_INTERVALO'])
                 
             except KeyboardInterrupt:
                 self.logger.info("🛑 ENCERRADO POR USUÁRIO")
                 break
             except Exception as e:
-                self.logger.error(f"ERRO NO LOOP: {str(e)}")
-                time.sleep(60)
+                self.logger.error("ERRO NO LOOP: %s", e)
+                self.clock.sleep(60)
+
+    def on_kline(self, pair, kline, closed):
+        """Evento de candle do feed: atualiza o buffer e avalia entrada quando o candle fecha"""
+        try:
+            self.candles.ingest_klines(pair, [kline])
+            if closed:
+                self.export_metrics()
+            if closed and not self.current_position:
+                signal, _ = self.evaluate_pair(pair)
+                if signal == 'buy':
+                    self.execute_trade(pair, 'buy')
+        except Exception as e:
+            self.logger.error("ERRO NO EVENTO DE %s: %s", pair, e)
+
+    def on_price(self, pair, price):
+        """Evento de preço do feed: verifica SL/TP da posição aberta sem consultar a API"""
+        self.prices.update(pair, price)
+        self.check_stop_loss_take_profit(price, verbose=False, pair=pair)
+
+    def run_stream(self, feed):
+        """Loop orientado a eventos: o feed chama on_kline/on_price a cada atualização de mercado"""
+        self.logger.info("🚀 INICIANDO OPERAÇÕES (STREAM)")
+        feed_clock = getattr(feed, 'clock', None)
+        if feed_clock is not None and feed_clock is not self.clock:
+            self.logger.warning("⚠️ FEED COM RELÓGIO PRÓPRIO | Crie o CryptoTrader com clock=feed.clock para usar o horário dos candles")
+        # Histórico inicial para os indicadores; depois disso só chegam eventos
+        for pair in self.config['PARES_MONITORADOS']:
+            try:
+                self.candles.ingest_klines(pair, self.fetch_klines(pair))
+            except Exception as e:
+                self.logger.error("Erro ao carregar histórico de %s: %s", pair, e)
+        try:
+            feed.run(self.on_kline, self.on_price)
+        except KeyboardInterrupt:
+            self.logger.info("🛑 ENCERRADO POR USUÁRIO")
+        finally:
+            feed.stop()
+
+    def export_metrics(self):
+        """Grava METRICAS_ARQUIVO no formato do Prometheus, no máximo a cada METRICAS_INTERVALO segundos"""
+        arquivo = self.config.get('METRICAS_ARQUIVO')
+        if not arquivo or self.clock.time() - self._metrics_saved_at < self.config.get('METRICAS_INTERVALO', 15):
+            return
+        self._metrics_saved_at = self.clock.time()
+        try:
+            self.metrics.salvar(arquivo)
+        except OSError as e:
+            self.logger.error("Erro ao gravar métricas: %s", e)
 
     def start(self):
         """Interface para iniciar o bot"""
-        self.run()
\ No newline at end of file
+        if self.config.get('METRICAS_PORTA'):
+            self.metrics.servir(self.config['METRICAS_PORTA'], self.config.get('METRICAS_HOST', '127.0.0.1'))
+            self.logger.info(
+                "📡 MÉTRICAS EM http://%s:%s/metrics", self.config.get('METRICAS_HOST', '127.0.0.1'), self.config['METRICAS_PORTA']
+            )
+        if self.config.get('MODO_STREAM', False):
+            from market_feed import BinanceStreamFeed
+            self.run_stream(BinanceStreamFeed(
+                self.config['API_KEY'], self.config['API_SECRET'],
+                self.config['PARES_MONITORADOS'], self.config['INTERVALO']
+            ))
+        else:
+            self.run()
\ No newline at end of file
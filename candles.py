@@ -0,0 +1,166 @@
+import numpy as np
+
+# Colunas armazenadas por candle (formato das klines da Binance: 1=open ... 6=close_time)
+COLUNAS = ('open', 'high', 'low', 'close', 'volume', 'close_time')
+_INDICE_KLINE = {'open_time': 0, 'open': 1, 'high': 2, 'low': 3, 'close': 4, 'volume': 5, 'close_time': 6}
+
+
+def _dtype(coluna):
+    return np.int64 if coluna in ('open_time', 'close_time') else np.float64
+
+
+def klines_to_arrays(klines):
+    """Converte a lista de klines da Binance em colunas numéricas (uma única vez, inclui open_time)"""
+    if len(klines) == 0:
+        return {coluna: np.empty(0, dtype=_dtype(coluna)) for coluna in _INDICE_KLINE}
+    data = np.asarray(klines, dtype=object)
+    return {coluna: data[:, indice].astype(_dtype(coluna)) for coluna, indice in _INDICE_KLINE.items()}
+
+
+class CandleBuffer:
+    """
+    Buffer circular de candles em colunas NumPy pré-alocadas.
+
+    Cada valor é gravado duas vezes (posição p e p + capacity), assim os últimos
+    n candles estão sempre contíguos e `window(n)` devolve views sem cópia.
+    As views refletem o buffer e são válidas até a próxima escrita.
+    """
+
+    def __init__(self, capacity):
+        if capacity <= 0:
+            raise ValueError("capacity deve ser positiva")
+        self.capacity = capacity
+        self._data = {coluna: np.zeros(2 * capacity, dtype=_dtype(coluna)) for coluna in COLUNAS}
+        self._head = 0   # Próxima posição de escrita em [0, capacity)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def last_close_time(self):
+        if not self._size:
+            return None
+        return int(self._data['close_time'][self._head + self.capacity - 1])
+
+    def _write(self, pos, values):
+        for coluna in COLUNAS:
+            self._data[coluna][pos] = values[coluna]
+            self._data[coluna][pos + self.capacity] = values[coluna]
+
+    def append(self, candle):
+        """Adiciona um candle (dict com as COLUNAS)"""
+        self._write(self._head, candle)
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    @property
+    def first_close_time(self):
+        if not self._size:
+            return None
+        return int(self._data['close_time'][self._head + self.capacity - self._size])
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+
+    def revise_last(self, candle):
+        """Substitui o último candle (candle ainda em formação)"""
+        if not self._size:
+            return self.append(candle)
+        self._write((self._head - 1) % self.capacity, candle)
+
+    def extend(self, columns):
+        """Adiciona vários candles de uma vez a partir de colunas já convertidas"""
+        total = len(columns['close'])
+        if total == 0:
+            return
+        start = max(0, total - self.capacity)
+        count = total - start
+        # Até o fim da primeira metade e o restante desde o início: fatias contíguas, sem índice
+        h, cap = self._head, self.capacity
+        first = min(count, cap - h)
+        for coluna in COLUNAS:
+            values = columns[coluna][start:]
+            data = self._data[coluna]
+            data[h:h + first] = data[h + cap:h + cap + first] = values[:first]
+            if count > first:
+                data[:count - first] = data[cap:cap + count - first] = values[first:]
+        self._head = (self._head + count) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+
+    def ingest_klines(self, klines):
+        """
+        Incorpora klines da API: candles já conhecidos são ignorados, o último é
+        revisado se ainda estiver aberto e os novos são anexados.
+        Retorna a quantidade de candles novos.
+        """
+        columns = klines_to_arrays(klines)
+        return self.ingest(columns)
+
+    def _passo(self, close_times):
+        """Intervalo entre candles (do buffer ou, se tiver menos de dois, dos recebidos)"""
+        if self._size >= 2:
+            end = self._head + self.capacity
+            return int(self._data['close_time'][end - 1] - self._data['close_time'][end - 2])
+        if len(close_times) >= 2:
+            return int(close_times[1] - close_times[0])
+        return None
+
+    def _descontinuo(self, close_times):
+        """
+        True quando os candles recebidos não continuam o buffer: trazem histórico
+        anterior ao primeiro candle (até o fim do buffer) ou deixam um buraco depois
+        do último. Nesses casos o buffer é refeito a partir deles.
+        """
+        if not self._size or not len(close_times):
+            return False
+        first, last = self.first_close_time, self.last_close_time
+        if close_times[0] < first and close_times[-1] >= last:
+            return True
+        newer = close_times[close_times > last]
+        passo = self._passo(close_times)
+        return bool(len(newer)) and passo is not None and newer[0] - last > passo
+
+    def ingest(self, columns):
+        close_times = columns['close_time']
+        if self._descontinuo(close_times):
+            self.clear()
+        last = self.last_close_time
+        if last is not None:
+            same = np.flatnonzero(close_times == last)
+            if len(same):
+                self.revise_last({coluna: columns[coluna][same[-1]] for coluna in COLUNAS})
+            newer = close_times > last
+            columns = {coluna: columns[coluna][newer] for coluna in COLUNAS}
+        self.extend(columns)
+        return len(columns['close_time'])
+
+    def column(self, coluna, n=None):
+        """View dos últimos n valores de uma coluna (sem cópia)"""
+        n = self._size if n is None else min(n, self._size)
+        end = self._head + self.capacity
+        return self._data[coluna][end - n:end]
+
+    def window(self, n=None):
+        """Views dos últimos n candles em todas as colunas"""
+        return {coluna: self.column(coluna, n) for coluna in COLUNAS}
+
+
+class CandleStore:
+    """Buffers de candles por par, compartilhados pelo loop ao vivo e pelo backtest"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._buffers = {}
+
+    def __contains__(self, pair):
+        return pair in self._buffers
+
+    def __getitem__(self, pair):
+        if pair not in self._buffers:
+            self._buffers[pair] = CandleBuffer(self.capacity)
+        return self._buffers[pair]
+
+    def ingest_klines(self, pair, klines):
+        return self[pair].ingest_klines(klines)
@@ -17,8 +17,26 @@ STOP_LOSS_PCT = 0.01     # 1% de perda máxima
 VALOR_OPERACAO_USD = 45  # Valor fixo por operação
 TEMPO_MAXIMO_OPERACAO = 60 * 30  # 30 hora em segundos
 VERIFICACAO_INTERVALO = 30  # Tempo entre análises (segundos)
+WATCHDOG_ATIVO = True  # Thread que vigia SL/TP da posição aberta entre as análises
+WATCHDOG_INTERVALO = 0.5  # Segundos entre consultas do ticker do par em posição
+POSICAO_ARQUIVO = "posicao_atual.json"  # Snapshot da posição aberta, restaurado ao reiniciar (None desativa)
 VALOR_MINIMO_RESIDUAL = 6  # Ignorar saldos < $6
 
+# Dados de mercado por WebSocket (eventos) em vez de consultas periódicas
+MODO_STREAM = False
+
+# Varredura dos pares
+SCAN_ASSINCRONO = False  # True busca todos os pares em paralelo e escolhe o melhor score
+SCAN_CONCORRENCIA = 10   # Máximo de requisições simultâneas na varredura
+
+# Universo dinâmico: pré-filtra todos os pares USDT pelas estatísticas de 24h (uma chamada)
+# e analisa só os UNIVERSO_TOP_K de maior volume, no lugar de PARES_MONITORADOS
+UNIVERSO_DINAMICO = False
+UNIVERSO_TOP_K = 10
+UNIVERSO_ATUALIZACAO = 5 * 60  # Segundos entre atualizações do universo
+VOLUME_MINIMO_24H_USD = 10_000_000  # Volume mínimo em USDT nas últimas 24h
+SPREAD_MAXIMO = 0.001  # Spread máximo entre bid e ask (0.1%)
+
 # Sistema de Pontuação
 SCORE_MINIMO_ENTRADA = 65  # Score mínimo para entrada (0-100)
 
@@ -59,6 +77,7 @@ VOLUME_MULTIPLIER = 1.5  # Mínimo 1.5x a média de volume
 
 LOG_FILE = "/var/log/bot_trader.log"
 LOG_LEVEL = "INFO"  # DEBUG, INFO, WARNING, ERROR, CRITICAL
+EVENTOS_ARQUIVO = "/var/log/bot_trader_eventos.jsonl"  # Sinais, ordens e execuções em JSONL (None desativa)
 
 #############################################
 ### CONFIGURAÇÕES AVANÇADAS ###
@@ -67,16 +86,56 @@ LOG_LEVEL = "INFO"  # DEBUG, INFO, WARNING, ERROR, CRITICAL
 # Horários Prioritários (UTC)
 HORARIOS_OTIMOS = [0, 4, 8, 12, 16, 20]  # Horas de maior volume
 
-# Filtro de Volatilidade Mínima
+# Filtro de Volatilidade Mínima (amplitude de 24h, usado no universo dinâmico)
 VOLATILIDADE_MINIMA = 0.01  # 1%
 
 # Log Total
 LOG_ANALISE_COMPLETA = False  # False para desativar
 
+# Confere os indicadores incrementais contra o cálculo completo a cada N análises do par
+VERIFICACAO_CONSISTENCIA_CICLOS = 100
+
 # Tentativas de ajuste
 MAX_LOT_SIZE_RETRIES = 3  # Máximo de tentativas de ajuste
 
+# Cache das regras dos pares (LOT_SIZE, NOTIONAL, PRICE_FILTER)
+REGRAS_PARES_TTL = 60 * 60  # Recarrega o exchange info a cada 1 hora
+
+# Cache compartilhado de preços e saldos (segundos até renovar o snapshot)
+PRECOS_IDADE_MAXIMA = 5
+SALDOS_IDADE_MAXIMA = 30
+LIMITE_PESO_MINUTO = 6000  # Peso REST por minuto da conta na Binance (None desativa o agendador)
+
 # Outras
 EXPANSAO_TEMPO_PREJUIZO = 1.5  # Expande em 50% o tempo original
 VOLATILIDADE_MAXIMA_SL = 0.03  # Stop Loss máximo de 3%
 SALDO_MINIMO_USD = 6  # Valor mínimo em USD para considerar posição
+
+# Métricas de latência por etapa e chamadas à API (formato Prometheus)
+METRICAS_JANELA = 1000  # Medições por etapa usadas nos percentis p50/p95/p99
+METRICAS_ARQUIVO = None  # Ex.: "/var/lib/node_exporter/textfile_collector/bot_trader.prom"
+METRICAS_INTERVALO = 15  # Segundos entre gravações do arquivo
+METRICAS_PORTA = None  # Ex.: 9108 para expor GET /metrics
+METRICAS_HOST = "127.0.0.1"
+
+#############################################
+### CONFIGURAÇÕES DE BACKTEST ###
+#############################################
+
+DIAS_BACKTEST = 30  # Período do backtest em dias
+CACHE_KLINES_DIR = "cache_klines"  # Klines salvos em disco (baixa apenas o que falta)
+BACKTEST_OFFLINE = False  # True para usar somente o cache, sem acessar a API
+INTERVALO_BASE = None  # Ex.: '1m' armazena só candles de 1m e gera INTERVALO (5m, 15m, 1h...) localmente
+HORIZONTE_SAIDA_CANDLES = 12  # Candles observados após a entrada até sair no fechamento
+POLITICA_SL_TP_MESMO_CANDLE = 'stop'  # 'stop', 'take' ou 'direcao' quando um candle toca SL e TP
+POSICAO_UNICA_BACKTEST = False  # True aplica a regra de uma posição por vez do bot ao vivo
+BACKTEST_REPLAY = False  # True reproduz os candles com a lógica real do bot (replay.py) em vez das saídas simplificadas
+GRAFICO_PONTOS = 2000  # Pontos por curva no gráfico do backtest (o histórico é reduzido a isso)
+GRAFICO_REDUCAO = 'lttb'  # 'lttb' (formato da curva) ou 'minmax' (preserva picos e vales)
+MONTE_CARLO_SIMULACOES = 10000  # Reamostragens das operações no relatório do backtest (0 desativa)
+MONTE_CARLO_METODO = 'bootstrap'  # 'bootstrap', 'embaralhar' (só a ordem) ou 'blocos' (preserva sequências)
+MONTE_CARLO_SEED = 42
+MONTE_CARLO_CAPITAL = 1000  # Capital de referência (USDT) para o risco de ruína
+MONTE_CARLO_RUINA_PCT = 0.5  # Perder 50% do capital conta como ruína
+MONTE_CARLO_BLOCO = None  # Operações por bloco no método 'blocos' (None usa n^(1/3))
+MONTE_CARLO_WORKERS = None  # Processos (None usa todos os núcleos)
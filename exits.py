@@ -0,0 +1,76 @@
+import numpy as np
+
+# Motivos de saída
+SAIDA_STOP = 0
+SAIDA_TAKE = 1
+SAIDA_TEMPO = 2
+
+# Quando um mesmo candle toca SL e TP:
+#   'stop'    -> considera o stop loss (conservador, comportamento original)
+#   'take'    -> considera o take profit
+#   'direcao' -> segue o caminho do candle: alta passa pela mínima antes, baixa pela máxima
+POLITICAS_MESMO_CANDLE = ('stop', 'take', 'direcao')
+
+
+def simular_saidas(entradas, stop_loss, take_profit, highs, lows, closes, horizonte, opens=None, politica='stop'):
+    """
+    Encontra, para todas as entradas de uma vez, o primeiro candle que atinge SL ou TP.
+
+    `entradas` são os índices do primeiro candle após a entrada; a busca olha até
+    `horizonte` candles a partir dele. Sem toque, sai no fechamento do último candle
+    da janela. Retorna (indice_saida, preco_saida, motivo).
+    """
+    if politica not in POLITICAS_MESMO_CANDLE:
+        raise ValueError(f"Política inválida: {politica}")
+    if politica == 'direcao' and opens is None:
+        raise ValueError("A política 'direcao' precisa dos opens para saber a direção do candle")
+    entradas = np.asarray(entradas, dtype=np.int64)
+    stop_loss = np.asarray(stop_loss, dtype=np.float64)
+    take_profit = np.asarray(take_profit, dtype=np.float64)
+    n = len(closes)
+    if len(entradas) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=np.int8)
+
+    # Janela [entrada, entrada+horizonte) de cada entrada; posições além da série nunca tocam
+    offsets = np.arange(horizonte)
+    idx = entradas[:, None] + offsets[None, :]
+    dentro = idx < n
+    idx = np.minimum(idx, n - 1)
+    toca_sl = dentro & (lows[idx] <= stop_loss[:, None])
+    toca_tp = dentro & (highs[idx] >= take_profit[:, None])
+    toca = toca_sl | toca_tp
+
+    houve = toca.any(axis=1)
+    primeiro = np.argmax(toca, axis=1)
+    linhas = np.arange(len(entradas))
+    sl_primeiro = toca_sl[linhas, primeiro]
+    tp_primeiro = toca_tp[linhas, primeiro]
+
+    if politica == 'stop':
+        foi_stop = sl_primeiro
+    elif politica == 'take':
+        foi_stop = sl_primeiro & ~tp_primeiro
+    else:
+        pos = idx[linhas, primeiro]
+        alta = closes[pos] >= opens[pos]
+        foi_stop = sl_primeiro & (~tp_primeiro | alta)
+
+    ultimo = np.minimum(entradas + horizonte, n) - 1
+    indice = np.where(houve, entradas + primeiro, ultimo)
+    preco = np.where(houve, np.where(foi_stop, stop_loss, take_profit), closes[ultimo])
+    motivo = np.where(houve, np.where(foi_stop, SAIDA_STOP, SAIDA_TAKE), SAIDA_TEMPO).astype(np.int8)
+    return indice, preco, motivo
+
+
+def selecionar_sem_sobreposicao(entrada_ts, saida_ts):
+    """
+    Aplica a regra do bot ao vivo (uma posição por vez) a operações de todos os
+    pares ordenadas pelo instante de entrada: uma entrada só vale se acontecer no
+    instante de saída da anterior ou depois. Retorna as posições selecionadas.
+    """
+    selecionadas = []
+    k = 0
+    while k < len(entrada_ts):
+        selecionadas.append(k)
+        k = np.searchsorted(entrada_ts, saida_ts[k], side='left')
+    return np.asarray(selecionadas, dtype=np.int64)
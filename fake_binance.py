@@ -0,0 +1,227 @@
+import argparse
+import contextlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from rate_limit import RequestScheduler, PRIORIDADE_SAIDA, PRIORIDADE_SCAN
+
+# Peso por rota do servidor falso (mesmos valores da API spot)
+PESOS_ROTAS = {
+    '/api/v3/ping': 1,
+    '/api/v3/time': 1,
+    '/api/v3/klines': 2,
+    '/api/v3/ticker/price': 2,
+    '/api/v3/ticker/24hr': 2,
+    '/api/v3/account': 20,
+    '/api/v3/exchangeInfo': 20,
+    '/api/v3/order': 1,
+}
+
+
+class FakeBinance(ThreadingHTTPServer):
+    """
+    Servidor HTTP local que imita o suficiente da API REST da Binance para testar
+    o agendador: aplica o limite de peso por minuto, devolve X-MBX-USED-WEIGHT-1M
+    e responde 429 com Retry-After ao estourar.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, limite_peso=6000, latencia=0.01, porta=0, clock=time):
+        super().__init__(('127.0.0.1', porta), _Handler)
+        self.limite_peso = limite_peso
+        self.latencia = latencia
+        self.clock = clock  # Relógio dos minutos de peso (compartilhado com o agendador)
+        self._lock = threading.Lock()
+        self._minuto = None
+        self.usado = 0
+        self.pico = 0
+        self._por_rota = {}
+        self.picos_rota = {}  # Maior peso de cada rota dentro de um minuto
+        self.respostas_429 = 0
+        self.requisicoes = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api"
+
+    def consumir(self, peso, rota=None):
+        """Soma o peso no minuto corrente. Retorna (permitido, usado, segundos_ate_liberar)"""
+        with self._lock:
+            agora = self.clock.time()
+            minuto = int(agora // 60)
+            if minuto != self._minuto:
+                self._minuto, self.usado, self._por_rota = minuto, 0, {}
+            self.requisicoes += 1
+            if self.usado + peso > self.limite_peso:
+                self.respostas_429 += 1
+                return False, self.usado, int((minuto + 1) * 60 - agora) + 1
+            self.usado += peso
+            self.pico = max(self.pico, self.usado)
+            self._por_rota[rota] = self._por_rota.get(rota, 0) + peso
+            self.picos_rota[rota] = max(self.picos_rota.get(rota, 0), self._por_rota[rota])
+            return True, self.usado, 0
+
+    def iniciar(self):
+        threading.Thread(target=self.serve_forever, name='fake-binance', daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status, corpo, headers=()):
+        dados = json.dumps(corpo).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        for nome, valor in headers:
+            self.send_header(nome, str(valor))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _tratar(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if self.command == 'POST':
+            tamanho = int(self.headers.get('Content-Length') or 0)
+            params.update({k: v[0] for k, v in parse_qs(self.rfile.read(tamanho).decode()).items()})
+
+        peso = PESOS_ROTAS.get(url.path, 1)
+        if url.path == '/api/v3/ticker/24hr' and 'symbol' not in params:
+            peso = 80
+        permitido, usado, retry = self.server.consumir(peso, url.path)
+        if not permitido:
+            self._responder(429, {'code': -1003, 'msg': 'Too many requests'},
+                            [('Retry-After', retry), ('X-MBX-USED-WEIGHT-1M', usado)])
+            return
+
+        time.sleep(self.server.latencia)
+        self._responder(200, self._corpo(url.path, params), [('X-MBX-USED-WEIGHT-1M', usado)])
+
+    def _corpo(self, rota, params):
+        agora = int(time.time() * 1000)
+        if rota == '/api/v3/klines':
+            limite = int(params.get('limit', 500))
+            precos = 100 + np.cumsum(np.random.default_rng(limite).normal(0, 0.1, limite))
+            return [
+                [agora - (limite - i) * 300_000, f"{p:.4f}", f"{p * 1.001:.4f}", f"{p * 0.999:.4f}", f"{p:.4f}",
+                 "10.0", agora - (limite - i - 1) * 300_000 - 1, "1000.0", 10, "5.0", "500.0", "0"]
+                for i, p in enumerate(precos)
+            ]
+        if rota == '/api/v3/ticker/price':
+            return {'symbol': params.get('symbol', 'BTCUSDT'), 'price': '100.0'}
+        if rota == '/api/v3/order':
+            return {'symbol': params.get('symbol'), 'orderId': agora, 'status': 'FILLED',
+                    'executedQty': params.get('quantity', '0'), 'cummulativeQuoteQty': '0', 'fills': []}
+        if rota == '/api/v3/time':
+            return {'serverTime': agora}
+        return {}
+
+    def do_GET(self):
+        self._tratar()
+
+    def do_POST(self):
+        self._tratar()
+
+
+def _cliente(url):
+    from binance.client import Client
+    client = Client('fake', 'fake', ping=False)
+    client.API_URL = url
+    return client
+
+
+def simular(servidor, usar_agendador, duracao, scanners, requisicoes=None):
+    """
+    Varredura agressiva de klines em `scanners` threads enquanto uma thread de
+    saída consulta o ticker do par em posição. Para após `duracao` segundos no
+    relógio do servidor ou, com `requisicoes`, quando o servidor tiver recebido
+    esse total. Retorna contagens e latências.
+    """
+    client = _cliente(servidor.url)
+    api = RequestScheduler(client, servidor.limite_peso, servidor.clock) if usar_agendador else client
+    parar = threading.Event()
+    resultado = {'scan_ok': 0, 'scan_erros': 0, 'saida_ok': 0, 'saida_erros': 0, 'saida_latencias': []}
+    lock = threading.Lock()
+
+    def prioridade(nivel):
+        return api.prioridade(nivel) if usar_agendador else contextlib.nullcontext()
+
+    def scan(pair):
+        while not parar.is_set():
+            try:
+                with prioridade(PRIORIDADE_SCAN):
+                    api.get_klines(symbol=pair, interval='5m', limit=100)
+                chave = 'scan_ok'
+            except Exception:
+                chave = 'scan_erros'
+                time.sleep(0.05)
+            with lock:
+                resultado[chave] += 1
+
+    def saida():
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            try:
+                with prioridade(PRIORIDADE_SAIDA):
+                    api.get_symbol_ticker(symbol='BTCUSDT')
+                resultado['saida_ok'] += 1
+                resultado['saida_latencias'].append(time.perf_counter() - inicio)
+            except Exception:
+                resultado['saida_erros'] += 1
+            parar.wait(0.1)
+
+    with ThreadPoolExecutor(max_workers=scanners + 1) as executor:
+        # Metade dos scanners repete pares de outros, como ciclos que se sobrepõem
+        for i in range(scanners):
+            executor.submit(scan, f"PAR{i % max(1, scanners // 2)}USDT")
+        executor.submit(saida)
+        inicio = servidor.clock.time()
+        while servidor.clock.time() - inicio < duracao and (requisicoes is None or servidor.requisicoes < requisicoes):
+            time.sleep(0.01)
+        parar.set()
+
+    latencias = np.array(resultado.pop('saida_latencias') or [0.0])
+    resultado['saida_p50_ms'] = float(np.percentile(latencias, 50) * 1000)
+    resultado['saida_max_ms'] = float(latencias.max() * 1000)
+    if usar_agendador:
+        resultado['compartilhadas'] = api.estatisticas['compartilhadas']
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor Binance falso com limite de peso para testar o agendador de requisições")
+    parser.add_argument('--limite', type=int, default=400, help="Peso máximo por minuto aplicado pelo servidor")
+    parser.add_argument('--duracao', type=float, default=5.0, help="Segundos de tráfego por rodada")
+    parser.add_argument('--scanners', type=int, default=8, help="Threads de varredura concorrentes")
+    parser.add_argument('--latencia', type=float, default=0.01, help="Latência artificial do servidor (s)")
+    parser.add_argument('--servir', type=int, default=None, metavar='PORTA', help="Só sobe o servidor nesta porta")
+    args = parser.parse_args()
+
+    if args.servir is not None:
+        servidor = FakeBinance(args.limite, args.latencia, args.servir)
+        print(f"Servidor falso em {servidor.url} (limite {args.limite}/min)")
+        servidor.serve_forever()
+        return
+
+    for usar_agendador in (False, True):
+        # Um servidor por rodada para cada uma começar com o peso zerado
+        servidor = FakeBinance(args.limite, args.latencia).iniciar()
+        resultado = simular(servidor, usar_agendador, args.duracao, args.scanners)
+        servidor.shutdown()
+        nome = 'com agendador' if usar_agendador else 'sem agendador'
+        print(f"{nome:<15} | 429: {servidor.respostas_429:>5} | pico de peso: {servidor.pico:>5}/{args.limite} | "
+              + " | ".join(f"{k}: {v:.1f}" if isinstance(v, float) else f"{k}: {v}" for k, v in resultado.items()))
+
+
+if __name__ == "__main__":
+    main()
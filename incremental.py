@@ -0,0 +1,301 @@
+from collections import deque
+
+import numpy as np
+
+from candles import COLUNAS
+
+
+class _RollingStats:
+    """
+    Soma e soma dos quadrados de uma janela deslizante, com o último valor revisável.
+    As somas são refeitas a cada `period` atualizações para não acumular erro de arredondamento.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self._values = deque()
+        self._ref = 0.0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._ops = 0
+
+    def _resync(self):
+        self._ref = self._values[0] if self._values else 0.0
+        self._sum = sum(v - self._ref for v in self._values)
+        self._sumsq = sum((v - self._ref) ** 2 for v in self._values)
+        self._ops = 0
+
+    def _add(self, value, sign):
+        d = value - self._ref
+        self._sum += sign * d
+        self._sumsq += sign * d * d
+
+    def update(self, value):
+        self._values.append(value)
+        self._add(value, 1)
+        if len(self._values) > self.period:
+            self._add(self._values.popleft(), -1)
+        self._ops += 1
+        if self._ops >= self.period:
+            self._resync()
+
+    def revise_last(self, value):
+        self._add(self._values[-1], -1)
+        self._values[-1] = value
+        self._add(value, 1)
+        self._ops += 1
+        if self._ops >= self.period:
+            self._resync()
+
+    @property
+    def mean(self):
+        return self._sum / len(self._values) + self._ref
+
+    @property
+    def std(self):
+        n = len(self._values)
+        d = self._sum / n
+        return np.sqrt(max(self._sumsq / n - d * d, 0.0))
+
+
+class _RollingExtreme:
+    """Mínimo/máximo da janela com deque monotônica sobre os candles fechados + candle atual"""
+
+    def __init__(self, period, is_max):
+        self.period = period
+        self.is_max = is_max
+        self._deque = deque()   # (índice, valor) dos candles fechados
+        self._index = -1
+        self._live = None
+
+    def _dominates(self, a, b):
+        return a >= b if self.is_max else a <= b
+
+    def update(self, value):
+        if self._live is not None:
+            while self._deque and self._dominates(self._live, self._deque[-1][1]):
+                self._deque.pop()
+            self._deque.append((self._index, self._live))
+        self._index += 1
+        self._live = value
+        while self._deque and self._deque[0][0] <= self._index - self.period:
+            self._deque.popleft()
+
+    def revise_last(self, value):
+        self._live = value
+
+    @property
+    def value(self):
+        if not self._deque:
+            return self._live
+        front = self._deque[0][1]
+        return max(front, self._live) if self.is_max else min(front, self._live)
+
+
+class _FirstN:
+    """Soma dos primeiros n valores (em ordem de posição) ainda dentro da janela"""
+
+    def __init__(self, n):
+        self.n = n
+        self._items = deque()   # (posição, valor)
+        self._sum = 0.0
+        self._ops = 0
+
+    def push(self, pos, value):
+        self._items.append((pos, value))
+        if len(self._items) <= self.n:
+            self._sum += value
+
+    def expire(self, min_pos):
+        while self._items and self._items[0][0] < min_pos:
+            self._sum -= self._items.popleft()[1]
+            if len(self._items) >= self.n:
+                self._sum += self._items[self.n - 1][1]
+            self._ops += 1
+        if self._ops >= self.n:
+            self._sum = sum(self._items[i][1] for i in range(min(self.n, len(self._items))))
+            self._ops = 0
+
+    @property
+    def count(self):
+        return min(self.n, len(self._items))
+
+
+class _WindowRSI:
+    """RSI no mesmo formato de calculate_indicators: média dos primeiros RSI_PERIODO ganhos/perdas da janela"""
+
+    def __init__(self, window, period):
+        self.window = window
+        self.period = period
+        self._gains = _FirstN(period)
+        self._losses = _FirstN(period)
+        self._index = -1
+        self._prev_close = None
+        self._live_close = None
+
+    def update(self, close):
+        if self._live_close is not None and self._prev_close is not None:
+            # A variação do candle que fechou passa a ser definitiva
+            delta = self._live_close - self._prev_close
+            if delta > 0:
+                self._gains.push(self._index - 1, delta)
+            elif delta < 0:
+                self._losses.push(self._index - 1, -delta)
+        if self._live_close is not None:
+            self._prev_close = self._live_close
+        self._index += 1
+        self._live_close = close
+        first_delta = self._index - self.window + 1
+        self._gains.expire(first_delta)
+        self._losses.expire(first_delta)
+
+    def revise_last(self, close):
+        self._live_close = close
+
+    def _average(self, closed, live_value, default):
+        total, count = closed._sum, closed.count
+        if live_value > 0 and count < self.period and self.window > 1:
+            total += live_value
+            count += 1
+        return total / count if count > 0 else default
+
+    @property
+    def value(self):
+        delta = self._live_close - self._prev_close if self._prev_close is not None else 0.0
+        avg_gain = self._average(self._gains, delta, 0)
+        avg_loss = self._average(self._losses, -delta, 1)
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+class IncrementalIndicators:
+    """
+    Estado incremental dos indicadores de um par.
+
+    `update(candle)` adiciona um candle novo e `revise_last(candle)` substitui o candle
+    ainda em formação; ambos custam O(1) independente de QUANTIDADE_CANDLES.
+    `values()` devolve o mesmo dicionário de `CryptoTrader.calculate_indicators`.
+    """
+
+    def __init__(self, config, window=None):
+        self.config = config
+        self.window = window or config['QUANTIDADE_CANDLES']
+        period = lambda key: min(config[key], self.window)
+        self.count = 0
+
+        # Médias com o mesmo período compartilham o estado
+        self._stats = {}
+        for key in ('MACD_PERIODO_RAPIDO', 'MACD_PERIODO_LENTO', 'MACD_PERIODO_SINAL',
+                    'SMA_CURTA', 'SMA_LONGA', 'EMA_CURTA', 'EMA_LONGA', 'BB_PERIODO'):
+            self._stats.setdefault(period(key), _RollingStats(period(key)))
+        self._period = period
+        self._rsi = _WindowRSI(self.window, config['RSI_PERIODO'])
+        self._lowest = _RollingExtreme(period('STOCH_K_PERIODO'), is_max=False)
+        self._highest = _RollingExtreme(period('STOCH_K_PERIODO'), is_max=True)
+        self._volume = _RollingStats(min(20, self.window))
+        self._prev = None
+        self._live = None
+        self.last_close_time = None
+
+    @classmethod
+    def from_candles(cls, config, candles, window=None):
+        """Reconstrói o estado a partir das colunas de um CandleBuffer"""
+        state = cls(config, window)
+        for i in range(len(candles['close'])):
+            state.update({coluna: candles[coluna][i] for coluna in COLUNAS})
+        return state
+
+    @property
+    def ready(self):
+        return self.count >= self.window
+
+    def update(self, candle):
+        close = float(candle['close'])
+        for stats in self._stats.values():
+            stats.update(close)
+        self._rsi.update(close)
+        self._lowest.update(float(candle['low']))
+        self._highest.update(float(candle['high']))
+        self._volume.update(float(candle['volume']))
+        self._prev = self._live
+        self._live = candle
+        self.last_close_time = candle.get('close_time')
+        self.count += 1
+
+    def revise_last(self, candle):
+        if self._live is None:
+            return self.update(candle)
+        close = float(candle['close'])
+        for stats in self._stats.values():
+            stats.revise_last(close)
+        self._rsi.revise_last(close)
+        self._lowest.revise_last(float(candle['low']))
+        self._highest.revise_last(float(candle['high']))
+        self._volume.revise_last(float(candle['volume']))
+        self._live = candle
+        self.last_close_time = candle.get('close_time')
+
+    def values(self):
+        """Indicadores da janela atual (None enquanto a janela não estiver completa)"""
+        if not self.ready:
+            return None
+        mean = lambda key: self._stats[self._period(key)].mean
+        close = float(self._live['close'])
+        open_ = float(self._live['open'])
+        volume = float(self._live['volume'])
+
+        indicators = {
+            'price': close,
+            'volume': volume,
+            'rsi': self._rsi.value
+        }
+
+        indicators['macd'] = mean('MACD_PERIODO_RAPIDO') - mean('MACD_PERIODO_LENTO')
+        indicators['macd_signal'] = mean('MACD_PERIODO_SINAL')
+        indicators['macd_hist'] = indicators['macd'] - indicators['macd_signal']
+
+        indicators['sma_short'] = mean('SMA_CURTA')
+        indicators['sma_long'] = mean('SMA_LONGA')
+        indicators['ema_short'] = mean('EMA_CURTA')
+        indicators['ema_long'] = mean('EMA_LONGA')
+
+        sma = indicators['sma_long']
+        std = self._stats[self._period('BB_PERIODO')].std
+        indicators['bb_upper'] = sma + (std * self.config['BB_DESVIOS'])
+        indicators['bb_lower'] = sma - (std * self.config['BB_DESVIOS'])
+        indicators['bb_width'] = (indicators['bb_upper'] - indicators['bb_lower']) / sma
+
+        lowest_low = self._lowest.value
+        highest_high = self._highest.value
+        indicators['stoch_k'] = 100 * ((close - lowest_low) / (highest_high - lowest_low)) if (highest_high - lowest_low) != 0 else 0
+        indicators['stoch_d'] = np.mean([indicators['stoch_k']] * self.config['STOCH_D_PERIODO'])
+
+        indicators['volume_avg'] = self._volume.mean
+        indicators['volume_ratio'] = volume / indicators['volume_avg']
+
+        indicators['bullish'] = close > open_
+        prev_open = float(self._prev['open'])
+        prev_close = float(self._prev['close'])
+        indicators['engulfing'] = (self.window >= 3 and
+                                   prev_close < prev_open and
+                                   close > open_ and
+                                   close > prev_open and
+                                   open_ < prev_close)
+        return indicators
+
+
+def indicators_match(incremental, batch, rtol=1e-9):
+    """
+    Compara o resultado incremental com o de calculate_indicators.
+    Retorna a lista de indicadores divergentes (vazia quando os dois caminhos concordam).
+    """
+    atol = rtol * abs(batch['price'])
+    divergentes = []
+    for key, expected in batch.items():
+        value = incremental[key]
+        if isinstance(expected, (bool, np.bool_)):
+            if bool(value) != bool(expected):
+                divergentes.append(key)
+        elif not np.isclose(value, expected, rtol=rtol, atol=atol, equal_nan=True):
+            divergentes.append(key)
+    return divergentes
@@ -0,0 +1,233 @@
+import numpy as np
+
+
+def _rolling_mean(values, period, offset=0.0):
+    """Média móvel via soma cumulativa (posição i = média de values[i-period+1:i+1])"""
+    out = np.full(len(values), np.nan)
+    if period <= 0 or len(values) < period:
+        return out
+    csum = np.concatenate(([0.0], np.cumsum(values - offset)))
+    out[period - 1:] = (csum[period:] - csum[:-period]) / period + offset
+    return out
+
+
+def _rolling_view(values, period):
+    """Janelas deslizantes sem cópia (linha j = values[j:j+period])"""
+    return np.lib.stride_tricks.sliding_window_view(values, period)
+
+
+def _rolling_std(values, period):
+    """Desvio padrão populacional por janela, em duas passadas (mesmo resultado de np.std)"""
+    out = np.full(len(values), np.nan)
+    if period <= 0 or len(values) < period:
+        return out
+    out[period - 1:] = np.std(_rolling_view(values, period), axis=1)
+    return out
+
+
+def _rolling_extreme(values, period, func):
+    out = np.full(len(values), np.nan)
+    if period <= 0 or len(values) < period:
+        return out
+    out[period - 1:] = func(_rolling_view(values, period), axis=1)
+    return out
+
+
+def _first_n_mean(positions, values, starts, ends, n, default):
+    """
+    Média dos primeiros n valores cujas posições caem em [start, end) de cada janela.
+    Reproduz o `np.mean(gains[:RSI_PERIODO])` da versão por janela.
+    """
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    first = np.searchsorted(positions, starts, side='left')
+    last = np.searchsorted(positions, ends, side='left')
+    available = last - first
+    count = np.minimum(available, n)
+    total = csum[first + count] - csum[first]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+    return np.where(available > 0, mean, default)
+
+
+def calculate_indicators_batch(opens, highs, lows, closes, volumes, config, window=None):
+    """
+    Calcula todos os indicadores para o histórico inteiro de uma vez.
+
+    Cada array retornado tem o mesmo tamanho das colunas de entrada e a posição i
+    equivale a `calculate_indicators(klines[i-window+1:i+1])`. Posições sem janela
+    completa ficam como NaN (ou False nos padrões de candles).
+    """
+    opens = np.asarray(opens, dtype=np.float64)
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    closes = np.asarray(closes, dtype=np.float64)
+    volumes = np.asarray(volumes, dtype=np.float64)
+
+    n = len(closes)
+    window = window or config['QUANTIDADE_CANDLES']
+    # Períodos maiores que a janela usam a janela inteira, como no fatiamento [-p:]
+    period = lambda key: min(config[key], window)
+    valid = np.arange(n) >= window - 1
+    offset = closes[0] if n else 0.0
+
+    indicators = {
+        'price': np.where(valid, closes, np.nan),
+        'volume': np.where(valid, volumes, np.nan)
+    }
+
+    # 1. RSI (primeiros RSI_PERIODO ganhos/perdas dentro de cada janela)
+    deltas = np.diff(closes)
+    ends = np.arange(n)               # deltas válidos: [i-window+1, i)
+    starts = ends - window + 1
+    gain_pos = np.flatnonzero(deltas > 0)
+    loss_pos = np.flatnonzero(deltas < 0)
+    avg_gain = _first_n_mean(gain_pos, deltas[gain_pos], starts, ends, config['RSI_PERIODO'], 0.0)
+    avg_loss = _first_n_mean(loss_pos, -deltas[loss_pos], starts, ends, config['RSI_PERIODO'], 1.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rs = avg_gain / avg_loss
+        indicators['rsi'] = np.where(valid, 100 - (100 / (1 + rs)), np.nan)
+
+    # 2. MACD
+    ema12 = _rolling_mean(closes, period('MACD_PERIODO_RAPIDO'), offset)
+    ema26 = _rolling_mean(closes, period('MACD_PERIODO_LENTO'), offset)
+    indicators['macd'] = np.where(valid, ema12 - ema26, np.nan)
+    indicators['macd_signal'] = np.where(valid, _rolling_mean(closes, period('MACD_PERIODO_SINAL'), offset), np.nan)
+    indicators['macd_hist'] = indicators['macd'] - indicators['macd_signal']
+
+    # 3. Médias Móveis
+    indicators['sma_short'] = np.where(valid, _rolling_mean(closes, period('SMA_CURTA'), offset), np.nan)
+    indicators['sma_long'] = np.where(valid, _rolling_mean(closes, period('SMA_LONGA'), offset), np.nan)
+    indicators['ema_short'] = np.where(valid, _rolling_mean(closes, period('EMA_CURTA'), offset), np.nan)
+    indicators['ema_long'] = np.where(valid, _rolling_mean(closes, period('EMA_LONGA'), offset), np.nan)
+
+    # 4. Bollinger Bands
+    sma = indicators['sma_long']
+    std = _rolling_std(closes, period('BB_PERIODO'))
+    indicators['bb_upper'] = sma + (std * config['BB_DESVIOS'])
+    indicators['bb_lower'] = sma - (std * config['BB_DESVIOS'])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        indicators['bb_width'] = (indicators['bb_upper'] - indicators['bb_lower']) / sma
+
+    # 5. Estocástico
+    k_period = period('STOCH_K_PERIODO')
+    lowest_low = _rolling_extreme(lows, k_period, np.min)
+    highest_high = _rolling_extreme(highs, k_period, np.max)
+    price_range = highest_high - lowest_low
+    with np.errstate(invalid='ignore', divide='ignore'):
+        stoch_k = np.where(price_range != 0, 100 * ((closes - lowest_low) / price_range), 0.0)
+    indicators['stoch_k'] = np.where(valid, stoch_k, np.nan)
+    # Mesma média de K repetido da versão por janela (inclusive o arredondamento)
+    indicators['stoch_d'] = np.repeat(indicators['stoch_k'][:, None], config['STOCH_D_PERIODO'], axis=1).mean(axis=1)
+
+    # 6. Volume
+    volume_avg = _rolling_mean(volumes, min(20, window))
+    indicators['volume_avg'] = np.where(valid, volume_avg, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        indicators['volume_ratio'] = volumes / indicators['volume_avg']
+
+    # 7. Padrões de Candles
+    indicators['bullish'] = valid & (closes > opens)
+    engulfing = np.zeros(n, dtype=bool)
+    if n > 1 and window >= 3:
+        engulfing[1:] = ((closes[:-1] < opens[:-1]) &   # Candle anterior baixista
+                         (closes[1:] > opens[1:]) &     # Candle atual altista
+                         (closes[1:] > opens[:-1]) &    # Fechamento acima da abertura anterior
+                         (opens[1:] < closes[:-1]))     # Abertura abaixo do fechamento anterior
+    indicators['engulfing'] = valid & engulfing
+
+    return indicators
+
+
+def indicators_at(batch, i):
+    """Extrai o dicionário de indicadores da posição i (mesmo formato de calculate_indicators)"""
+    return {key: values[i] for key, values in batch.items()}
+
+
+def calculate_entry_score(indicators, config):
+    """Calcula score baseado em múltiplos fatores"""
+    score = 0
+    
+    # 1. Tendência (30 pontos)
+    if indicators['ema_short'] > indicators['ema_long']:
+        score += 20
+    if indicators['sma_short'] > indicators['sma_long']:
+        score += 10
+        
+    # 2. Momentum (25 pontos)
+    if indicators['rsi'] > 30 and indicators['rsi'] < 70:
+        score += 15
+    if indicators['macd_hist'] > 0:
+        score += 10
+        
+    # 3. Volatilidade (20 pontos)
+    if indicators['price'] > indicators['bb_lower'] and indicators['price'] < indicators['bb_upper']:
+        score += 10
+    if indicators['bb_width'] > 0.05:  # Bandas suficientemente largas
+        score += 10
+        
+    # 4. Estocástico (15 pontos)
+    if indicators['stoch_k'] > indicators['stoch_d'] and indicators['stoch_k'] < 80:
+        score += 15
+        
+    # 5. Volume (10 pontos)
+    if indicators['volume_ratio'] > config['VOLUME_MULTIPLIER']:
+        score += 10
+        
+    # 6. Padrões de Candles (10 pontos)
+    if indicators['bullish']:
+        score += 5
+    if indicators['engulfing']:
+        score += 5
+        
+    return score
+
+
+def calculate_entry_scores(indicators, config):
+    """
+    Versão vetorizada de `calculate_entry_score` + condição de entrada.
+
+    Recebe os indicadores como arrays de qualquer formato (ex.: pares × tempo, saída
+    de `calculate_indicators_batch` ou de `stack_indicators`) e retorna
+    (scores, entradas): os mesmos pontos da versão escalar em cada posição e a
+    máscara score >= SCORE_MINIMO_ENTRADA e volume_ratio > VOLUME_MULTIPLIER.
+    """
+    ind = {key: np.asarray(values) for key, values in indicators.items()}
+    with np.errstate(invalid='ignore'):
+        # 1. Tendência (30 pontos)
+        score = 20 * (ind['ema_short'] > ind['ema_long']).astype(np.int16)
+        score += 10 * (ind['sma_short'] > ind['sma_long'])
+        # 2. Momentum (25 pontos)
+        score += 15 * ((ind['rsi'] > 30) & (ind['rsi'] < 70))
+        score += 10 * (ind['macd_hist'] > 0)
+        # 3. Volatilidade (20 pontos)
+        score += 10 * ((ind['price'] > ind['bb_lower']) & (ind['price'] < ind['bb_upper']))
+        score += 10 * (ind['bb_width'] > 0.05)
+        # 4. Estocástico (15 pontos)
+        score += 15 * ((ind['stoch_k'] > ind['stoch_d']) & (ind['stoch_k'] < 80))
+        # 5. Volume (10 pontos)
+        volume_ok = ind['volume_ratio'] > config['VOLUME_MULTIPLIER']
+        score += 10 * volume_ok
+        # 6. Padrões de Candles (10 pontos)
+        score += 5 * ind['bullish'].astype(bool)
+        score += 5 * ind['engulfing'].astype(bool)
+    return score, (score >= config['SCORE_MINIMO_ENTRADA']) & volume_ok
+
+
+def stack_indicators(batches):
+    """
+    Empilha os indicadores de vários pares (dicts de `calculate_indicators_batch`
+    ou dicts escalares de um único instante) em arrays pares × tempo. Séries mais
+    curtas são completadas no fim com NaN (False nos padrões de candles).
+    """
+    batches = [{key: np.atleast_1d(values) for key, values in batch.items()} for batch in batches]
+    if not batches:
+        return {}
+    n = max(len(next(iter(batch.values()))) for batch in batches)
+    stacked = {}
+    for key in batches[0]:
+        is_bool = batches[0][key].dtype == bool
+        out = np.full((len(batches), n), False if is_bool else np.nan, dtype=bool if is_bool else np.float64)
+        for row, batch in enumerate(batches):
+            out[row, :len(batch[key])] = batch[key]
+        stacked[key] = out
+    return stacked
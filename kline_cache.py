@@ -0,0 +1,182 @@
+import contextlib
+import json
+import os
+import time
+
+import numpy as np
+
+from candles import klines_to_arrays
+
+# Colunas persistidas (open_time guia a paginação e as buscas por período)
+COLUNAS_CACHE = ('open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time')
+LIMITE_POR_REQUISICAO = 1000  # Máximo de klines por chamada na Binance
+
+_UNIDADES_MS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+
+
+def interval_to_ms(intervalo):
+    """Converte '5m', '1h', '1d'... em milissegundos"""
+    return int(intervalo[:-1]) * _UNIDADES_MS[intervalo[-1]]
+
+
+def _dtype(coluna):
+    return np.int64 if coluna in ('open_time', 'close_time') else np.float64
+
+
+class KlineCache:
+    """
+    Cache local de klines por (par, intervalo) em arquivos binários por coluna.
+
+    Os arquivos são lidos com memory-map e só os períodos que faltam são baixados,
+    paginando de LIMITE_POR_REQUISICAO em LIMITE_POR_REQUISICAO. Com `offline=True`
+    nada é buscado na rede e apenas o que já está em disco é devolvido.
+    """
+
+    def __init__(self, client, directory, offline=False):
+        self.client = client
+        self.directory = directory
+        self.offline = offline
+
+    def _path(self, pair, intervalo):
+        return os.path.join(self.directory, f"{pair}_{intervalo}")
+
+    def _read_meta(self, path):
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, path, meta):
+        tmp = os.path.join(path, 'meta.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(path, 'meta.json'))
+
+    def _update_meta(self, path, **campos):
+        meta = self._read_meta(path)
+        meta.update(campos)
+        self._write_meta(path, meta)
+
+    @staticmethod
+    def _arquivo(path, coluna, meta):
+        """Arquivo da coluna na geração atual (cada prepend grava uma geração nova)"""
+        geracao = meta.get('geracao')
+        return os.path.join(path, f"{coluna}.bin" if geracao is None else f"{coluna}.{geracao}.bin")
+
+    def read(self, pair, intervalo):
+        """Colunas em disco via memory-map (arrays vazios se não houver cache)"""
+        path = self._path(pair, intervalo)
+        meta = self._read_meta(path)
+        sizes = []
+        for coluna in COLUNAS_CACHE:
+            arquivo = self._arquivo(path, coluna, meta)
+            sizes.append(os.path.getsize(arquivo) // 8 if os.path.exists(arquivo) else 0)
+        # O meta.json é gravado por último: linhas além de `linhas` são de uma escrita
+        # interrompida. Caches antigos, sem a contagem, usam a menor coluna
+        total = min(sizes + [meta.get('linhas', min(sizes))])
+        if total == 0:
+            return {coluna: np.empty(0, dtype=_dtype(coluna)) for coluna in COLUNAS_CACHE}
+        return {
+            coluna: np.memmap(self._arquivo(path, coluna, meta), dtype=_dtype(coluna), mode='r', shape=(total,))
+            for coluna in COLUNAS_CACHE
+        }
+
+    def _append(self, path, columns, total_atual):
+        os.makedirs(path, exist_ok=True)
+        meta = self._read_meta(path)
+        for coluna in COLUNAS_CACHE:
+            arquivo = self._arquivo(path, coluna, meta)
+            with open(arquivo, 'r+b' if os.path.exists(arquivo) else 'wb') as f:
+                f.truncate(total_atual * 8)
+                f.seek(total_atual * 8)
+                f.write(np.ascontiguousarray(columns[coluna], dtype=_dtype(coluna)).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        self._update_meta(path, linhas=total_atual + len(columns['open_time']))
+
+    def _prepend(self, path, columns, atuais):
+        """
+        Grava o histórico anterior + o atual numa geração nova de arquivos e só então
+        troca a geração e a contagem no meta.json (um único rename): uma interrupção
+        no meio deixa o cache anterior intacto.
+        """
+        meta = self._read_meta(path)
+        anterior = dict(meta)
+        meta['geracao'] = meta.get('geracao', 0) + 1
+        meta['linhas'] = len(columns['open_time']) + len(atuais['open_time'])
+        for coluna in COLUNAS_CACHE:
+            with open(self._arquivo(path, coluna, meta), 'wb') as f:
+                f.write(np.ascontiguousarray(columns[coluna], dtype=_dtype(coluna)).tobytes())
+                f.write(np.ascontiguousarray(atuais[coluna]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        self._write_meta(path, meta)
+        for coluna in COLUNAS_CACHE:
+            with contextlib.suppress(OSError):
+                os.remove(self._arquivo(path, coluna, anterior))
+
+    def _fetch(self, pair, intervalo, start_ms, end_ms):
+        """Baixa os klines já fechados de [start_ms, end_ms] paginando a API"""
+        lotes = []
+        agora = int(time.time() * 1000)
+        while start_ms <= end_ms:
+            klines = self.client.get_klines(
+                symbol=pair,
+                interval=intervalo,
+                startTime=start_ms,
+                endTime=end_ms,
+                limit=LIMITE_POR_REQUISICAO
+            )
+            # Candle em formação não vai para o cache
+            fechados = [k for k in klines if k[6] < agora]
+            if fechados:
+                lotes.append(klines_to_arrays(fechados))
+            if len(klines) < LIMITE_POR_REQUISICAO or len(fechados) < len(klines):
+                break
+            start_ms = klines[-1][0] + 1
+        if not lotes:
+            return None
+        return {coluna: np.concatenate([lote[coluna] for lote in lotes]) for coluna in COLUNAS_CACHE}
+
+    def _sync(self, pair, intervalo, start_ms, end_ms):
+        """Baixa o histórico anterior e posterior ao que já está em disco"""
+        path = self._path(pair, intervalo)
+        passo = interval_to_ms(intervalo)
+        start_ms -= start_ms % passo  # Alinha ao início de um candle
+        atuais = self.read(pair, intervalo)
+        total = len(atuais['open_time'])
+        meta = self._read_meta(path)
+
+        # Histórico anterior ao primeiro candle em cache (sem insistir antes da listagem do par)
+        primeiro = int(atuais['open_time'][0]) if total else end_ms + 1
+        if start_ms < primeiro and primeiro > meta.get('inicio_listagem', 0):
+            antigos = self._fetch(pair, intervalo, start_ms, primeiro - 1)
+            if antigos is not None:
+                if total:
+                    self._prepend(path, antigos, atuais)
+                else:
+                    self._append(path, antigos, 0)
+                atuais = self.read(pair, intervalo)
+                total = len(atuais['open_time'])
+            if antigos is None or antigos['open_time'][0] >= start_ms + passo:
+                if total:
+                    self._update_meta(path, inicio_listagem=int(atuais['open_time'][0]))
+
+        # Candles fechados depois do último em cache
+        if total and end_ms - int(atuais['close_time'][-1]) >= passo:
+            novos = self._fetch(pair, intervalo, int(atuais['open_time'][-1]) + 1, end_ms)
+            if novos is not None:
+                self._append(path, novos, total)
+
+    def load(self, pair, intervalo, start_ms, end_ms=None):
+        """Colunas dos candles de [start_ms, end_ms], baixando só o que ainda não está em disco"""
+        end_ms = end_ms or int(time.time() * 1000)
+        if not self.offline:
+            self._sync(pair, intervalo, start_ms, end_ms)
+        atuais = self.read(pair, intervalo)
+        inicio = np.searchsorted(atuais['open_time'], start_ms, side='left')
+        fim = np.searchsorted(atuais['open_time'], end_ms, side='right')
+        return {coluna: atuais[coluna][inicio:fim] for coluna in COLUNAS_CACHE}
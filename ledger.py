@@ -0,0 +1,187 @@
+import math
+
+import numpy as np
+
+# Motivos de saída (os três primeiros com os mesmos códigos de exits.SAIDA_*)
+MOTIVOS = ('stop_loss', 'take_profit', 'tempo', 'avaliacao', 'residual', 'outro')
+MOTIVO_CODIGO = {nome: codigo for codigo, nome in enumerate(MOTIVOS)}
+
+DTYPE_OPERACAO = np.dtype([
+    ('par', np.int16),
+    ('entrada_ts', np.int64),      # Segundos
+    ('saida_ts', np.int64),
+    ('preco_entrada', np.float64),
+    ('preco_saida', np.float64),
+    ('quantidade', np.float64),
+    ('taxas', np.float64),         # Em USDT
+    ('motivo', np.int8),
+    ('lucro', np.float64),         # Líquido de taxas
+    ('patrimonio', np.float64),    # Lucro acumulado de todos os pares até a operação
+    ('acumulado_par', np.float64)  # Lucro acumulado do par até a operação
+])
+
+
+class Estatisticas:
+    """
+    Métricas de desempenho atualizadas a cada lote de operações anexado, sem
+    revisitar as anteriores: lucro, pico e drawdown máximo da curva de lucro
+    acumulado, acertos, soma de ganhos/perdas e média/variância (Welford) dos
+    lucros por operação.
+    """
+
+    def __init__(self):
+        self.operacoes = 0
+        self.lucro = 0.0
+        self.pico = 0.0
+        self.max_drawdown = 0.0
+        self.ganhos = 0
+        self.soma_ganhos = 0.0
+        self.soma_perdas = 0.0
+        self._media = 0.0
+        self._m2 = 0.0
+
+    def adicionar(self, lucros):
+        """Incorpora os lucros em ordem. Retorna o lucro acumulado após cada um"""
+        lucros = np.asarray(lucros, dtype=np.float64)
+        if len(lucros) == 0:
+            return lucros
+        acumulado = self.lucro + np.cumsum(lucros)
+        picos = np.maximum(np.maximum.accumulate(acumulado), self.pico)
+        self.max_drawdown = max(self.max_drawdown, float(np.max(picos - acumulado)))
+        self.pico = float(picos[-1])
+        self.lucro = float(acumulado[-1])
+
+        positivos = lucros > 0
+        self.ganhos += int(np.count_nonzero(positivos))
+        self.soma_ganhos += float(lucros[positivos].sum())
+        self.soma_perdas -= float(lucros[lucros < 0].sum())
+
+        # Combinação de médias/variâncias de dois grupos (Chan et al.)
+        n_lote = len(lucros)
+        media_lote = float(lucros.mean())
+        m2_lote = float(np.square(lucros - media_lote).sum())
+        total = self.operacoes + n_lote
+        delta = media_lote - self._media
+        self._media += delta * n_lote / total
+        self._m2 += m2_lote + delta * delta * self.operacoes * n_lote / total
+        self.operacoes = total
+        return acumulado
+
+    @property
+    def taxa_acerto(self):
+        return self.ganhos / self.operacoes if self.operacoes else 0.0
+
+    @property
+    def fator_lucro(self):
+        """Ganhos brutos / perdas brutas (inf sem perdas)"""
+        if self.soma_perdas == 0:
+            return math.inf if self.soma_ganhos > 0 else 0.0
+        return self.soma_ganhos / self.soma_perdas
+
+    @property
+    def sharpe(self):
+        """Média / desvio padrão amostral do lucro por operação (sem anualizar)"""
+        if self.operacoes < 2 or self._m2 == 0:
+            return 0.0
+        return self._media / math.sqrt(self._m2 / (self.operacoes - 1))
+
+    def resumo(self):
+        return {
+            'operacoes': self.operacoes,
+            'lucro': self.lucro,
+            'max_drawdown': self.max_drawdown,
+            'taxa_acerto': self.taxa_acerto,
+            'fator_lucro': self.fator_lucro,
+            'sharpe': self.sharpe
+        }
+
+
+class TradeLedger:
+    """
+    Registro das operações do backtest num array estruturado pré-alocado
+    (DTYPE_OPERACAO, ~75 bytes por operação, cresce dobrando). As métricas totais
+    e por par são mantidas incrementalmente e o lucro acumulado fica gravado em
+    cada linha, de modo que relatórios e gráficos só leem colunas.
+    """
+
+    def __init__(self, pares, capacidade=1024):
+        self.pares = list(pares)
+        self._indice = {pair: i for i, pair in enumerate(self.pares)}
+        self._dados = np.zeros(max(1, capacidade), dtype=DTYPE_OPERACAO)
+        self.n = 0
+        self.total = Estatisticas()
+        self.por_par = {pair: Estatisticas() for pair in self.pares}
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def operacoes(self):
+        """View das operações registradas, em ordem de registro"""
+        return self._dados[:self.n]
+
+    def _reservar(self, k):
+        if self.n + k > len(self._dados):
+            capacidade = len(self._dados)
+            while capacidade < self.n + k:
+                capacidade *= 2
+            dados = np.zeros(capacidade, dtype=DTYPE_OPERACAO)
+            dados[:self.n] = self._dados[:self.n]
+            self._dados = dados
+
+    def _codigos_par(self, par, k):
+        if isinstance(par, str):
+            return np.full(k, self._indice[par], dtype=np.int16)
+        par = np.asarray(par)
+        if par.dtype.kind in 'UO':
+            return np.array([self._indice[p] for p in par], dtype=np.int16)
+        return par.astype(np.int16)
+
+    def extend(self, par, entrada_ts, saida_ts, preco_entrada, preco_saida,
+               quantidade=1.0, taxas=0.0, motivo='outro', lucro=None):
+        """
+        Anexa um lote de operações já em ordem de saída. `par` é o nome (todas do
+        mesmo par) ou um array de nomes/índices; `motivo` é um nome de MOTIVOS ou
+        um array de códigos. Sem `lucro`, usa (saída - entrada) * quantidade - taxas.
+        """
+        saida_ts = np.atleast_1d(np.asarray(saida_ts, dtype=np.int64))
+        k = len(saida_ts)
+        if k == 0:
+            return
+        self._reservar(k)
+        linhas = self._dados[self.n:self.n + k]
+        linhas['par'] = self._codigos_par(par, k)
+        linhas['entrada_ts'] = entrada_ts
+        linhas['saida_ts'] = saida_ts
+        linhas['preco_entrada'] = preco_entrada
+        linhas['preco_saida'] = preco_saida
+        linhas['quantidade'] = quantidade
+        linhas['taxas'] = taxas
+        linhas['motivo'] = MOTIVO_CODIGO[motivo] if isinstance(motivo, str) else motivo
+        if lucro is None:
+            linhas['lucro'] = (linhas['preco_saida'] - linhas['preco_entrada']) * linhas['quantidade'] - linhas['taxas']
+        else:
+            linhas['lucro'] = lucro
+
+        linhas['patrimonio'] = self.total.adicionar(linhas['lucro'])
+        for codigo in np.unique(linhas['par']):
+            mascara = linhas['par'] == codigo
+            linhas['acumulado_par'][mascara] = self.por_par[self.pares[codigo]].adicionar(linhas['lucro'][mascara])
+        self.n += k
+
+    def registrar(self, par, entrada_ts, saida_ts, preco_entrada, preco_saida,
+                  quantidade=1.0, taxas=0.0, motivo='outro', lucro=None):
+        """Anexa uma única operação"""
+        self.extend(par, [entrada_ts], [saida_ts], preco_entrada, preco_saida, quantidade, taxas, motivo,
+                    None if lucro is None else [lucro])
+
+    def mascara_par(self, par):
+        """Máscara booleana das operações de um par (para extrair só as colunas necessárias)"""
+        return self.operacoes['par'] == self._indice[par]
+
+    def do_par(self, par):
+        """Operações de um par (cópia), na ordem de registro"""
+        return self.operacoes[self.mascara_par(par)]
+
+    def resumo(self, par=None):
+        return (self.total if par is None else self.por_par[par]).resumo()
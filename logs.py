@@ -0,0 +1,89 @@
+import atexit
+import json
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+import numpy as np
+
+
+class _FilaHandler(QueueHandler):
+    """Enfileira o registro sem formatar: a mensagem só é montada na thread de escrita"""
+
+    def prepare(self, record):
+        return record
+
+
+def iniciar_fila_logs(logger, *handlers):
+    """
+    Troca a escrita síncrona por uma fila: o logger só enfileira e um
+    QueueListener em segundo plano formata e grava nos `handlers`.
+    """
+    fila = queue.SimpleQueue()
+    logger.addHandler(_FilaHandler(fila))
+    listener = QueueListener(fila, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(_parar_listener, listener)
+    return listener
+
+
+def _parar_listener(listener):
+    # QueueListener.stop falha se chamado de novo depois de parado
+    if listener._thread is not None:
+        listener.stop()
+
+
+def _json_default(valor):
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    return str(valor)  # Decimal e demais tipos
+
+
+class EventLog:
+    """
+    Eventos estruturados (sinais, ordens, execuções) em JSONL compacto, uma linha
+    por evento, gravados por uma thread própria. Sem `arquivo`, não registra nada.
+    """
+
+    def __init__(self, arquivo, clock=time):
+        self.arquivo = arquivo
+        self.clock = clock
+        self._fila = queue.SimpleQueue()
+        self._thread = None
+        if arquivo:
+            self._thread = threading.Thread(target=self._escrever, name='eventos', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def registrar(self, tipo, **campos):
+        if self._thread is not None:
+            self._fila.put({'ts': self.clock.time(), 'tipo': tipo, **campos})
+
+    def _escrever(self):
+        with open(self.arquivo, 'a') as f:
+            while True:
+                lote = [self._fila.get()]
+                # Agrupa o que já estiver na fila numa única escrita
+                while True:
+                    try:
+                        lote.append(self._fila.get_nowait())
+                    except queue.Empty:
+                        break
+                fim = None in lote
+                for evento in lote:
+                    if evento is not None:
+                        f.write(json.dumps(evento, separators=(',', ':'), ensure_ascii=False, default=_json_default))
+                        f.write('\n')
+                f.flush()
+                if fim:
+                    return
+
+    def close(self):
+        """Grava os eventos pendentes e encerra a thread"""
+        if self._thread is not None:
+            self._fila.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
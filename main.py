@@ -22,13 +22,36 @@ def load_config():
         'VALOR_OPERACAO_USD': VALOR_OPERACAO_USD,
         'TEMPO_MAXIMO_OPERACAO': TEMPO_MAXIMO_OPERACAO,
         'VERIFICACAO_INTERVALO': VERIFICACAO_INTERVALO,
+        'WATCHDOG_ATIVO': WATCHDOG_ATIVO,
+        'WATCHDOG_INTERVALO': WATCHDOG_INTERVALO,
+        'POSICAO_ARQUIVO': POSICAO_ARQUIVO,
         'VALOR_MINIMO_RESIDUAL': VALOR_MINIMO_RESIDUAL,
         'SCORE_MINIMO_ENTRADA': SCORE_MINIMO_ENTRADA,
+        'MODO_STREAM': MODO_STREAM,
+        'SCAN_ASSINCRONO': SCAN_ASSINCRONO,
+        'SCAN_CONCORRENCIA': SCAN_CONCORRENCIA,
+        'UNIVERSO_DINAMICO': UNIVERSO_DINAMICO,
+        'UNIVERSO_TOP_K': UNIVERSO_TOP_K,
+        'UNIVERSO_ATUALIZACAO': UNIVERSO_ATUALIZACAO,
+        'VOLUME_MINIMO_24H_USD': VOLUME_MINIMO_24H_USD,
+        'SPREAD_MAXIMO': SPREAD_MAXIMO,
+        'VOLATILIDADE_MINIMA': VOLATILIDADE_MINIMA,
         'LOG_FILE': LOG_FILE,
         'LOG_LEVEL': LOG_LEVEL,
+        'EVENTOS_ARQUIVO': EVENTOS_ARQUIVO,
         'EXPANSAO_TEMPO_PREJUIZO': getattr(sys.modules[__name__], 'EXPANSAO_TEMPO_PREJUIZO', 1.5),
         'VOLATILIDADE_MAXIMA_SL': getattr(sys.modules[__name__], 'VOLATILIDADE_MAXIMA_SL', 0.05),
         'SALDO_MINIMO_USD': SALDO_MINIMO_USD,
+        'REGRAS_PARES_TTL': REGRAS_PARES_TTL,
+        'PRECOS_IDADE_MAXIMA': PRECOS_IDADE_MAXIMA,
+        'SALDOS_IDADE_MAXIMA': SALDOS_IDADE_MAXIMA,
+        'LIMITE_PESO_MINUTO': LIMITE_PESO_MINUTO,
+        'VERIFICACAO_CONSISTENCIA_CICLOS': VERIFICACAO_CONSISTENCIA_CICLOS,
+        'METRICAS_JANELA': METRICAS_JANELA,
+        'METRICAS_ARQUIVO': METRICAS_ARQUIVO,
+        'METRICAS_INTERVALO': METRICAS_INTERVALO,
+        'METRICAS_PORTA': METRICAS_PORTA,
+        'METRICAS_HOST': METRICAS_HOST,
         # Indicadores técnicos
         'RSI_PERIODO': RSI_PERIODO,
         'MACD_PERIODO_RAPIDO': MACD_PERIODO_RAPIDO,
@@ -73,12 +96,16 @@ def main():
         # Carrega configurações
         config = load_config()
 
-        # Adiciona cliente temporário para buscar saldo de USDT
+        # Um único client para todo o bot
         from binance.client import Client
         client = Client(config['API_KEY'], config['API_SECRET'])
 
+        # Inicializa o bot
+        bot = CryptoTrader(config, client=client)
+
+        # Saldo de USDT do snapshot da conta já feito na inicialização (sem nova chamada)
         try:
-            saldo_usdt = float(client.get_asset_balance(asset='USDT')['free'])
+            saldo_usdt = bot.account.balance('USDT')[0]
             valor_operacao_dinamico = round(saldo_usdt * 0.9, 2)
             config['VALOR_OPERACAO_USD'] = valor_operacao_dinamico
             print(f"💰 Saldo USDT detectado: ${saldo_usdt:.2f} | Valor da operação ajustado para: ${valor_operacao_dinamico:.2f}")
@@ -86,9 +113,6 @@ def main():
             print(f"⚠️ Erro ao consultar saldo na Binance: {str(e)}")
             print("Usando valor fixo da configuração.")
         
-        # Inicializa o bot
-        bot = CryptoTrader(config)
-        
         # Registro de inicialização
         logging.info(f"Pares: {config['PARES_MONITORADOS']}")
         logging.info(f"Tempo máximo por operação: {config['TEMPO_MAXIMO_OPERACAO']/60} minutos")
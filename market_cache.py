@@ -0,0 +1,74 @@
+import time
+
+
+class PriceCache:
+    """
+    Preços de todos os símbolos a partir de um único get_all_tickers por ciclo.
+    Eventos de preço do feed atualizam símbolos individuais entre os snapshots.
+    """
+
+    def __init__(self, client, max_idade=5, clock=time):
+        self.client = client
+        self.clock = clock
+        self.max_idade = max_idade
+        self._prices = {}
+        self._updated_at = {}
+        self.snapshot_at = 0
+
+    def refresh(self):
+        """Snapshot de preços de todos os símbolos numa chamada"""
+        agora = self.clock.time()
+        for ticker in self.client.get_all_tickers():
+            self._prices[ticker['symbol']] = float(ticker['price'])
+            self._updated_at[ticker['symbol']] = agora
+        self.snapshot_at = agora
+
+    def update(self, pair, price):
+        """Preço recebido por push (feed de mercado)"""
+        self._prices[pair] = price
+        self._updated_at[pair] = self.clock.time()
+
+    def age(self, pair):
+        """Idade em segundos do preço do par (infinito se desconhecido)"""
+        return self.clock.time() - self._updated_at.get(pair, float('-inf'))
+
+    def price(self, pair):
+        """Preço do par, renovando o snapshot se estiver mais velho que max_idade"""
+        if self.age(pair) > self.max_idade:
+            self.refresh()
+        return self._prices[pair]
+
+
+class AccountSnapshot:
+    """Saldos de todos os ativos a partir de um único get_account"""
+
+    def __init__(self, client, max_idade=30, clock=time):
+        self.client = client
+        self.clock = clock
+        self.max_idade = max_idade
+        self._balances = {}
+        self.updated_at = 0
+
+    def refresh(self):
+        account = self.client.get_account()
+        self._balances = {
+            b['asset']: (float(b['free']), float(b['locked']))
+            for b in account['balances']
+        }
+        self.updated_at = self.clock.time()
+
+    def invalidate(self):
+        """Força nova consulta (chamado após cada ordem executada)"""
+        self.updated_at = 0
+
+    def balances(self):
+        """Saldos com valor (ativo -> (livre, bloqueado))"""
+        if self.clock.time() - self.updated_at > self.max_idade:
+            self.refresh()
+        return {asset: b for asset, b in self._balances.items() if b[0] + b[1] > 0}
+
+    def balance(self, asset):
+        """Saldo (livre, bloqueado) do ativo"""
+        if self.clock.time() - self.updated_at > self.max_idade:
+            self.refresh()
+        return self._balances.get(asset, (0.0, 0.0))
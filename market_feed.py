@@ -0,0 +1,118 @@
+import heapq
+import time
+
+from kline_cache import KlineCache
+
+
+class BinanceStreamFeed:
+    """
+    Dados de mercado por WebSocket: klines e miniTicker de todos os pares numa
+    única conexão multiplexada. `run` bloqueia e chama os callbacks a cada evento.
+    """
+
+    def __init__(self, api_key, api_secret, pairs, intervalo):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.pairs = pairs
+        self.intervalo = intervalo
+        self._twm = None
+
+    def _handle(self, msg, on_kline, on_price):
+        data = msg.get('data', msg)
+        evento = data.get('e')
+        if evento == 'kline':
+            k = data['k']
+            kline = [k['t'], k['o'], k['h'], k['l'], k['c'], k['v'], k['T']]
+            on_kline(data['s'], kline, k['x'])
+            on_price(data['s'], float(k['c']))
+        elif evento == '24hrMiniTicker':
+            on_price(data['s'], float(data['c']))
+
+    def run(self, on_kline, on_price):
+        from binance import ThreadedWebsocketManager
+
+        self._twm = ThreadedWebsocketManager(api_key=self.api_key, api_secret=self.api_secret)
+        self._twm.start()
+        streams = []
+        for pair in self.pairs:
+            streams.append(f"{pair.lower()}@kline_{self.intervalo}")
+            streams.append(f"{pair.lower()}@miniTicker")
+        self._twm.start_multiplex_socket(
+            callback=lambda msg: self._handle(msg, on_kline, on_price),
+            streams=streams
+        )
+        self._twm.join()
+
+    def stop(self):
+        if self._twm is not None:
+            self._twm.stop()
+            self._twm = None
+
+
+class ReplayFeed:
+    """
+    Reproduz candles gravados como eventos, sem rede.
+
+    Para cada candle emite os preços de abertura, mínima/máxima e fechamento e em
+    seguida o kline fechado, intercalando os pares pela ordem de tempo.
+    `velocidade` multiplica o tempo real (60 = 1 hora de dados por minuto);
+    0 reproduz o mais rápido possível.
+
+    `clock` (RelogioSimulado) acompanha o horário dos candles reproduzidos e deve
+    ser o relógio do bot: CryptoTrader(config, client, clock=feed.clock).
+    """
+
+    def __init__(self, series, velocidade=0, clock=None):
+        from sim_exchange import RelogioSimulado
+
+        self.series = series
+        self.velocidade = velocidade
+        if clock is None:
+            inicios = [int(c['open_time'][0]) for c in series.values() if len(c['open_time'])]
+            clock = RelogioSimulado(min(inicios) / 1000 if inicios else 0)
+        self.clock = clock
+        self._running = False
+
+    @classmethod
+    def from_cache(cls, directory, pairs, intervalo, velocidade=0):
+        """Usa os klines salvos pelo KlineCache"""
+        cache = KlineCache(None, directory, offline=True)
+        return cls({pair: cache.read(pair, intervalo) for pair in pairs}, velocidade)
+
+    def _events(self):
+        """Candles de todos os pares em ordem de open_time: (open_time, par, índice)"""
+        def eventos(pair, open_time):
+            # Função própria por par: um generator inline leria `pair` só no fim do laço
+            for i, t in enumerate(open_time):
+                yield int(t), pair, i
+
+        return heapq.merge(*(eventos(pair, columns['open_time']) for pair, columns in self.series.items()))
+
+    def run(self, on_kline, on_price):
+        self._running = True
+        inicio_real = time.time()
+        inicio_simulado = None
+        for open_time, pair, i in self._events():
+            if not self._running:
+                break
+            c = self.series[pair]
+            close_time = int(c['close_time'][i])
+            o, h, l, cl = float(c['open'][i]), float(c['high'][i]), float(c['low'][i]), float(c['close'][i])
+
+            if self.velocidade:
+                inicio_simulado = inicio_simulado or open_time
+                atraso = (close_time - inicio_simulado) / 1000 / self.velocidade - (time.time() - inicio_real)
+                if atraso > 0:
+                    time.sleep(atraso)
+
+            # Caminho intrabarra: candle de alta passa pela mínima antes da máxima,
+            # com o relógio em abertura, 1/3, 2/3 e fechamento do candle
+            for k, price in enumerate((o, l, h, cl) if cl >= o else (o, h, l, cl)):
+                self.clock.agora = max(self.clock.agora, (open_time + (close_time - open_time) * k / 3) / 1000)
+                on_price(pair, price)
+            kline = [open_time, o, h, l, cl, float(c['volume'][i]), close_time]
+            on_kline(pair, kline, True)
+        self._running = False
+
+    def stop(self):
+        self._running = False
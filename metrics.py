@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+QUANTIS = (0.5, 0.95, 0.99)
+
+
+class Metricas:
+    """
+    Latências por etapa (janela móvel das últimas `janela` medições, exportadas
+    como p50/p95/p99), contagem de requisições e erros por endpoint da API e a
+    latência de ponta a ponta entre o sinal e a execução da ordem.
+    Seguro para as threads do scan assíncrono.
+    """
+
+    def __init__(self, janela=1000):
+        self.janela = janela
+        self._lock = threading.Lock()
+        self._amostras = {}
+        self._soma = {}
+        self._total = {}
+        self._requisicoes = {}
+        self._erros = {}
+        self._sinais = {}
+
+    def observar(self, etapa, segundos):
+        with self._lock:
+            if etapa not in self._amostras:
+                self._amostras[etapa] = deque(maxlen=self.janela)
+                self._soma[etapa] = 0.0
+                self._total[etapa] = 0
+            self._amostras[etapa].append(segundos)
+            self._soma[etapa] += segundos
+            self._total[etapa] += 1
+
+    @contextmanager
+    def medir(self, etapa):
+        """Cronometra o bloco como uma etapa"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(etapa, time.perf_counter() - inicio)
+
+    def requisicao(self, endpoint, segundos, erro=False):
+        """Registra uma chamada à API (latência na etapa api_<endpoint>)"""
+        self.observar(f"api_{endpoint}", segundos)
+        with self._lock:
+            self._requisicoes[endpoint] = self._requisicoes.get(endpoint, 0) + 1
+            if erro:
+                self._erros[endpoint] = self._erros.get(endpoint, 0) + 1
+
+    def sinal(self, pair, side):
+        """Marca o instante em que a decisão de compra/venda do par foi tomada"""
+        with self._lock:
+            self._sinais[(pair, side)] = time.perf_counter()
+
+    def execucao(self, pair, side):
+        """Ordem executada: registra a latência desde o sinal correspondente"""
+        with self._lock:
+            inicio = self._sinais.pop((pair, side), None)
+        if inicio is not None:
+            self.observar(f"sinal_ate_execucao_{side}", time.perf_counter() - inicio)
+
+    def percentis(self, etapa):
+        """{quantil: segundos} da janela atual da etapa"""
+        with self._lock:
+            amostras = np.array(self._amostras.get(etapa, ()))
+        if not len(amostras):
+            return {}
+        return dict(zip(QUANTIS, np.quantile(amostras, QUANTIS)))
+
+    def exportar(self):
+        """Métricas no formato texto do Prometheus"""
+        with self._lock:
+            etapas = sorted(self._amostras)
+            soma, total = dict(self._soma), dict(self._total)
+            requisicoes, erros = dict(self._requisicoes), dict(self._erros)
+
+        linhas = [
+            '# HELP bot_trader_latencia_segundos Latência por etapa (janela móvel)',
+            '# TYPE bot_trader_latencia_segundos summary'
+        ]
+        for etapa in etapas:
+            for quantil, valor in self.percentis(etapa).items():
+                linhas.append(f'bot_trader_latencia_segundos{{etapa="{etapa}",quantile="{quantil}"}} {valor:.6f}')
+            linhas.append(f'bot_trader_latencia_segundos_sum{{etapa="{etapa}"}} {soma[etapa]:.6f}')
+            linhas.append(f'bot_trader_latencia_segundos_count{{etapa="{etapa}"}} {total[etapa]}')
+
+        linhas += [
+            '# HELP bot_trader_requisicoes_total Chamadas à API por endpoint',
+            '# TYPE bot_trader_requisicoes_total counter'
+        ]
+        linhas += [f'bot_trader_requisicoes_total{{endpoint="{e}"}} {n}' for e, n in sorted(requisicoes.items())]
+        linhas += [
+            '# HELP bot_trader_erros_total Chamadas à API com erro por endpoint',
+            '# TYPE bot_trader_erros_total counter'
+        ]
+        linhas += [f'bot_trader_erros_total{{endpoint="{e}"}} {erros.get(e, 0)}' for e in sorted(requisicoes)]
+        return '\n'.join(linhas) + '\n'
+
+    def salvar(self, arquivo):
+        """Grava o arquivo de métricas atomicamente (textfile collector do node_exporter)"""
+        tmp = f"{arquivo}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.exportar())
+        os.replace(tmp, arquivo)
+
+    def servir(self, porta, host='127.0.0.1'):
+        """Expõe GET /metrics numa thread em segundo plano. Retorna o servidor"""
+        metricas = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                corpo = metricas.exportar().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer((host, porta), Handler)
+        threading.Thread(target=servidor.serve_forever, daemon=True, name='metricas').start()
+        return servidor
+
+
+class ClienteInstrumentado:
+    """
+    Envolve o client da Binance (ou o simulado) cronometrando e contando cada
+    chamada de método por endpoint. Atributos que não são métodos passam direto.
+    """
+
+    def __init__(self, client, metricas):
+        if isinstance(client, ClienteInstrumentado):
+            client = client.client
+        self.client = client
+        self.metricas = metricas
+
+    def __getattr__(self, nome):
+        atributo = getattr(self.client, nome)
+        if not callable(atributo) or nome.startswith('_'):
+            return atributo
+        metricas = self.metricas
+
+        def chamada(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                resultado = atributo(*args, **kwargs)
+            except Exception:
+                metricas.requisicao(nome, time.perf_counter() - inicio, erro=True)
+                raise
+            metricas.requisicao(nome, time.perf_counter() - inicio)
+            return resultado
+        return chamada
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Análise de Monte Carlo das operações do backtest: reamostra a sequência de
+lucros do ledger milhares de vezes para separar sorte de vantagem.
+
+Métodos:
+    bootstrap   sorteia operações com reposição (lucro final e drawdown variam)
+    embaralhar  permuta a ordem original (mesmo lucro final, só o drawdown varia)
+    blocos      bootstrap circular em blocos, preserva sequências de ganhos/perdas
+
+As simulações rodam em lotes vetorizados distribuídos entre processos. Cada lote
+tem semente própria derivada de --seed, então o resultado não depende do número
+de workers, e as distribuições são acumuladas em histogramas de tamanho fixo:
+a memória é a mesma para mil ou dez milhões de simulações.
+
+Exemplos:
+    python3 montecarlo.py --offline --simulacoes 50000 --metodo blocos
+    python3 montecarlo.py --offline --replay --par BTCUSDT --capital 500 --ruina 0.3
+"""
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+METODOS = ('bootstrap', 'embaralhar', 'blocos')
+# Elementos (simulações x operações) por lote: ~32 MB por matriz float64 em cada processo
+ELEMENTOS_POR_LOTE = 1 << 22
+# Classes dos histogramas que acumulam lucro final e drawdown
+CLASSES = 1 << 14
+QUANTIS_PADRAO = (0.05, 0.5, 0.95)
+
+
+def reamostrar(lucros, metodo, simulacoes, rng, bloco=None):
+    """Matriz simulações x operações com as sequências de lucros reamostradas"""
+    n = len(lucros)
+    if metodo == 'bootstrap':
+        return lucros[rng.integers(0, n, size=(simulacoes, n))]
+    if metodo == 'embaralhar':
+        return rng.permuted(np.broadcast_to(lucros, (simulacoes, n)), axis=1)
+    if metodo == 'blocos':
+        bloco = min(n, bloco or max(1, round(n ** (1 / 3))))
+        # Janelas da série estendida circularmente: cada início sorteado já é um bloco inteiro
+        janelas = np.lib.stride_tricks.sliding_window_view(np.concatenate((lucros, lucros[:bloco - 1])), bloco)
+        inicios = rng.integers(0, n, size=(simulacoes, -(-n // bloco)))
+        return janelas[inicios].reshape(simulacoes, -1)[:, :n]
+    raise ValueError(f"Método desconhecido: {metodo} (disponíveis: {METODOS})")
+
+
+def metricas(caminhos, limite_ruina):
+    """
+    Lucro final, drawdown máximo e ruína de cada simulação. A curva começa em zero
+    (como em ledger.Estatisticas) e há ruína quando o lucro acumulado chega a
+    -limite_ruina. Reaproveita `caminhos` para o acumulado.
+    """
+    acumulado = np.cumsum(caminhos, axis=1, out=caminhos)
+    final = acumulado[:, -1].copy()
+    ruina = acumulado.min(axis=1) <= -limite_ruina
+    picos = np.maximum.accumulate(acumulado, axis=1)
+    np.maximum(picos, 0.0, out=picos)
+    np.subtract(picos, acumulado, out=picos)
+    return final, picos.max(axis=1), ruina
+
+
+class Distribuicao:
+    """
+    Histograma de faixa fixa com mínimo, máximo e soma exatos. Valores fora da
+    faixa entram nas classes das pontas; os quantis são interpolados dentro da
+    classe e limitados ao mínimo/máximo observados.
+    """
+
+    def __init__(self, inicio, fim, classes=CLASSES):
+        if not fim > inicio:
+            folga = abs(inicio) * 1e-9 + 1e-12
+            inicio, fim = inicio - folga, fim + folga
+        self.inicio = inicio
+        self.largura = (fim - inicio) / classes
+        self.contagem = np.zeros(classes, dtype=np.int64)
+        self.n = 0
+        self.soma = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    def adicionar(self, valores):
+        classes = len(self.contagem)
+        indices = np.clip(np.floor((valores - self.inicio) / self.largura), 0, classes - 1).astype(np.int64)
+        self.contagem += np.bincount(indices, minlength=classes)
+        self.n += len(valores)
+        self.soma += float(valores.sum())
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+
+    def juntar(self, outra):
+        self.contagem += outra.contagem
+        self.n += outra.n
+        self.soma += outra.soma
+        self.minimo = min(self.minimo, outra.minimo)
+        self.maximo = max(self.maximo, outra.maximo)
+
+    @property
+    def media(self):
+        return self.soma / self.n if self.n else 0.0
+
+    def quantil(self, q):
+        acumulado = np.cumsum(self.contagem)
+        alvo = q * self.n
+        k = min(int(np.searchsorted(acumulado, alvo, side='left')), len(acumulado) - 1)
+        anterior = acumulado[k - 1] if k else 0
+        fracao = (alvo - anterior) / self.contagem[k] if self.contagem[k] else 0.0
+        valor = self.inicio + (k + fracao) * self.largura
+        return min(max(valor, self.minimo), self.maximo)
+
+
+def _faixa(valores, piso=-math.inf):
+    """Faixa dos histogramas: a do lote piloto com uma amplitude de folga de cada lado"""
+    lo, hi = float(valores.min()), float(valores.max())
+    folga = hi - lo
+    return max(lo - folga, piso), hi + folga
+
+
+_worker = {}
+
+
+def _iniciar_worker(lucros, metodo, bloco, limite_ruina, faixas):
+    _worker.update(lucros=lucros, metodo=metodo, bloco=bloco, limite_ruina=limite_ruina, faixas=faixas)
+
+
+def _simular_lote(tarefa):
+    """Roda um lote e devolve só os histogramas e as contagens (alguns KB)"""
+    semente, simulacoes = tarefa
+    rng = np.random.default_rng(semente)
+    caminhos = reamostrar(_worker['lucros'], _worker['metodo'], simulacoes, rng, _worker['bloco'])
+    final, drawdown, ruina = metricas(caminhos, _worker['limite_ruina'])
+    faixa_lucro, faixa_drawdown = _worker['faixas']
+    lucro, dd = Distribuicao(*faixa_lucro), Distribuicao(*faixa_drawdown)
+    lucro.adicionar(final)
+    dd.adicionar(drawdown)
+    return lucro, dd, int(np.count_nonzero(ruina)), int(np.count_nonzero(final < 0))
+
+
+def _intervalo_wilson(k, n, z=1.959964):
+    """Intervalo de confiança de 95% para a proporção k/n"""
+    if n == 0:
+        return 0.0, 0.0
+    p = k / n
+    centro = (p + z * z / (2 * n)) / (1 + z * z / n)
+    margem = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, centro - margem), min(1.0, centro + margem)
+
+
+def analisar(lucros, simulacoes=10_000, metodo='bootstrap', seed=42, capital=1000.0, ruina_pct=0.5,
+             bloco=None, quantis=QUANTIS_PADRAO, workers=None):
+    """
+    Monte Carlo sobre a sequência de lucros por operação (ordem de saída). Há ruína
+    quando o lucro acumulado perde `ruina_pct` do `capital`. Retorna um dicionário
+    com os quantis de lucro final e drawdown máximo e as probabilidades de ruína e
+    de prejuízo (com intervalo de Wilson).
+    """
+    lucros = np.ascontiguousarray(lucros, dtype=np.float64)
+    if len(lucros) == 0 or simulacoes <= 0:
+        raise ValueError("Monte Carlo precisa de ao menos uma operação e uma simulação")
+    if metodo not in METODOS:
+        raise ValueError(f"Método desconhecido: {metodo} (disponíveis: {METODOS})")
+    limite_ruina = capital * ruina_pct
+
+    # Lotes com tamanho e sementes fixos: o resultado só depende de `seed`
+    por_lote = max(1, min(simulacoes, ELEMENTOS_POR_LOTE // len(lucros)))
+    tamanhos = [por_lote] * (simulacoes // por_lote) + ([simulacoes % por_lote] if simulacoes % por_lote else [])
+    sementes = np.random.SeedSequence(seed).spawn(len(tamanhos))
+
+    # O primeiro lote roda aqui e define a faixa dos histogramas dos demais
+    rng = np.random.default_rng(sementes[0])
+    final, drawdown, ruina = metricas(reamostrar(lucros, metodo, tamanhos[0], rng, bloco), limite_ruina)
+    faixas = (_faixa(final), _faixa(drawdown, piso=0.0))
+    dist_lucro, dist_drawdown = Distribuicao(*faixas[0]), Distribuicao(*faixas[1])
+    dist_lucro.adicionar(final)
+    dist_drawdown.adicionar(drawdown)
+    ruinas, prejuizos = int(np.count_nonzero(ruina)), int(np.count_nonzero(final < 0))
+    del final, drawdown, ruina
+
+    tarefas = list(zip(sementes[1:], tamanhos[1:]))
+    initargs = (lucros, metodo, bloco, limite_ruina, faixas)
+    workers = min(workers or os.cpu_count() or 1, len(tarefas))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker, initargs=initargs) as pool:
+            lotes = pool.map(_simular_lote, tarefas)
+            for lucro, dd, r, p in lotes:
+                dist_lucro.juntar(lucro)
+                dist_drawdown.juntar(dd)
+                ruinas += r
+                prejuizos += p
+    else:
+        _iniciar_worker(*initargs)
+        for tarefa in tarefas:
+            lucro, dd, r, p = _simular_lote(tarefa)
+            dist_lucro.juntar(lucro)
+            dist_drawdown.juntar(dd)
+            ruinas += r
+            prejuizos += p
+
+    # Métricas da sequência real, para comparar com a distribuição
+    original, dd_original, _ = metricas(lucros[None, :].copy(), limite_ruina)
+    return {
+        'metodo': metodo,
+        'simulacoes': simulacoes,
+        'operacoes': len(lucros),
+        'seed': seed,
+        'lucro_real': float(original[0]),
+        'drawdown_real': float(dd_original[0]),
+        'lucro': {'media': dist_lucro.media, 'min': dist_lucro.minimo, 'max': dist_lucro.maximo,
+                  **{q: dist_lucro.quantil(q) for q in quantis}},
+        'drawdown': {'media': dist_drawdown.media, 'min': dist_drawdown.minimo, 'max': dist_drawdown.maximo,
+                     **{q: dist_drawdown.quantil(q) for q in quantis}},
+        'limite_ruina': limite_ruina,
+        'prob_ruina': ruinas / simulacoes,
+        'prob_ruina_ic': _intervalo_wilson(ruinas, simulacoes),
+        'prob_prejuizo': prejuizos / simulacoes,
+        'prob_prejuizo_ic': _intervalo_wilson(prejuizos, simulacoes)
+    }
+
+
+def formatar(resultado):
+    """Linhas de texto do resultado, no formato do relatório do backtest"""
+    quantis = [q for q in resultado['lucro'] if not isinstance(q, str)]
+
+    def faixa(chave):
+        d = resultado[chave]
+        return " | ".join(f"p{q * 100:g}: {d[q]:.4f}" for q in quantis) + f" | média: {d['media']:.4f}"
+
+    ruina_lo, ruina_hi = resultado['prob_ruina_ic']
+    prejuizo_lo, prejuizo_hi = resultado['prob_prejuizo_ic']
+    return [
+        f"Monte Carlo ({resultado['metodo']}): {resultado['simulacoes']} simulações de {resultado['operacoes']} "
+        f"operações (seed {resultado['seed']})",
+        f"  Lucro final (real {resultado['lucro_real']:.4f}): {faixa('lucro')}",
+        f"  Drawdown máximo (real {resultado['drawdown_real']:.4f}): {faixa('drawdown')}",
+        f"  Risco de ruína (perda de {resultado['limite_ruina']:.2f} USDT): {resultado['prob_ruina']:.2%} "
+        f"(IC 95%: {ruina_lo:.2%} - {ruina_hi:.2%})",
+        f"  Probabilidade de prejuízo: {resultado['prob_prejuizo']:.2%} (IC 95%: {prejuizo_lo:.2%} - {prejuizo_hi:.2%})"
+    ]
+
+
+def analisar_ledger(ledger, config, par=None):
+    """Monte Carlo dos lucros do ledger (todos os pares ou um), com os parâmetros MONTE_CARLO_* do config"""
+    lucros = ledger.operacoes['lucro'] if par is None else ledger.operacoes['lucro'][ledger.mascara_par(par)]
+    return analisar(
+        lucros,
+        simulacoes=config.get('MONTE_CARLO_SIMULACOES', 10_000),
+        metodo=config.get('MONTE_CARLO_METODO', 'bootstrap'),
+        seed=config.get('MONTE_CARLO_SEED', 42),
+        capital=config.get('MONTE_CARLO_CAPITAL', 1000.0),
+        ruina_pct=config.get('MONTE_CARLO_RUINA_PCT', 0.5),
+        bloco=config.get('MONTE_CARLO_BLOCO'),
+        workers=config.get('MONTE_CARLO_WORKERS')
+    )
+
+
+def main():
+    import contextlib
+    import io
+
+    import config as cfg
+    from backtest import BacktestTrader, config_backtest
+
+    parser = argparse.ArgumentParser(description="Monte Carlo das operações do backtest")
+    parser.add_argument('--simulacoes', type=int, default=cfg.MONTE_CARLO_SIMULACOES)
+    parser.add_argument('--metodo', choices=METODOS, default=cfg.MONTE_CARLO_METODO)
+    parser.add_argument('--seed', type=int, default=cfg.MONTE_CARLO_SEED)
+    parser.add_argument('--capital', type=float, default=cfg.MONTE_CARLO_CAPITAL, help='Capital de referência (USDT)')
+    parser.add_argument('--ruina', type=float, default=cfg.MONTE_CARLO_RUINA_PCT, help='Fração do capital perdida que conta como ruína')
+    parser.add_argument('--bloco', type=int, default=cfg.MONTE_CARLO_BLOCO, help='Operações por bloco (padrão: n^(1/3))')
+    parser.add_argument('--quantis', default=','.join(map(str, QUANTIS_PADRAO)), help='Quantis separados por vírgula')
+    parser.add_argument('--par', help='Analisa só as operações deste par')
+    parser.add_argument('--pares', help='Pares do backtest separados por vírgula (padrão: PARES_MONITORADOS)')
+    parser.add_argument('--dias', type=int, help='Período do backtest em dias')
+    parser.add_argument('--replay', action='store_true', help='Gera as operações com o replay do bot ao vivo')
+    parser.add_argument('--workers', type=int, help='Processos (padrão: todos os núcleos)')
+    parser.add_argument('--offline', action='store_true', help='Usa somente o cache de klines')
+    args = parser.parse_args()
+
+    config = config_backtest()
+    if args.pares:
+        config['PARES_MONITORADOS'] = args.pares.split(',')
+    if args.dias:
+        config['DIAS_BACKTEST'] = args.dias
+    if args.offline:
+        config['BACKTEST_OFFLINE'] = True
+    if args.replay:
+        config['BACKTEST_REPLAY'] = True
+
+    backtester = BacktestTrader(config)
+    with contextlib.redirect_stdout(io.StringIO()):
+        backtester.start_backtest()
+    ledger = backtester.ledger
+    lucros = ledger.operacoes['lucro'] if args.par is None else ledger.operacoes['lucro'][ledger.mascara_par(args.par)]
+    if len(lucros) == 0:
+        print("⚠️ Nenhuma operação no backtest para analisar")
+        return
+
+    print(f"🎲 Monte Carlo: {args.simulacoes} simulações de {len(lucros)} operações ({args.metodo})")
+    inicio = time.time()
+    resultado = analisar(
+        lucros, args.simulacoes, args.metodo, args.seed, args.capital, args.ruina, args.bloco,
+        tuple(float(q) for q in args.quantis.split(',')), args.workers
+    )
+    print(f"⏱️ Concluído em {time.time() - inicio:.1f}s\n")
+    print("\n".join(formatar(resultado)))
+
+
+if __name__ == "__main__":
+    main()
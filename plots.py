@@ -0,0 +1,115 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Pontos por curva após a redução (~2 por pixel de largura no tamanho padrão)
+PONTOS_GRAFICO = 2000
+
+
+def minmax(x, y, pontos):
+    """
+    Redução por baldes: mantém o primeiro, o mínimo, o máximo e o último ponto de
+    cada balde, em ordem. Preserva picos e vales (drawdowns) em O(n) vetorizado.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    n = len(y)
+    if n <= pontos or pontos < 4:
+        return x, y
+    baldes = pontos // 4
+    tamanho = n // baldes
+    blocos = y[:baldes * tamanho].reshape(baldes, tamanho)
+    base = np.arange(baldes) * tamanho
+    partes = [base, base + np.argmin(blocos, axis=1), base + np.argmax(blocos, axis=1), base + tamanho - 1]
+    resto = y[baldes * tamanho:]
+    if len(resto):
+        # Sobra menor que um balde: entra com seus próprios extremos
+        partes.append(baldes * tamanho + np.array([np.argmin(resto), np.argmax(resto), len(resto) - 1]))
+    indices = np.unique(np.concatenate(partes))
+    return x[indices], y[indices]
+
+
+def lttb(x, y, pontos):
+    """
+    Largest-Triangle-Three-Buckets: escolhe em cada balde o ponto que forma o maior
+    triângulo com o ponto escolhido antes e a média do balde seguinte. Mantém o
+    formato visual da curva com `pontos` pontos.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    n = len(y)
+    if n <= pontos or pontos < 3:
+        return x, y
+    xf = x.astype(np.float64)
+    yf = y.astype(np.float64)
+    limites = np.linspace(1, n - 1, pontos - 1).astype(np.int64)
+    # Médias de cada balde por somas cumulativas (usadas como terceiro vértice)
+    csum_x = np.concatenate(([0.0], np.cumsum(xf)))
+    csum_y = np.concatenate(([0.0], np.cumsum(yf)))
+    tamanhos = np.maximum(np.diff(limites), 1)
+    media_x = (csum_x[limites[1:]] - csum_x[limites[:-1]]) / tamanhos
+    media_y = (csum_y[limites[1:]] - csum_y[limites[:-1]]) / tamanhos
+    media_x = np.append(media_x, xf[-1])
+    media_y = np.append(media_y, yf[-1])
+
+    indices = np.empty(pontos, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for b in range(pontos - 2):
+        ini, fim = limites[b], max(limites[b + 1], limites[b] + 1)
+        ax, ay = xf[anterior], yf[anterior]
+        cx, cy = media_x[b + 1], media_y[b + 1]
+        area = np.abs((ax - cx) * (yf[ini:fim] - ay) - (ax - xf[ini:fim]) * (cy - ay))
+        anterior = ini + int(np.argmax(area))
+        indices[b + 1] = anterior
+    return x[indices], y[indices]
+
+
+METODOS = {'lttb': lttb, 'minmax': minmax}
+
+
+def reduzir(x, y, pontos=PONTOS_GRAFICO, metodo='lttb'):
+    return METODOS[metodo](x, y, pontos)
+
+
+def grafico_ledger(ledger, arquivo, pontos=PONTOS_GRAFICO, metodo='lttb', titulo='Lucro Acumulado', workers=None):
+    """
+    Gera uma única figura com um painel por par e um do total a partir das colunas
+    de lucro acumulado do ledger. Usa o backend Agg direto (sem pyplot nem janela)
+    e reduz cada curva a `pontos` pontos em paralelo antes de desenhar, de modo que
+    o tempo de renderização não cresce com o histórico. Retorna os pares desenhados.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    operacoes = ledger.operacoes
+    if not len(operacoes):
+        return []
+    curvas = [('Total', operacoes['saida_ts'], operacoes['patrimonio'], ledger.resumo())]
+    for pair in ledger.pares:
+        if ledger.por_par[pair].operacoes:
+            mascara = ledger.mascara_par(pair)
+            curvas.append((pair, operacoes['saida_ts'][mascara], operacoes['acumulado_par'][mascara], ledger.resumo(pair)))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        reduzidas = list(executor.map(lambda c: reduzir(c[1], c[2], pontos, metodo), curvas))
+
+    colunas = 1 if len(curvas) <= 4 else 2
+    linhas = math.ceil(len(curvas) / colunas)
+    figura = Figure(figsize=(10 * colunas, 2.6 * linhas + 0.6), dpi=100)
+    FigureCanvasAgg(figura)
+    eixos = figura.subplots(linhas, colunas, sharex=True, squeeze=False).ravel()
+    for eixo, (nome, _, _, resumo), (x, y) in zip(eixos, curvas, reduzidas):
+        eixo.plot(x.astype('datetime64[s]'), y, linewidth=0.8)
+        eixo.set_title(f"{nome} | Lucro: {resumo['lucro']:.4f} USDT | Entradas: {resumo['operacoes']} | "
+                       f"DD: {resumo['max_drawdown']:.4f}", fontsize=9)
+        eixo.set_ylabel('USDT')
+        eixo.tick_params(axis='x', labelrotation=30)
+        eixo.grid(True)
+    for k in range(len(curvas), len(eixos)):
+        eixos[k].set_visible(False)
+        # O painel acima do vazio passa a ser o último da coluna e mostra as datas
+        eixos[k - colunas].xaxis.set_tick_params(labelbottom=True)
+    figura.suptitle(titulo)
+    figura.tight_layout()
+    figura.savefig(arquivo)
+    return [nome for nome, *_ in curvas[1:]]
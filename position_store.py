@@ -0,0 +1,36 @@
+import json
+import os
+
+
+class PositionStore:
+    """
+    Snapshot da posição aberta em JSON, regravado atomicamente (arquivo temporário,
+    fsync e rename) a cada mudança. Sem `arquivo`, não grava nem lê nada.
+    """
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+
+    def save(self, position):
+        """Grava a posição atual (None quando não há posição aberta)"""
+        if not self.arquivo:
+            return
+        tmp = f"{self.arquivo}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'position': position}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.arquivo)
+
+    def load(self):
+        """
+        Lê o último snapshot. Retorna (valido, posicao): (False, None) sem arquivo ou
+        com arquivo ilegível e (True, None) quando o snapshot registra que não há posição.
+        """
+        if not self.arquivo:
+            return False, None
+        try:
+            with open(self.arquivo) as f:
+                return True, json.load(f)['position']
+        except (OSError, ValueError, KeyError, TypeError):
+            return False, None
@@ -0,0 +1,209 @@
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+# Prioridades: menor número passa primeiro
+PRIORIDADE_SAIDA = 0    # SL/TP, vendas e o ticker do par em posição
+PRIORIDADE_NORMAL = 1
+PRIORIDADE_SCAN = 2     # Varredura de pares e universo
+
+# Peso de cada método do client na API spot da Binance (padrão 1)
+PESOS = {
+    'get_klines': 2,
+    'get_historical_klines': 2,
+    'get_symbol_ticker': 2,
+    'get_all_tickers': 4,
+    'get_orderbook_ticker': 2,
+    'get_account': 20,
+    'get_asset_balance': 20,
+    'get_exchange_info': 20,
+    'get_symbol_info': 20,
+    'get_open_orders': 6,
+}
+# get_ticker sem símbolo devolve os 24h de todos os pares e pesa 80
+PESO_TICKER_TODOS = 80
+
+# Chamadas sem efeito colateral: requisições idênticas em andamento são compartilhadas
+LEITURAS = set(PESOS) | {'get_ticker', 'ping', 'get_server_time'}
+
+# Fração do limite por minuto que cada prioridade pode consumir (o restante fica para as saídas)
+FRACAO_LIMITE = {PRIORIDADE_SAIDA: 0.98, PRIORIDADE_NORMAL: 0.85, PRIORIDADE_SCAN: 0.7}
+
+
+class RequestScheduler:
+    """
+    Agenda as chamadas REST dentro do limite de peso por minuto da Binance.
+
+    O peso usado no minuto corrente é estimado localmente e corrigido pelo header
+    X-MBX-USED-WEIGHT-1M das respostas que não se sobrepuseram a outras. Chamadas
+    que estourariam a fração do limite da sua prioridade esperam a virada do
+    minuto; saídas (SL/TP, vendas) passam na frente das demais. Após um 429/418 todas as chamadas aguardam o
+    Retry-After. Leituras idênticas simultâneas viram uma única requisição.
+    """
+
+    def __init__(self, client, limite_peso=6000, clock=time):
+        self.client = client
+        self.limite_peso = limite_peso
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._minuto = None
+        self._usado = 0
+        self._bloqueado_ate = 0
+        self._esperando = {}
+        self._em_andamento = {}
+        self._em_voo = 0      # Requisições liberadas e ainda sem resposta
+        self._liberadas = 0   # Total de requisições liberadas (identifica sobreposições)
+        self._local = threading.local()
+        self.estatisticas = {'requisicoes': 0, 'compartilhadas': 0, 'esperas': 0, 'bloqueios': 0}
+
+    @contextmanager
+    def prioridade(self, nivel):
+        """
+        Define a prioridade das chamadas feitas pela thread atual dentro do bloco
+        (blocos aninhados mantêm a mais alta já definida)
+        """
+        anterior = getattr(self._local, 'prioridade', None)
+        self._local.prioridade = nivel if anterior is None else min(nivel, anterior)
+        try:
+            yield
+        finally:
+            self._local.prioridade = anterior
+
+    @staticmethod
+    def peso(nome, kwargs):
+        if nome == 'get_ticker':
+            return 2 if kwargs.get('symbol') else PESO_TICKER_TODOS
+        if nome == 'get_symbol_ticker' and not kwargs.get('symbol'):
+            return 4
+        return PESOS.get(nome, 1)
+
+    def usado(self):
+        """Peso estimado já consumido no minuto corrente"""
+        with self._cond:
+            self._virar_minuto()
+            return self._usado
+
+    def _virar_minuto(self):
+        minuto = int(self.clock.time() // 60)
+        if minuto != self._minuto:
+            self._minuto = minuto
+            self._usado = 0
+
+    def _pode_passar(self, peso, nivel):
+        if self.clock.time() < self._bloqueado_ate:
+            return False
+        # Alguém de prioridade maior esperando tem a vez
+        if any(n < nivel and q for n, q in self._esperando.items()):
+            return False
+        return self._usado + peso <= self.limite_peso * FRACAO_LIMITE[nivel]
+
+    def _adquirir(self, peso, nivel):
+        with self._cond:
+            self._virar_minuto()
+            if not self._pode_passar(peso, nivel):
+                self.estatisticas['esperas'] += 1
+                self._esperando[nivel] = self._esperando.get(nivel, 0) + 1
+                try:
+                    while True:
+                        self._virar_minuto()
+                        if self._pode_passar(peso, nivel):
+                            break
+                        agora = self.clock.time()
+                        proximo = max(self._bloqueado_ate, (self._minuto + 1) * 60) - agora
+                        espera = max(0.01, min(proximo, 1.0))
+                        if self.clock is time:
+                            self._cond.wait(timeout=espera)
+                        elif self._em_voo:
+                            # Relógio simulado só avança sem requisições em andamento: cada
+                            # uma termina no minuto em que foi contada (aqui e no servidor)
+                            self._cond.wait(timeout=1.0)
+                        else:
+                            # A espera avança o próprio relógio, sem liberar ninguém no meio
+                            self.clock.sleep(espera)
+                finally:
+                    self._esperando[nivel] -= 1
+            self._usado += peso
+            self.estatisticas['requisicoes'] += 1
+            self._em_voo += 1
+            self._liberadas += 1
+            # Senha da requisição: só é exclusiva se nenhuma outra estava em andamento
+            return self._liberadas if self._em_voo == 1 else None
+
+    def _registrar_resposta(self, response):
+        """Corrige a estimativa pelo peso informado pelo servidor"""
+        headers = getattr(response, 'headers', None) or {}
+        usado = headers.get('x-mbx-used-weight-1m') or headers.get('X-MBX-USED-WEIGHT-1M')
+        if usado is None:
+            return
+        with self._cond:
+            self._virar_minuto()
+            self._usado = max(self._usado, int(usado))
+            self._cond.notify_all()
+
+    def _registrar_erro(self, erro):
+        """429 (limite) ou 418 (banimento): bloqueia tudo até o Retry-After"""
+        if getattr(erro, 'status_code', None) not in (429, 418):
+            return
+        headers = getattr(getattr(erro, 'response', None), 'headers', None) or {}
+        espera = float(headers.get('Retry-After') or 60)
+        with self._cond:
+            self._bloqueado_ate = max(self._bloqueado_ate, self.clock.time() + espera)
+            self.estatisticas['bloqueios'] += 1
+
+    def _executar(self, nome, metodo, args, kwargs):
+        nivel = getattr(self._local, 'prioridade', None)
+        if nivel is None:
+            nivel = PRIORIDADE_NORMAL
+        senha = self._adquirir(self.peso(nome, kwargs), nivel)
+        response = None
+        try:
+            resultado = metodo(*args, **kwargs)
+            with self._cond:
+                # O client guarda só a última resposta (compartilhada entre as threads): os
+                # headers são desta chamada apenas se nenhuma outra se sobrepôs a ela
+                if senha is not None and senha == self._liberadas:
+                    response = getattr(self.client, 'response', None)
+        except Exception as e:
+            self._registrar_erro(e)
+            raise
+        finally:
+            with self._cond:
+                self._em_voo -= 1
+                self._cond.notify_all()
+        self._registrar_resposta(response)
+        return resultado
+
+    def chamar(self, nome, *args, **kwargs):
+        metodo = getattr(self.client, nome)
+        if nome not in LEITURAS:
+            return self._executar(nome, metodo, args, kwargs)
+
+        chave = (nome, args, tuple(sorted(kwargs.items())))
+        with self._cond:
+            futuro = self._em_andamento.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = self._em_andamento[chave] = Future()
+            else:
+                self.estatisticas['compartilhadas'] += 1
+        if not dono:
+            return futuro.result()
+
+        try:
+            resultado = self._executar(nome, metodo, args, kwargs)
+        except Exception as e:
+            futuro.set_exception(e)
+            raise
+        else:
+            futuro.set_result(resultado)
+            return resultado
+        finally:
+            with self._cond:
+                self._em_andamento.pop(chave, None)
+
+    def __getattr__(self, nome):
+        atributo = getattr(self.client, nome)
+        if not callable(atributo) or nome.startswith('_'):
+            return atributo
+        return lambda *args, **kwargs: self.chamar(nome, *args, **kwargs)
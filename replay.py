@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Backtest por replay de eventos sobre o código real do CryptoTrader.
+
+Em vez de reimplementar as saídas, o replay avança um relógio simulado direto
+para os instantes em que algo acontece e chama ali a lógica do bot ao vivo:
+`decide` + `execute_trade` nas entradas e `check_stop_loss_take_profit` nas
+saídas (SL/TP, tempo expirado com expansão e recálculo de SL/TP por
+volatilidade, posição única). Ticker, klines, saldos e ordens vêm do
+SimulatedClient, sobre as séries em memória.
+
+Os eventos são localizados de forma vetorizada: as entradas saem da máscara de
+`calculate_entry_scores` e a próxima saída da busca por máxima/mínima nas
+colunas, refinada no mesmo caminho intrabarra (abertura, mínima/máxima,
+fechamento) que o SimulatedClient usa para o preço. Candles sem evento não
+passam pelo Python.
+
+Exemplos:
+    python3 replay.py --candles 100000
+    python3 replay.py --cache cache_klines --pares BTCUSDT,ETHUSDT
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from indicators import calculate_indicators_batch, calculate_entry_scores, indicators_at
+from ledger import TradeLedger, MOTIVO_CODIGO
+from sim_exchange import SimulatedClient
+
+# Candles examinados por vez na busca da próxima saída (dobra a cada bloco sem evento)
+BLOCO_INICIAL = 64
+
+
+class ReplayEngine:
+    """
+    Reproduz as séries (par -> colunas do KlineCache) com um CryptoTrader real.
+    As operações fechadas vão para `ledger` (TradeLedger), com taxas e motivo da saída.
+    """
+
+    def __init__(self, config, series, saldo_inicial=1000.0, slippage=0.0, taxa=0.001):
+        from bot_trader import CryptoTrader
+
+        self.config = dict(
+            config,
+            # Sem threads, arquivos nem limites de requisição: só a lógica de decisão
+            WATCHDOG_ATIVO=False,
+            POSICAO_ARQUIVO=None,
+            METRICAS_ARQUIVO=None,
+            METRICAS_PORTA=None,
+            LIMITE_PESO_MINUTO=None,
+            # Filtros dos pares não mudam na simulação: carrega o exchange info uma vez
+            REGRAS_PARES_TTL=float('inf'),
+            PARES_MONITORADOS=list(series)
+        )
+        self.series = series
+        self.pairs = list(series)
+        self.client = SimulatedClient(
+            series, config['INTERVALO'], saldo_inicial=saldo_inicial, slippage=slippage, taxa=taxa,
+            aquecimento=config['QUANTIDADE_CANDLES']
+        )
+        self.clock = self.client.clock
+        self.intervalo_ms = self.client.intervalo_ms
+        self.bot = CryptoTrader(self.config, client=self.client, clock=self.clock)
+        self.ledger = TradeLedger(self.pairs)
+        # Operações fechadas durante run(), anexadas ao ledger de uma vez no final
+        self._saidas = []
+        self.eventos = 0
+        # Vendas do bot chegam com a posição, a ordem e o motivo (stop_loss, take_profit, tempo...)
+        self.bot.on_close = self._registrar_saida
+
+    def _agora_ms(self, ms):
+        self.clock.agora = ms / 1000
+
+    def _entradas(self):
+        """Sinais de entrada de todos os pares ordenados pelo instante em que o bot os veria"""
+        self._indicadores = {}
+        tempos, pares, indices, scores = [], [], [], []
+        for p, pair in enumerate(self.pairs):
+            s = self.series[pair]
+            batch = calculate_indicators_batch(s['open'], s['high'], s['low'], s['close'], s['volume'], self.config)
+            self._indicadores[pair] = batch
+            score, entrada = calculate_entry_scores(batch, self.config)
+            # O candle i fecha e o bot compra no início do i+1
+            i = np.flatnonzero(entrada[:-1])
+            tempos.append(np.asarray(s['open_time'], dtype=np.int64)[i + 1])
+            pares.append(np.full(len(i), p))
+            indices.append(i)
+            scores.append(score[i])
+        tempos, pares, indices, scores = (np.concatenate(x) for x in (tempos, pares, indices, scores))
+        # No mesmo instante: melhor score na varredura assíncrona, senão a ordem dos pares
+        desempate = -scores if self.config.get('SCAN_ASSINCRONO', False) else pares
+        ordem = np.lexsort((desempate, tempos))
+        return tempos[ordem], pares[ordem], indices[ordem], scores[ordem]
+
+    def _cruzamento(self, pair, j, desde_ms, abaixo, acima, estrito):
+        """
+        Primeiro instante (ms) a partir de `desde_ms` em que o preço do candle j fica
+        <= `abaixo` ou >= `acima` (> com `estrito`), no caminho intrabarra do simulador.
+        """
+        c = self.series[pair]
+        o, h, l, cl = c['open'].item(j), c['high'].item(j), c['low'].item(j), c['close'].item(j)
+        pontos = (o, l, h, cl) if cl >= o else (o, h, l, cl)
+        segmento = self.intervalo_ms / 3
+        atingiu = lambda x: (abaixo is not None and x <= abaixo) or (
+            acima is not None and (x > acima if estrito else x >= acima))
+
+        for k in range(3):
+            a, b = pontos[k], pontos[k + 1]
+            inicio = c['open_time'].item(j) + k * segmento
+            if inicio + segmento <= desde_ms:
+                continue
+            t0 = max(inicio, desde_ms)
+            if atingiu(a + (b - a) * (t0 - inicio) / segmento):
+                return int(math.ceil(t0))
+            # Não atingido em t0 e atingido no fim do segmento: cruza no meio (a != b)
+            candidatos = []
+            if abaixo is not None and b <= abaixo:
+                candidatos.append(inicio + (a - abaixo) / (a - b) * segmento)
+            if acima is not None and (b > acima if estrito else b >= acima):
+                candidatos.append(inicio + (acima - a) / (b - a) * segmento)
+            if candidatos:
+                return int(math.ceil(max(min(candidatos), t0)))
+        return None
+
+    def _proxima_saida(self, pair, desde_ms, limite_ms, abaixo, acima, estrito):
+        """Instante do próximo cruzamento de preço até `limite_ms` (None se não houver)"""
+        c = self.series[pair]
+        open_time = c['open_time']
+        j = int(open_time.searchsorted(desde_ms, side='right')) - 1
+        t = self._cruzamento(pair, j, desde_ms, abaixo, acima, estrito)
+        if t is not None:
+            return t
+
+        n = len(open_time)
+        fim = n if limite_ms is None else int(open_time.searchsorted(limite_ms, side='right'))
+        j += 1
+        bloco = BLOCO_INICIAL
+        while j < fim:
+            k = min(fim, j + bloco)
+            candidatos = np.zeros(k - j, dtype=bool)
+            if abaixo is not None:
+                candidatos |= c['low'][j:k] <= abaixo
+            if acima is not None:
+                candidatos |= (c['high'][j:k] > acima) if estrito else (c['high'][j:k] >= acima)
+            achados = np.flatnonzero(candidatos)
+            if len(achados):
+                # O caminho intrabarra passa pela máxima e pela mínima: o cruzamento existe
+                return self._cruzamento(pair, j + int(achados[0]), int(open_time[j + achados[0]]), abaixo, acima, estrito)
+            j, bloco = k, bloco * 2
+        return None
+
+    def _acompanhar(self, desde_ms):
+        """Chama a verificação do bot em cada evento até a posição fechar. Retorna o instante final (None no fim dos dados)"""
+        bot = self.bot
+        while bot.current_position:
+            position = bot.current_position
+            pair = position['pair']
+            # Depois de uma expansão o prazo é o novo limite, com SL/TP recalculados valendo até lá
+            prazo_ms = math.floor((position['opened_at'] + bot.position_max_time()) * 1000) + 1
+            if desde_ms >= prazo_ms:
+                # Prazo vencido sem expansão (ex.: venda recusada): só sai quando o preço passar da entrada
+                evento = self._proxima_saida(pair, desde_ms, None, None, position['entry_price'], True)
+            else:
+                evento = self._proxima_saida(
+                    pair, desde_ms, prazo_ms, position['stop_loss'], position['take_profit'], False
+                )
+                evento = prazo_ms if evento is None else min(evento, prazo_ms)
+            if evento is None or evento > int(self.series[pair]['close_time'][-1]):
+                return None
+
+            self._agora_ms(evento)
+            self.eventos += 1
+            bot.check_stop_loss_take_profit(self.client._preco(pair), verbose=False)
+            desde_ms = evento + 1
+        return desde_ms
+
+    @staticmethod
+    def _taxa_usdt(ordem, preco):
+        return sum(float(f['commission']) * (1.0 if f['commissionAsset'] == 'USDT' else preco) for f in ordem['fills'])
+
+    def _registrar_saida(self, pair, position, venda, motivo):
+        """Callback on_close do bot: guarda a operação com as taxas da compra e da venda"""
+        compra = next(o for o in reversed(self.client.ordens) if o['side'] == 'BUY' and o['symbol'] == pair)
+        quantidade = float(venda['executedQty'])
+        preco = float(venda['cummulativeQuoteQty']) / quantidade
+        preco_compra = float(compra['cummulativeQuoteQty']) / float(compra['executedQty'])
+        self._saidas.append((
+            self.pairs.index(pair), int(position['entry_time']), venda['transactTime'] // 1000,
+            position['entry_price'], preco, quantidade,
+            self._taxa_usdt(compra, preco_compra) + self._taxa_usdt(venda, preco),
+            MOTIVO_CODIGO.get(motivo, MOTIVO_CODIGO['outro'])
+        ))
+
+    def _gravar_saidas(self):
+        """Anexa ao ledger, num único extend, as operações guardadas (já em ordem de saída)"""
+        if not self._saidas:
+            return
+        par, entrada, saida, preco_entrada, preco_saida, quantidade, taxas, motivo = zip(*self._saidas)
+        self.ledger.extend(
+            np.array(par), entrada, saida, preco_entrada, preco_saida, quantidade, taxas, np.array(motivo, dtype=np.int8)
+        )
+        self._saidas = []
+
+    def run(self):
+        """Percorre todos os eventos. Retorna o número de candles reproduzidos"""
+        tempos, pares, indices, scores = self._entradas()
+        try:
+            self._reproduzir(tempos, pares, indices, scores)
+        finally:
+            self._gravar_saidas()
+        return sum(len(s['close']) for s in self.series.values())
+
+    def _reproduzir(self, tempos, pares, indices, scores):
+        bot = self.bot
+        janela = self.config['QUANTIDADE_CANDLES']
+        e = 0
+        while e < len(tempos):
+            pair = self.pairs[pares[e]]
+            i = int(indices[e])
+            self._agora_ms(int(tempos[e]))
+            self.eventos += 1
+
+            # Buffer do bot como estaria ao vivo (candles até o i, já fechado)
+            s = self.series[pair]
+            inicio = max(0, i - janela + 1)
+            bot.candles[pair].ingest({coluna: s[coluna][inicio:i + 1] for coluna in ('open', 'high', 'low', 'close', 'volume', 'close_time')})
+
+            indicators = indicators_at(self._indicadores[pair], i)
+            if bot.decide(pair, indicators, int(scores[e])) == 'buy':
+                bot.execute_trade(pair, 'buy')
+            if bot.current_position:
+                fim = self._acompanhar(int(tempos[e]) + 1)
+                if fim is None:
+                    break
+                e = int(np.searchsorted(tempos, fim, side='left'))
+            else:
+                e += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest por replay de eventos com a lógica real do bot")
+    parser.add_argument('--pares', default=None, help="Pares separados por vírgula (padrão: PARES_MONITORADOS)")
+    parser.add_argument('--cache', default=None, help="Diretório do KlineCache (padrão: candles sintéticos)")
+    parser.add_argument('--candles', type=int, default=50_000, help="Candles sintéticos por par")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--saldo', type=float, default=1000.0, help="Saldo inicial em USDT")
+    parser.add_argument('--slippage', type=float, default=0.0)
+    parser.add_argument('--taxa', type=float, default=0.001)
+    parser.add_argument('--log', default='replay.log', help="Arquivo de log do bot")
+    parser.add_argument('--nivel-log', default='ERROR', help="Nível de log do bot durante o replay")
+    args = parser.parse_args()
+
+    import config as cfg
+    config = {nome: getattr(cfg, nome) for nome in dir(cfg) if nome.isupper()}
+    config.update(LOG_FILE=args.log, LOG_LEVEL=args.nivel_log, EVENTOS_ARQUIVO=None)
+    if args.pares:
+        config['PARES_MONITORADOS'] = args.pares.split(',')
+    pairs = config['PARES_MONITORADOS']
+
+    if args.cache:
+        series = SimulatedClient.from_cache(args.cache, pairs, config['INTERVALO']).series
+    else:
+        series = SimulatedClient.synthetic(pairs, args.candles, config['INTERVALO'], args.seed).series
+
+    inicio = time.perf_counter()
+    engine = ReplayEngine(config, series, args.saldo, args.slippage, args.taxa)
+    candles = engine.run()
+    segundos = time.perf_counter() - inicio
+
+    total = engine.ledger.resumo()
+    print(f"⏱️ Replay: {candles:,} candles em {segundos:.2f}s ({candles / segundos:,.0f} candles/s) | eventos: {engine.eventos:,}")
+    print(f"📄 Operações: {total['operacoes']} | Lucro líquido: {total['lucro']:.4f} USDT | "
+          f"DD máximo: {total['max_drawdown']:.4f} | Acerto: {total['taxa_acerto']:.1%} | "
+          f"PF: {total['fator_lucro']:.2f} | Sharpe: {total['sharpe']:.3f}")
+    print(f"💰 Patrimônio final: {engine.client.patrimonio():.4f} USDT (inicial: {args.saldo:.2f})")
+    for pair in pairs:
+        resumo = engine.ledger.resumo(pair)
+        print(f"   {pair}: {resumo['operacoes']} operações | {resumo['lucro']:.4f} USDT")
+
+
+if __name__ == "__main__":
+    main()
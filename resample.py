@@ -0,0 +1,131 @@
+import numpy as np
+
+from candles import COLUNAS, CandleStore
+from kline_cache import interval_to_ms
+
+
+def resample(columns, intervalo, incluir_parcial=True):
+    """
+    Agrega candles de um intervalo base (ex.: 1m) em barras de `intervalo`
+    alinhadas ao relógio (5m, 15m, 1h, 4h...), vetorizado sobre todo o histórico.
+
+    `columns` segue o formato do KlineCache (com open_time). Com
+    `incluir_parcial=False` a última barra é descartada se ainda não fechou.
+    """
+    passo = interval_to_ms(intervalo)
+    open_time = np.asarray(columns['open_time'], dtype=np.int64)
+    if len(open_time) == 0:
+        return {coluna: np.asarray(columns[coluna])[:0] for coluna in ('open_time',) + COLUNAS}
+
+    grupos = open_time // passo
+    inicio = np.flatnonzero(np.concatenate(([True], grupos[1:] != grupos[:-1])))
+    fim = np.append(inicio[1:], len(open_time)) - 1
+
+    barra_open_time = grupos[inicio] * passo
+    barras = {
+        'open_time': barra_open_time,
+        'open': np.asarray(columns['open'], dtype=np.float64)[inicio],
+        'high': np.maximum.reduceat(np.asarray(columns['high'], dtype=np.float64), inicio),
+        'low': np.minimum.reduceat(np.asarray(columns['low'], dtype=np.float64), inicio),
+        'close': np.asarray(columns['close'], dtype=np.float64)[fim],
+        'volume': np.add.reduceat(np.asarray(columns['volume'], dtype=np.float64), inicio),
+        'close_time': barra_open_time + passo - 1
+    }
+    if not incluir_parcial and int(columns['close_time'][fim[-1]]) < int(barras['close_time'][-1]):
+        barras = {coluna: valores[:-1] for coluna, valores in barras.items()}
+    return barras
+
+
+class Resampler:
+    """
+    Versão incremental de `resample` para um par e um intervalo: recebe candles
+    base um a um (inclusive revisões do candle base em formação) e mantém a barra
+    atual em O(1).
+    """
+
+    def __init__(self, intervalo, base='1m'):
+        self.passo = interval_to_ms(intervalo)
+        if self.passo % interval_to_ms(base):
+            raise ValueError(f"{intervalo} não é múltiplo de {base}")
+        self._bucket = None
+        self._fechados = None   # (open, high, low, volume) dos candles base já concluídos da barra
+        self._atual = None      # Candle base mais recente (pode ser revisado)
+
+    @staticmethod
+    def _combinar(acumulado, candle):
+        if acumulado is None:
+            return float(candle['open']), float(candle['high']), float(candle['low']), float(candle['volume'])
+        o, h, l, v = acumulado
+        return o, max(h, float(candle['high'])), min(l, float(candle['low'])), v + float(candle['volume'])
+
+    def barra(self):
+        """Barra atual (dict com open_time e as COLUNAS) ou None"""
+        if self._atual is None:
+            return None
+        o, h, l, v = self._combinar(self._fechados, self._atual)
+        open_time = self._bucket * self.passo
+        return {
+            'open_time': open_time, 'open': o, 'high': h, 'low': l,
+            'close': float(self._atual['close']), 'volume': v, 'close_time': open_time + self.passo - 1
+        }
+
+    def update(self, candle, fechado=True):
+        """
+        Incorpora um candle base. Retorna (barra, barra_fechada); a barra fecha com
+        o último candle base do período quando ele mesmo está fechado.
+        """
+        open_time = int(candle['open_time'])
+        bucket = open_time // self.passo
+        if self._bucket is not None and bucket < self._bucket:
+            return None, False  # Candle atrasado de uma barra já encerrada
+        if bucket != self._bucket:
+            self._bucket, self._fechados, self._atual = bucket, None, None
+        elif self._atual is not None and open_time != int(self._atual['open_time']):
+            self._fechados = self._combinar(self._fechados, self._atual)
+        self._atual = candle
+
+        barra = self.barra()
+        return barra, fechado and int(candle['close_time']) >= barra['close_time']
+
+
+class MultiTimeframe:
+    """
+    Barras de vários intervalos por par a partir de um único fluxo de candles base,
+    mantidas em CandleStores (um por intervalo) no mesmo formato usado pelo bot.
+    """
+
+    def __init__(self, intervalos, capacity, base='1m'):
+        self.intervalos = tuple(intervalos)
+        self.base = base
+        self.candles = {intervalo: CandleStore(capacity) for intervalo in self.intervalos}
+        self._resamplers = {}
+
+    def _resampler(self, pair, intervalo):
+        chave = (pair, intervalo)
+        if chave not in self._resamplers:
+            self._resamplers[chave] = Resampler(intervalo, self.base)
+        return self._resamplers[chave]
+
+    def load(self, pair, columns):
+        """Carrega o histórico base do par de uma vez e prepara o estado incremental"""
+        open_time = np.asarray(columns['open_time'])
+        for intervalo in self.intervalos:
+            barras = resample(columns, intervalo)
+            self.candles[intervalo][pair].ingest(barras)
+            if len(barras['open_time']):
+                # Reaplica os candles base da barra em formação para continuar incrementalmente
+                resampler = self._resampler(pair, intervalo)
+                for i in range(int(np.searchsorted(open_time, barras['open_time'][-1])), len(open_time)):
+                    resampler.update({coluna: columns[coluna][i] for coluna in ('open_time',) + COLUNAS})
+
+    def update(self, pair, candle, fechado=True):
+        """Incorpora um candle base em todos os intervalos. Retorna os intervalos cuja barra fechou"""
+        fechados = []
+        for intervalo in self.intervalos:
+            barra, fechou = self._resampler(pair, intervalo).update(candle, fechado)
+            if barra is None:
+                continue
+            self.candles[intervalo][pair].ingest({coluna: np.array([barra[coluna]]) for coluna in COLUNAS})
+            if fechou:
+                fechados.append(intervalo)
+        return fechados
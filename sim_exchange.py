@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Exchange simulada para paper trading e medições de latência, sem credenciais nem rede.
+
+Implementa o subconjunto do binance.client.Client usado pelo bot (klines, tickers,
+saldos, regras dos pares e ordens a mercado com fills) sobre candles gravados pelo
+KlineCache ou sintéticos. O relógio simulado permite rodar o loop `run()` completo
+em velocidade acelerada.
+
+Exemplos:
+    python3 sim_exchange.py --candles 5000 --latencia 0.05 --slippage 0.0005
+    python3 sim_exchange.py --cache cache_klines --pares BTCUSDT,ETHUSDT --profile run.prof
+"""
+import argparse
+import itertools
+import json
+import math
+import threading
+import time
+from decimal import Decimal
+
+import numpy as np
+from binance.exceptions import BinanceAPIException
+
+from kline_cache import KlineCache, interval_to_ms
+from candles import COLUNAS as COLUNAS_KLINES
+from symbol_rules import SymbolRules
+
+
+class FimDaSimulacao(BaseException):
+    """
+    Fim dos dados gravados. Herda de BaseException para atravessar os
+    `except Exception` do loop do bot e encerrar `run()`.
+    """
+
+
+class RelogioSimulado:
+    """
+    Relógio com a mesma interface do módulo time (time/sleep).
+
+    Com `velocidade` 0 o sleep só avança o horário simulado; com velocidade > 0
+    também dorme o tempo real proporcional (60 = 1 hora de dados por minuto).
+    Passar de `fim` levanta FimDaSimulacao.
+    """
+
+    def __init__(self, inicio, fim=None, velocidade=0):
+        self.agora = float(inicio)
+        self.fim = fim
+        self.velocidade = velocidade
+        self._lock = threading.Lock()
+
+    def time(self):
+        return self.agora
+
+    def sleep(self, segundos):
+        if self.velocidade:
+            time.sleep(segundos / self.velocidade)
+        with self._lock:
+            self.agora += segundos
+            if self.fim is not None and self.agora > self.fim:
+                raise FimDaSimulacao()
+
+
+def gerar_candles_sinteticos(n, intervalo='5m', preco_inicial=100.0, volatilidade=0.002, seed=0, inicio_ms=1_700_000_000_000):
+    """
+    Passeio aleatório log-normal com máximas/mínimas e picos de volume ocasionais,
+    nas mesmas colunas do KlineCache. Determinístico para a mesma seed.
+    """
+    rng = np.random.default_rng(seed)
+    passo = interval_to_ms(intervalo)
+    retornos = rng.normal(0, volatilidade, n)
+    closes = preco_inicial * np.exp(np.cumsum(retornos))
+    opens = np.concatenate(([preco_inicial], closes[:-1]))
+    amplitude = np.abs(rng.normal(0, volatilidade / 2, (2, n)))
+    highs = np.maximum(opens, closes) * (1 + amplitude[0])
+    lows = np.minimum(opens, closes) * (1 - amplitude[1])
+    volumes = rng.lognormal(3, 0.5, n) * np.where(rng.random(n) < 0.05, 3.0, 1.0)
+    open_time = inicio_ms + np.arange(n, dtype=np.int64) * passo
+    return {
+        'open_time': open_time,
+        'open': opens,
+        'high': highs,
+        'low': lows,
+        'close': closes,
+        'volume': volumes,
+        'close_time': open_time + passo - 1
+    }
+
+
+def _erro_api(code, msg):
+    return BinanceAPIException(None, 400, json.dumps({'code': code, 'msg': msg}))
+
+
+class SimulatedClient:
+    """
+    Substituto do binance.client.Client sobre séries de candles (par -> colunas).
+
+    O candle em formação no horário do relógio é exposto parcialmente: o preço
+    percorre abertura, mínima/máxima e fechamento ao longo do intervalo, sem olhar
+    o futuro. Cada chamada consome `latencia` segundos do relógio; ordens a mercado
+    executam com `slippage` contra o bot e pagam `taxa` (no ativo recebido, como na
+    Binance). As chamadas feitas ficam contadas em `chamadas`.
+    """
+
+    def __init__(self, series, intervalo='5m', saldo_inicial=1000.0, latencia=0.0, slippage=0.0,
+                 taxa=0.001, clock=None, aquecimento=200, velocidade=0, filtros=None):
+        self.series = series
+        self.intervalo = intervalo
+        self.intervalo_ms = interval_to_ms(intervalo)
+        self.latencia = latencia
+        self.slippage = slippage
+        self.taxa = taxa
+        self.filtros = filtros or {}
+        self._regras_cache = {}
+        self.saldos = {'USDT': float(saldo_inicial)}
+        self.ordens = []
+        self.chamadas = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        if clock is None:
+            # Começa após `aquecimento` candles para o bot já ter histórico de indicadores
+            inicio = min(int(c['open_time'][0]) for c in series.values()) + aquecimento * self.intervalo_ms
+            fim = max(int(c['close_time'][-1]) for c in series.values())
+            clock = RelogioSimulado(inicio / 1000, fim / 1000, velocidade)
+        self.clock = clock
+
+    @classmethod
+    def from_cache(cls, directory, pairs, intervalo, **kwargs):
+        """Usa os klines salvos pelo KlineCache"""
+        cache = KlineCache(None, directory, offline=True)
+        return cls({pair: cache.read(pair, intervalo) for pair in pairs}, intervalo, **kwargs)
+
+    @classmethod
+    def synthetic(cls, pairs, n, intervalo='5m', seed=0, **kwargs):
+        """Séries sintéticas independentes e determinísticas para cada par"""
+        series = {
+            pair: gerar_candles_sinteticos(n, intervalo, preco_inicial=10.0 ** (k % 4), seed=seed + k)
+            for k, pair in enumerate(pairs)
+        }
+        return cls(series, intervalo, **kwargs)
+
+    def _chamada(self, nome):
+        self.chamadas[nome] = self.chamadas.get(nome, 0) + 1
+        if self.latencia:
+            self.clock.sleep(self.latencia)
+
+    def _agora_ms(self):
+        return int(self.clock.time() * 1000)
+
+    def _serie(self, symbol):
+        if symbol not in self.series:
+            raise _erro_api(-1121, 'Invalid symbol.')
+        return self.series[symbol]
+
+    def _indice(self, symbol, agora_ms):
+        """Índice do candle em formação (ou do último fechado, após o fim dos dados)"""
+        i = int(self._serie(symbol)['open_time'].searchsorted(agora_ms, side='right')) - 1
+        if i < 0:
+            raise _erro_api(-1121, f'Sem dados de {symbol} antes de {agora_ms}.')
+        return i
+
+    def _parcial(self, symbol, i, agora_ms):
+        """(open, high, low, close, volume) do candle i observado em agora_ms"""
+        c = self.series[symbol]
+        o, h, l, cl = c['open'].item(i), c['high'].item(i), c['low'].item(i), c['close'].item(i)
+        fracao = (agora_ms - c['open_time'].item(i)) / self.intervalo_ms
+        if fracao >= 1:
+            return o, h, l, cl, c['volume'].item(i)
+        # Caminho intrabarra: candle de alta passa pela mínima antes da máxima
+        pontos = (o, l, h, cl) if cl >= o else (o, h, l, cl)
+        pos = max(fracao, 0.0) * 3
+        k = min(int(pos), 2)
+        preco = pontos[k] + (pontos[k + 1] - pontos[k]) * (pos - k)
+        visitados = pontos[:k + 1] + (preco,)
+        return o, max(visitados), min(visitados), preco, c['volume'].item(i) * fracao
+
+    def _preco(self, symbol):
+        agora = self._agora_ms()
+        return self._parcial(symbol, self._indice(symbol, agora), agora)[3]
+
+    # --- Mercado ---
+
+    def get_klines(self, symbol, interval, limit=500, startTime=None, endTime=None, **kwargs):
+        self._chamada('get_klines')
+        if interval != self.intervalo:
+            raise _erro_api(-1120, f'Intervalo {interval} não gravado (disponível: {self.intervalo}).')
+        c = self._serie(symbol)
+        agora = self._agora_ms()
+        ultimo = self._indice(symbol, agora)
+        if endTime is not None:
+            ultimo = min(ultimo, int(np.searchsorted(c['open_time'], endTime, side='right')) - 1)
+        if startTime is not None:
+            primeiro = int(np.searchsorted(c['open_time'], startTime, side='left'))
+            ultimo = min(ultimo, primeiro + limit - 1)
+        else:
+            primeiro = max(0, ultimo - limit + 1)
+
+        klines = []
+        for i in range(primeiro, ultimo + 1):
+            o, h, l, cl, v = self._parcial(symbol, i, agora)
+            klines.append([
+                int(c['open_time'][i]), str(o), str(h), str(l), str(cl), str(v),
+                int(c['close_time'][i]), str(v * cl), 0, '0', '0', '0'
+            ])
+        return klines
+
+    def get_klines_columns(self, symbol, interval, limit=500, colunas=COLUNAS_KLINES):
+        """
+        Mesmos candles de get_klines (os `limit` mais recentes) como colunas NumPy:
+        views das séries sem passar por strings, com o candle em formação anexado
+        como parcial. `colunas` restringe as colunas devolvidas.
+        """
+        self._chamada('get_klines')
+        if interval != self.intervalo:
+            raise _erro_api(-1120, f'Intervalo {interval} não gravado (disponível: {self.intervalo}).')
+        c = self._serie(symbol)
+        agora = self._agora_ms()
+        ultimo = self._indice(symbol, agora)
+        primeiro = max(0, ultimo - limit + 1)
+        resultado = {coluna: c[coluna][primeiro:ultimo + 1] for coluna in colunas}
+        if agora - int(c['open_time'][ultimo]) < self.intervalo_ms:
+            parcial = self._parcial(symbol, ultimo, agora)
+            for coluna, valor in zip(('open', 'high', 'low', 'close', 'volume'), parcial):
+                if coluna in resultado:
+                    resultado[coluna] = np.append(resultado[coluna][:-1], valor)
+        return resultado
+
+    def get_symbol_ticker(self, symbol=None, **kwargs):
+        if symbol is None:
+            return self.get_all_tickers()
+        self._chamada('get_symbol_ticker')
+        return {'symbol': symbol, 'price': str(self._preco(symbol))}
+
+    def get_all_tickers(self, **kwargs):
+        self._chamada('get_all_tickers')
+        return [{'symbol': s, 'price': str(self._preco(s))} for s in self.series if self._disponivel(s)]
+
+    def _disponivel(self, symbol):
+        return int(self.series[symbol]['open_time'][0]) <= self._agora_ms()
+
+    def get_ticker(self, symbol=None, **kwargs):
+        """Estatísticas das últimas 24h a partir dos candles; bid/ask a `slippage` do último preço"""
+        self._chamada('get_ticker')
+        agora = self._agora_ms()
+        stats = []
+        for s in ([symbol] if symbol else self.series):
+            if not self._disponivel(s):
+                continue
+            c = self.series[s]
+            fim = self._indice(s, agora)
+            inicio = int(np.searchsorted(c['open_time'], agora - 24 * 60 * 60 * 1000, side='left'))
+            ultimo = self._parcial(s, fim, agora)
+            highs = np.append(c['high'][inicio:fim], ultimo[1])
+            lows = np.append(c['low'][inicio:fim], ultimo[2])
+            quote = float(np.dot(c['volume'][inicio:fim], c['close'][inicio:fim])) + ultimo[4] * ultimo[3]
+            last = ultimo[3]
+            stats.append({
+                'symbol': s,
+                'openPrice': str(float(c['open'][inicio])),
+                'highPrice': str(float(highs.max())),
+                'lowPrice': str(float(lows.min())),
+                'lastPrice': str(last),
+                'bidPrice': str(last * (1 - self.slippage)),
+                'askPrice': str(last * (1 + self.slippage)),
+                'quoteVolume': str(quote)
+            })
+        return stats[0] if symbol else stats
+
+    # --- Regras dos pares ---
+
+    def _filtros_padrao(self, symbol):
+        """Passos proporcionais ao preço inicial do par, no formato dos filtros da Binance"""
+        preco = float(self.series[symbol]['close'][0])
+        ordem = math.floor(math.log10(preco))
+        return {
+            'tickSize': format(10.0 ** (ordem - 4), 'f'),
+            'stepSize': format(10.0 ** min(0, -ordem - 2), 'f'),
+            'minQty': format(10.0 ** min(0, -ordem - 2), 'f'),
+            'maxQty': '9000000',
+            'minNotional': '5'
+        }
+
+    def _regras(self, symbol):
+        """Regras já convertidas do par, refeitas só quando os filtros do par mudam"""
+        chave = (symbol, tuple(sorted(self.filtros.get(symbol, {}).items())))
+        regras = self._regras_cache.get(chave)
+        if regras is None:
+            regras = self._regras_cache[chave] = SymbolRules.parse(self._symbol_info(symbol))
+        return regras
+
+    def get_symbol_info(self, symbol, **kwargs):
+        self._chamada('get_symbol_info')
+        return self._symbol_info(symbol)
+
+    def _symbol_info(self, symbol):
+        self._serie(symbol)
+        f = dict(self._filtros_padrao(symbol), **self.filtros.get(symbol, {}))
+        return {
+            'symbol': symbol,
+            'status': 'TRADING',
+            'baseAsset': symbol[:-4],
+            'quoteAsset': 'USDT',
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'tickSize': f['tickSize']},
+                {'filterType': 'LOT_SIZE', 'stepSize': f['stepSize'], 'minQty': f['minQty'], 'maxQty': f['maxQty']},
+                {'filterType': 'NOTIONAL', 'minNotional': f['minNotional']}
+            ]
+        }
+
+    def get_exchange_info(self, **kwargs):
+        self._chamada('get_exchange_info')
+        return {'symbols': [self._symbol_info(s) for s in self.series]}
+
+    # --- Conta ---
+
+    def get_account(self, **kwargs):
+        self._chamada('get_account')
+        with self._lock:
+            return {'balances': [
+                {'asset': a, 'free': format(v, '.8f'), 'locked': '0.00000000'} for a, v in self.saldos.items()
+            ]}
+
+    def get_asset_balance(self, asset, **kwargs):
+        self._chamada('get_asset_balance')
+        with self._lock:
+            return {'asset': asset, 'free': format(self.saldos.get(asset, 0.0), '.8f'), 'locked': '0.00000000'}
+
+    # --- Ordens ---
+
+    def create_order(self, symbol, side, type, quantity=None, quoteOrderQty=None, **kwargs):
+        """Ordem a mercado executada integralmente no preço atual com slippage e taxa"""
+        self._chamada('create_order')
+        if type != 'MARKET':
+            raise _erro_api(-1116, 'Somente ordens MARKET são simuladas.')
+        regras = self._regras(symbol)
+        preco = self._preco(symbol) * (1 + self.slippage if side == 'BUY' else 1 - self.slippage)
+        qtd = float(quantity) if quantity is not None else float(quoteOrderQty) / preco
+
+        if qtd < float(regras['min_qty']) or (
+                quantity is not None and regras['step_size'] > 0 and Decimal(str(quantity)) % regras['step_size'] != 0):
+            raise _erro_api(-1013, 'Filter failure: LOT_SIZE')
+        if qtd * preco < float(regras['min_notional']):
+            raise _erro_api(-1013, 'Filter failure: NOTIONAL')
+
+        base = symbol[:-4]
+        valor = qtd * preco
+        with self._lock:
+            if side == 'BUY':
+                if self.saldos.get('USDT', 0.0) < valor:
+                    raise _erro_api(-2010, 'Account has insufficient balance for requested action.')
+                comissao, ativo_comissao = qtd * self.taxa, base
+                self.saldos['USDT'] -= valor
+                self.saldos[base] = self.saldos.get(base, 0.0) + qtd - comissao
+            else:
+                if self.saldos.get(base, 0.0) < qtd - 1e-12:
+                    raise _erro_api(-2010, 'Account has insufficient balance for requested action.')
+                comissao, ativo_comissao = valor * self.taxa, 'USDT'
+                self.saldos[base] -= qtd
+                self.saldos['USDT'] = self.saldos.get('USDT', 0.0) + valor - comissao
+
+        order_id = next(self._ids)
+        ordem = {
+            'symbol': symbol,
+            'orderId': order_id,
+            'clientOrderId': f'sim{order_id}',
+            'transactTime': self._agora_ms(),
+            'status': 'FILLED',
+            'type': type,
+            'side': side,
+            'origQty': format(qtd, 'f'),
+            'executedQty': format(qtd, 'f'),
+            'cummulativeQuoteQty': format(valor, 'f'),
+            'fills': [{
+                'price': format(preco, 'f'),
+                'qty': format(qtd, 'f'),
+                'commission': format(comissao, 'f'),
+                'commissionAsset': ativo_comissao
+            }]
+        }
+        self.ordens.append(ordem)
+        return ordem
+
+    def patrimonio(self):
+        """Valor total da conta em USDT pelos preços atuais"""
+        total = 0.0
+        for ativo, saldo in self.saldos.items():
+            if ativo == 'USDT':
+                total += saldo
+            elif saldo:
+                total += saldo * self._preco(ativo + 'USDT')
+        return total
+
+
+def main():
+    import cProfile
+
+    import config as cfg
+    from bot_trader import CryptoTrader
+
+    parser = argparse.ArgumentParser(description="Paper trading do loop run() numa exchange simulada")
+    parser.add_argument('--pares', help='Pares separados por vírgula (padrão: PARES_MONITORADOS)')
+    parser.add_argument('--cache', help='Diretório do KlineCache (padrão: candles sintéticos)')
+    parser.add_argument('--candles', type=int, default=3000, help='Candles sintéticos por par')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--saldo', type=float, default=1000.0, help='Saldo inicial em USDT')
+    parser.add_argument('--latencia', type=float, default=0.0, help='Segundos simulados por chamada')
+    parser.add_argument('--slippage', type=float, default=0.0)
+    parser.add_argument('--taxa', type=float, default=0.001)
+    parser.add_argument('--velocidade', type=float, default=0, help='0 = o mais rápido possível')
+    parser.add_argument('--log', default='paper_trade.log')
+    parser.add_argument('--eventos', default='paper_trade_eventos.jsonl', help='Log de eventos em JSONL')
+    parser.add_argument('--profile', help='Salva o perfil do cProfile neste arquivo')
+    args = parser.parse_args()
+
+    config = {nome: getattr(cfg, nome) for nome in dir(cfg) if nome.isupper()}
+    config['LOG_FILE'] = args.log
+    config['EVENTOS_ARQUIVO'] = args.eventos
+    config['POSICAO_ARQUIVO'] = None  # Não mistura a posição simulada com a do bot real
+    # O watchdog anda em tempo real; no relógio simulado o próprio loop verifica SL/TP a cada ciclo
+    config['WATCHDOG_ATIVO'] = False
+    if args.pares:
+        config['PARES_MONITORADOS'] = args.pares.split(',')
+    pairs = config['PARES_MONITORADOS']
+    opcoes = dict(saldo_inicial=args.saldo, latencia=args.latencia, slippage=args.slippage,
+                  taxa=args.taxa, velocidade=args.velocidade, aquecimento=config['QUANTIDADE_CANDLES'])
+    if args.cache:
+        client = SimulatedClient.from_cache(args.cache, pairs, config['INTERVALO'], **opcoes)
+    else:
+        client = SimulatedClient.synthetic(pairs, args.candles, config['INTERVALO'], args.seed, **opcoes)
+
+    bot = CryptoTrader(config, client=client, clock=client.clock)
+    profiler = cProfile.Profile() if args.profile else None
+    inicio = time.time()
+    try:
+        if profiler:
+            profiler.enable()
+        bot.run()
+    except FimDaSimulacao:
+        pass
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+
+    print(f"\n⏱️ Simulação concluída em {time.time() - inicio:.1f}s")
+    print(f"💰 Patrimônio final: {client.patrimonio():.4f} USDT (inicial: {args.saldo:.2f})")
+    print(f"📄 Ordens: {len(client.ordens)} | Chamadas: {client.chamadas}")
+    if profiler:
+        print(f"🔬 Perfil salvo: {args.profile}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Otimização de parâmetros do backtest em paralelo.
+
+Exemplos:
+    python3 sweep.py --grid SCORE_MINIMO_ENTRADA=55,60,65 --grid STOP_LOSS_PCT=0.01,0.015
+    python3 sweep.py --random TAKE_PROFIT_PCT=0.01:0.03 --random RSI_PERIODO=7:21 --amostras 1000
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backtest import carregar_series, config_backtest, simular_par, registrar_operacoes
+from indicators import calculate_indicators_batch
+from ledger import TradeLedger
+
+COLUNAS_SERIE = ('open', 'high', 'low', 'close', 'volume', 'close_time')
+
+# Parâmetros que alteram os indicadores (os demais reaproveitam o cálculo)
+PARAMETROS_INDICADORES = (
+    'QUANTIDADE_CANDLES', 'RSI_PERIODO', 'MACD_PERIODO_RAPIDO', 'MACD_PERIODO_LENTO',
+    'MACD_PERIODO_SINAL', 'SMA_CURTA', 'SMA_LONGA', 'EMA_CURTA', 'EMA_LONGA',
+    'BB_PERIODO', 'BB_DESVIOS', 'STOCH_K_PERIODO', 'STOCH_D_PERIODO'
+)
+
+
+def _valor(texto):
+    for tipo in (int, float):
+        try:
+            return tipo(texto)
+        except ValueError:
+            pass
+    return texto
+
+
+def montar_combinacoes(grid, aleatorios, amostras, seed):
+    """Produto cartesiano do grid, cada um repetido `amostras` vezes com os parâmetros aleatórios sorteados"""
+    rng = random.Random(seed)
+    chaves = list(grid)
+    combinacoes = []
+    for valores in itertools.product(*(grid[c] for c in chaves)):
+        for _ in range(amostras if aleatorios else 1):
+            params = dict(zip(chaves, valores))
+            for chave, (lo, hi) in aleatorios.items():
+                if isinstance(lo, int) and isinstance(hi, int):
+                    params[chave] = rng.randint(lo, hi)
+                else:
+                    params[chave] = rng.uniform(lo, hi)
+            combinacoes.append(params)
+    # Combinações com os mesmos indicadores ficam juntas e reaproveitam o cálculo no worker
+    combinacoes.sort(key=lambda p: tuple(str(p.get(c)) for c in PARAMETROS_INDICADORES))
+    return combinacoes
+
+
+def compartilhar_series(series):
+    """Copia as colunas de cada par para memória compartilhada. Retorna (blocos, layout)"""
+    blocos, layout = [], {}
+    for pair, serie in series.items():
+        n = len(serie['close'])
+        shm = shared_memory.SharedMemory(create=True, size=max(1, n * 8 * len(COLUNAS_SERIE)))
+        blocos.append(shm)
+        for k, coluna in enumerate(COLUNAS_SERIE):
+            destino = np.ndarray((n,), dtype=serie[coluna].dtype, buffer=shm.buf, offset=k * n * 8)
+            destino[:] = serie[coluna]
+        layout[pair] = (shm.name, n, {c: serie[c].dtype.str for c in COLUNAS_SERIE})
+    return blocos, layout
+
+
+_worker = {}
+
+
+def _iniciar_worker(layout, base):
+    """Anexa as séries compartilhadas (views sem cópia) no processo worker"""
+    _worker['base'] = base
+    _worker['blocos'] = []
+    _worker['series'] = {}
+    _worker['indicadores'] = {}
+    for pair, (nome, n, dtypes) in layout.items():
+        shm = shared_memory.SharedMemory(name=nome)
+        _worker['blocos'].append(shm)
+        _worker['series'][pair] = {
+            coluna: np.ndarray((n,), dtype=np.dtype(dtypes[coluna]), buffer=shm.buf, offset=k * n * 8)
+            for k, coluna in enumerate(COLUNAS_SERIE)
+        }
+
+
+def _indicadores(pair, config):
+    chave = (pair,) + tuple(config[c] for c in PARAMETROS_INDICADORES)
+    cache = _worker['indicadores']
+    if chave not in cache:
+        if len(cache) >= 4 * len(_worker['series']):
+            cache.clear()
+        serie = _worker['series'][pair]
+        cache[chave] = calculate_indicators_batch(
+            serie['open'], serie['high'], serie['low'], serie['close'], serie['volume'], config
+        )
+    return cache[chave]
+
+
+def avaliar(params):
+    """Roda o backtest de todos os pares com uma combinação de parâmetros"""
+    config = dict(_worker['base'], **params)
+    ledger = TradeLedger(_worker['series'])
+    registrar_operacoes(ledger, {
+        pair: simular_par(serie, config, _indicadores(pair, config)) for pair, serie in _worker['series'].items()
+    }, config.get('POSICAO_UNICA_BACKTEST', False))
+    resumo = ledger.resumo()
+    return {
+        'params': params,
+        'lucro': resumo['lucro'],
+        'drawdown': resumo['max_drawdown'],
+        'entradas': resumo['operacoes'],
+        'taxa_acerto': resumo['taxa_acerto'],
+        'fator_lucro': resumo['fator_lucro'],
+        'sharpe': resumo['sharpe']
+    }
+
+
+def ranquear(resultados):
+    """Maior lucro primeiro; empate por menor drawdown e depois mais entradas"""
+    return sorted(resultados, key=lambda r: (-r['lucro'], r['drawdown'], -r['entradas']))
+
+
+def executar_sweep(series, base, combinacoes, workers=None):
+    blocos, layout = compartilhar_series(series)
+    try:
+        workers = workers or os.cpu_count()
+        chunksize = max(1, len(combinacoes) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker, initargs=(layout, base)) as pool:
+            return ranquear(pool.map(avaliar, combinacoes, chunksize=chunksize))
+    finally:
+        for shm in blocos:
+            shm.close()
+            shm.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Otimização de parâmetros do backtest")
+    parser.add_argument('--grid', action='append', default=[], metavar='CHAVE=v1,v2,...')
+    parser.add_argument('--random', action='append', default=[], metavar='CHAVE=min:max')
+    parser.add_argument('--amostras', type=int, default=100, help='Sorteios por combinação do grid')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--pares', help='Pares separados por vírgula (padrão: PARES_MONITORADOS)')
+    parser.add_argument('--dias', type=int, help='Período do backtest em dias')
+    parser.add_argument('--workers', type=int, help='Processos (padrão: todos os núcleos)')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--offline', action='store_true', help='Usa somente o cache de klines')
+    parser.add_argument('--saida', help='Salva o ranking completo em JSON')
+    args = parser.parse_args()
+
+    base = config_backtest()
+    if args.pares:
+        base['PARES_MONITORADOS'] = args.pares.split(',')
+    if args.dias:
+        base['DIAS_BACKTEST'] = args.dias
+    if args.offline:
+        base['BACKTEST_OFFLINE'] = True
+
+    grid = {}
+    for item in args.grid:
+        chave, valores = item.split('=', 1)
+        grid[chave] = [_valor(v) for v in valores.split(',')]
+    aleatorios = {}
+    for item in args.random:
+        chave, faixa = item.split('=', 1)
+        lo, hi = faixa.split(':')
+        aleatorios[chave] = (_valor(lo), _valor(hi))
+
+    combinacoes = montar_combinacoes(grid, aleatorios, args.amostras, args.seed)
+
+    client = None
+    if not base.get('BACKTEST_OFFLINE'):
+        from binance.client import Client
+        client = Client(base['API_KEY'], base['API_SECRET'])
+    series = carregar_series(base, client)
+
+    print(f"🚀 Sweep: {len(combinacoes)} combinações x {len(series)} pares")
+    inicio = time.time()
+    ranking = executar_sweep(series, base, combinacoes, args.workers)
+    print(f"⏱️ Concluído em {time.time() - inicio:.1f}s\n")
+
+    for pos, r in enumerate(ranking[:args.top], 1):
+        print(f"{pos:3d}. Lucro: {r['lucro']:10.4f} | DD: {r['drawdown']:9.4f} | Entradas: {r['entradas']:5d} | "
+              f"Acerto: {r['taxa_acerto']:6.1%} | PF: {r['fator_lucro']:5.2f} | {r['params']}")
+
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(ranking, f, indent=2)
+        print(f"\n📄 Ranking salvo: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import time
+from decimal import Decimal, ROUND_DOWN
+
+
+class SymbolRules:
+    """
+    Cache das regras de negociação (LOT_SIZE, MIN_NOTIONAL/NOTIONAL, PRICE_FILTER)
+    carregadas uma vez do exchange info. Recarrega após `ttl` segundos ou quando
+    `invalidate` é chamado após um erro de filtro da Binance.
+    """
+
+    def __init__(self, client, ttl=3600, clock=time):
+        self.client = client
+        self.clock = clock
+        self.ttl = ttl
+        self._rules = {}
+        self._loaded_at = 0
+
+    @staticmethod
+    def parse(symbol_info):
+        """Converte os filtros de um símbolo em regras com Decimal"""
+        filters = {f['filterType']: f for f in symbol_info['filters']}
+        lot = filters.get('LOT_SIZE', {})
+        price = filters.get('PRICE_FILTER', {})
+        notional = filters.get('NOTIONAL') or filters.get('MIN_NOTIONAL') or {}
+        return {
+            'step_size': Decimal(lot.get('stepSize', '0')),
+            'min_qty': Decimal(lot.get('minQty', '0')),
+            'max_qty': Decimal(lot.get('maxQty', '0')),
+            'tick_size': Decimal(price.get('tickSize', '0')),
+            'min_notional': Decimal(notional.get('minNotional', '0'))
+        }
+
+    def load(self):
+        """Carrega as regras de todos os símbolos numa única chamada"""
+        info = self.client.get_exchange_info()
+        self._rules = {s['symbol']: self.parse(s) for s in info['symbols']}
+        self._loaded_at = self.clock.time()
+
+    def invalidate(self, pair=None):
+        """Descarta as regras de um par (ou de todos) para forçar nova consulta"""
+        if pair is None:
+            self._loaded_at = 0
+        else:
+            self._rules.pop(pair, None)
+
+    def get(self, pair):
+        if self.clock.time() - self._loaded_at > self.ttl:
+            try:
+                self.load()
+            except Exception:
+                # Sem exchange info: mantém as regras atuais e consulta só o par até o próximo TTL
+                self._loaded_at = self.clock.time()
+        if pair not in self._rules:
+            self._rules[pair] = self.parse(self.client.get_symbol_info(pair))
+        return self._rules[pair]
+
+    @staticmethod
+    def _floor(value, step):
+        value = Decimal(str(value))
+        if step <= 0:
+            return value
+        return (value / step).to_integral_value(rounding=ROUND_DOWN) * step
+
+    def round_quantity(self, pair, quantity):
+        """Arredonda a quantidade para baixo no múltiplo exato de stepSize"""
+        rules = self.get(pair)
+        return self._floor(quantity, rules['step_size']).normalize()
+
+    def round_price(self, pair, price):
+        """Arredonda o preço para baixo no múltiplo exato de tickSize"""
+        rules = self.get(pair)
+        return self._floor(price, rules['tick_size']).normalize()
+
+    def check_order(self, pair, quantity, price):
+        """Valida quantidade mínima e valor mínimo da ordem. Retorna None ou o motivo da recusa"""
+        rules = self.get(pair)
+        quantity = Decimal(str(quantity))
+        if quantity < rules['min_qty']:
+            return f"Qtd: {quantity} < Mín: {rules['min_qty']}"
+        if quantity * Decimal(str(price)) < rules['min_notional']:
+            return f"Valor: {quantity * Decimal(str(price)):.2f} < Mín: {rules['min_notional']}"
+        return None
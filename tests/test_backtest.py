@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from backtest import AJUSTES_BACKTEST, config_backtest, registrar_operacoes
+from exits import simular_saidas
+from ledger import TradeLedger
+
+PARES = ['AAAUSDT', 'BBBUSDT']
+
+
+def _operacoes(entradas, saidas):
+    n = len(entradas)
+    return {
+        'entrada_ts': np.asarray(entradas, dtype=np.int64),
+        'saida_ts': np.asarray(saidas, dtype=np.int64),
+        'preco_entrada': np.full(n, 100.0),
+        'preco_saida': np.full(n, 101.0),
+        'motivo': np.zeros(n, dtype=np.int8)
+    }
+
+
+def _sinais_sobrepostos():
+    # BBB entra com AAA ainda aberta (descartada) e no instante da saída de AAA (válida)
+    return {
+        'AAAUSDT': _operacoes([100, 300], [200, 400]),
+        'BBBUSDT': _operacoes([150, 200], [250, 260])
+    }
+
+
+def test_posicao_unica_entre_pares_pelo_instante():
+    ledger = TradeLedger(PARES)
+    registrar_operacoes(ledger, _sinais_sobrepostos(), posicao_unica=True)
+
+    operacoes = ledger.operacoes
+    assert [PARES[p] for p in operacoes['par']] == ['AAAUSDT', 'BBBUSDT', 'AAAUSDT']
+    assert operacoes['entrada_ts'].tolist() == [100, 200, 300]
+    assert operacoes['saida_ts'].tolist() == [200, 260, 400]
+
+
+def test_sem_posicao_unica_mantem_todas_em_ordem_de_saida():
+    ledger = TradeLedger(PARES)
+    registrar_operacoes(ledger, _sinais_sobrepostos())
+
+    assert ledger.operacoes['saida_ts'].tolist() == [200, 250, 260, 400]
+
+def test_politica_direcao_exige_opens():
+    closes = np.array([100.0, 101.0, 99.0])
+    with pytest.raises(ValueError):
+        simular_saidas([1], [98.0], [102.0], closes + 1, closes - 1, closes, 2, politica='direcao')
+
+
+
+def test_config_backtest_aplica_ajustes_sobre_o_config():
+    config = config_backtest()
+
+    assert {nome: config[nome] for nome in AJUSTES_BACKTEST} == AJUSTES_BACKTEST
+    assert config['PARES_MONITORADOS'] and 'POSICAO_UNICA_BACKTEST' in config
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+pytest.importorskip('binance')
+
+import config as cfg
+from bot_trader import CryptoTrader
+from sim_exchange import SimulatedClient
+
+PARES = ['AAAUSDT', 'BBBUSDT']
+
+
+@pytest.fixture
+def trader():
+    config = {nome: getattr(cfg, nome) for nome in dir(cfg) if nome.isupper()}
+    config.update(
+        PARES_MONITORADOS=PARES, LOG_FILE=os.devnull, LOG_LEVEL='ERROR', EVENTOS_ARQUIVO=None,
+        POSICAO_ARQUIVO=None, LIMITE_PESO_MINUTO=None, WATCHDOG_ATIVO=False
+    )
+    client = SimulatedClient.synthetic(PARES, 2000, config['INTERVALO'], saldo_inicial=0)
+    return CryptoTrader(config, client=client, clock=client.clock)
+
+
+def _abrir_no_prejuizo(trader, pair, decorrido):
+    """Posição aberta há `decorrido` segundos com preço 0,5% abaixo da entrada (acima do SL)"""
+    preco = trader.client._preco(pair)
+    entrada = preco / 0.995
+    trader.current_position = {
+        'pair': pair, 'entry_price': entrada, 'quantity': 1.0,
+        'opened_at': trader.clock.time() - decorrido, 'entry_time': trader.clock.time() - decorrido,
+        'expansions': 0, 'stop_loss': entrada * 0.98, 'take_profit': entrada * 1.02
+    }
+    return preco
+
+
+def test_expansao_uma_vez_por_janela(trader):
+    tempo_maximo = trader.config['TEMPO_MAXIMO_OPERACAO']
+    expansao = trader.config['EXPANSAO_TEMPO_PREJUIZO']
+    preco = _abrir_no_prejuizo(trader, PARES[0], tempo_maximo + 1)
+
+    # Verificações a cada 0,5s (ritmo do watchdog) até o fim da janela expandida
+    janela = tempo_maximo * (expansao - 1)
+    passos = int(janela / 0.5) - 4
+    for _ in range(passos):
+        trader.check_stop_loss_take_profit(preco, verbose=False, pair=PARES[0])
+        trader.clock.sleep(0.5)
+    assert trader.current_position['expansions'] == 1
+    assert trader.position_max_time() == pytest.approx(tempo_maximo + 1 + janela)
+
+    trader.clock.sleep(4)
+    trader.check_stop_loss_take_profit(preco, verbose=False, pair=PARES[0])
+    assert trader.current_position['expansions'] == 2
+
+
+def test_preco_de_outro_par_e_ignorado(trader):
+    _abrir_no_prejuizo(trader, PARES[0], 0)
+    # Preço de BBB abaixo de qualquer SL de AAA: não pode vender a posição de AAA
+    trader.check_stop_loss_take_profit(1e-9, verbose=False, pair=PARES[1])
+    assert trader.current_position is not None
+
+
+def test_scan_assincrono_escolhe_o_melhor_score_e_ignora_par_com_erro(trader):
+    trader.config.update(SCORE_MINIMO_ENTRADA=0, VOLUME_MULTIPLIER=0, PARES_MONITORADOS=PARES + ['XXXUSDT'])
+    trader.clock.sleep(trader.client.intervalo_ms / 2000)  # Meio do candle: volume parcial > 0
+    scores = {}
+    for pair in PARES:
+        klines = trader.client.get_klines(
+            symbol=pair, interval=trader.config['INTERVALO'], limit=trader.config['QUANTIDADE_CANDLES']
+        )
+        scores[pair] = trader.calculate_entry_score(trader.pair_indicators(pair, klines))
+
+    # XXXUSDT não existe no client: o erro fica no log e os demais pares seguem
+    assert trader.scan_pairs_async() == max(scores, key=scores.get)
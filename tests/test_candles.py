@@ -0,0 +1,62 @@
+import numpy as np
+
+from candles import COLUNAS, CandleBuffer, klines_to_arrays
+
+PASSO = 300_000
+
+
+def _colunas(inicio, n):
+    """n candles consecutivos a partir do índice `inicio` (close = índice)"""
+    i = np.arange(inicio, inicio + n)
+    return {
+        'open': i - 0.5, 'high': i + 1.0, 'low': i - 1.0, 'close': i.astype(float),
+        'volume': np.ones(n), 'close_time': 1_700_000_000_000 + i * PASSO - 1
+    }
+
+
+def test_extend_passa_da_capacidade_e_mantem_janela_contigua():
+    buffer = CandleBuffer(5)
+    buffer.extend(_colunas(0, 3))
+    buffer.extend(_colunas(3, 4))
+
+    assert len(buffer) == 5
+    np.testing.assert_array_equal(buffer.column('close'), [2, 3, 4, 5, 6])
+    np.testing.assert_array_equal(buffer.window(2)['close_time'], _colunas(5, 2)['close_time'])
+
+
+def test_ingest_revisa_o_ultimo_e_anexa_os_novos():
+    buffer = CandleBuffer(10)
+    buffer.ingest(_colunas(0, 5))
+    revisado = _colunas(4, 3)
+    revisado['close'] = revisado['close'] + 0.25
+
+    assert buffer.ingest(revisado) == 2
+    np.testing.assert_array_equal(buffer.column('close'), [0, 1, 2, 3, 4.25, 5.25, 6.25])
+
+
+def test_backfill_anterior_ao_buffer_refaz_a_partir_dos_recebidos():
+    buffer = CandleBuffer(10)
+    buffer.ingest(_colunas(20, 3))
+    buffer.ingest(_colunas(15, 8))
+
+    np.testing.assert_array_equal(buffer.column('close'), np.arange(15, 23))
+    assert buffer.first_close_time == _colunas(15, 1)['close_time'][0]
+
+
+def test_buraco_depois_do_ultimo_refaz_o_buffer():
+    buffer = CandleBuffer(10)
+    buffer.ingest(_colunas(0, 5))
+    buffer.ingest(_colunas(8, 3))
+
+    np.testing.assert_array_equal(buffer.column('close'), [8, 9, 10])
+    assert np.all(np.diff(buffer.column('close_time')) == PASSO)
+
+
+def test_klines_to_arrays_converte_texto_da_api():
+    klines = [[0, '1.5', '2', '1', '1.8', '10', PASSO - 1, '18', 5, '4', '7', '0']]
+    colunas = klines_to_arrays(klines)
+
+    assert set(COLUNAS) <= set(colunas)
+    assert colunas['close'].dtype == np.float64 and colunas['close_time'].dtype == np.int64
+    assert colunas['close'][0] == 1.8
+    assert len(klines_to_arrays([])['close']) == 0
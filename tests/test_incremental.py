@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import config as cfg
+from incremental import IncrementalIndicators, indicators_match
+from indicators import calculate_indicators_batch, indicators_at
+
+CANDLES = 3000
+
+
+def _config():
+    return {nome: getattr(cfg, nome) for nome in dir(cfg) if nome.isupper()}
+
+
+def _candles(n, seed=0):
+    """Passeio aleatório com máximas/mínimas e picos de volume, como os candles da Binance"""
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    opens = np.concatenate(([100.0], closes[:-1]))
+    amplitude = np.abs(rng.normal(0, 0.001, n)) * closes
+    volumes = rng.lognormal(3, 0.5, n) * np.where(rng.random(n) < 0.05, 4, 1)
+    close_time = 1_700_000_000_000 + np.arange(1, n + 1) * 300_000 - 1
+    return {
+        'open': opens,
+        'high': np.maximum(opens, closes) + amplitude,
+        'low': np.minimum(opens, closes) - amplitude,
+        'close': closes,
+        'volume': volumes,
+        'close_time': close_time
+    }
+
+
+@pytest.mark.parametrize('revisar', [False, True])
+def test_incremental_igual_ao_batch_em_todos_os_candles(revisar):
+    config = _config()
+    c = _candles(CANDLES)
+    batch = calculate_indicators_batch(c['open'], c['high'], c['low'], c['close'], c['volume'], config)
+    state = IncrementalIndicators(config)
+
+    for i in range(CANDLES):
+        candle = {coluna: c[coluna][i] for coluna in c}
+        if revisar:
+            # Candle em formação chega primeiro e é revisado ao fechar
+            state.update(dict(candle, close=c['open'][i], high=c['open'][i], low=c['open'][i], volume=1.0))
+            state.revise_last(candle)
+        else:
+            state.update(candle)
+
+        if i + 1 < config['QUANTIDADE_CANDLES']:
+            assert state.values() is None
+            continue
+        divergentes = indicators_match(state.values(), indicators_at(batch, i))
+        assert divergentes == [], f"candle {i}: {divergentes}"
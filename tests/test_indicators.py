@@ -0,0 +1,48 @@
+import numpy as np
+
+import config as cfg
+from indicators import calculate_entry_score, calculate_entry_scores, calculate_indicators_batch, indicators_at, stack_indicators
+
+
+def _config():
+    return {nome: getattr(cfg, nome) for nome in dir(cfg) if nome.isupper()}
+
+
+def _batch(n, seed, config):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    opens = np.concatenate(([100.0], closes[:-1]))
+    amplitude = np.abs(rng.normal(0, 0.001, n)) * closes
+    volumes = rng.lognormal(3, 0.5, n) * np.where(rng.random(n) < 0.1, 4, 1)
+    highs = np.maximum(opens, closes) + amplitude
+    lows = np.minimum(opens, closes) - amplitude
+    return calculate_indicators_batch(opens, highs, lows, closes, volumes, config)
+
+
+def test_matriz_pares_por_tempo_igual_ao_score_escalar():
+    config = _config()
+    # Séries de tamanhos diferentes: as mais curtas são completadas com NaN
+    batches = [_batch(n, seed, config) for seed, n in enumerate((600, 450, 600, 300))]
+    scores, entradas = calculate_entry_scores(stack_indicators(batches), config)
+
+    assert scores.shape == (4, 600)
+    for par, batch in enumerate(batches):
+        n = len(batch['price'])
+        esperado = np.array([calculate_entry_score(indicators_at(batch, i), config) for i in range(n)])
+        np.testing.assert_array_equal(scores[par, :n], esperado)
+        volume_ok = batch['volume_ratio'] > config['VOLUME_MULTIPLIER']
+        np.testing.assert_array_equal(entradas[par, :n], (esperado >= config['SCORE_MINIMO_ENTRADA']) & volume_ok)
+        assert not entradas[par, n:].any()
+        assert not scores[par, n:].any()
+    assert entradas.any()
+
+
+def test_instantes_escalares_empilhados():
+    config = _config()
+    batch = _batch(400, 7, config)
+    instantes = [indicators_at(batch, i) for i in (250, 300, 399)]
+
+    scores, _ = calculate_entry_scores(stack_indicators(instantes), config)
+    assert scores.shape == (3, 1)
+    assert list(scores[:, 0]) == [calculate_entry_score(ind, config) for ind in instantes]
+    assert stack_indicators([]) == {}
@@ -0,0 +1,90 @@
+import json
+import os
+
+import numpy as np
+
+from kline_cache import LIMITE_POR_REQUISICAO, KlineCache, interval_to_ms
+
+PASSO = interval_to_ms('5m')
+INICIO = 1_699_999_800_000  # Alinhado a 5m e no passado (só candles fechados vão para o cache)
+
+
+class _ClienteKlines:
+    """Responde get_klines como a Binance (startTime/endTime/limit) e registra os pedidos"""
+
+    def __init__(self, n):
+        self.open_time = INICIO + np.arange(n) * PASSO
+        self.pedidos = []
+
+    def get_klines(self, symbol, interval, startTime, endTime, limit):
+        self.pedidos.append((startTime, endTime))
+        i = np.flatnonzero((self.open_time >= startTime) & (self.open_time <= endTime))[:limit]
+        return [
+            [int(t), str(k), str(k + 1), str(k - 1), str(k + 0.5), '1', int(t) + PASSO - 1, '1', 1, '0', '0', '0']
+            for k, t in zip(i, self.open_time[i])
+        ]
+
+
+def _meta(diretorio):
+    with open(os.path.join(diretorio, 'AAAUSDT_5m', 'meta.json')) as f:
+        return json.load(f)
+
+
+def _ms(indice):
+    return INICIO + indice * PASSO
+
+
+def test_append_baixa_so_o_que_falta(tmp_path):
+    client = _ClienteKlines(3000)
+    cache = KlineCache(client, str(tmp_path))
+    cache.load('AAAUSDT', '5m', _ms(1000), _ms(1999))
+    client.pedidos.clear()
+
+    colunas = cache.load('AAAUSDT', '5m', _ms(1000), _ms(2499))
+
+    assert client.pedidos == [(_ms(1999) + 1, _ms(2499))]
+    np.testing.assert_array_equal(colunas['open_time'], client.open_time[1000:2500])
+    assert _meta(str(tmp_path))['linhas'] == 1500
+    assert 'geracao' not in _meta(str(tmp_path))
+
+
+def test_prepend_grava_nova_geracao_e_remove_a_anterior(tmp_path):
+    client = _ClienteKlines(3000)
+    cache = KlineCache(client, str(tmp_path))
+    cache.load('AAAUSDT', '5m', _ms(2000), _ms(2999))
+
+    # 2000 candles anteriores: duas páginas de LIMITE_POR_REQUISICAO
+    colunas = cache.load('AAAUSDT', '5m', _ms(0), _ms(2999))
+
+    meta = _meta(str(tmp_path))
+    assert meta['geracao'] == 1 and meta['linhas'] == 3000
+    np.testing.assert_array_equal(colunas['open_time'], client.open_time)
+    np.testing.assert_array_equal(colunas['close'], np.arange(3000) + 0.5)
+    arquivos = sorted(os.listdir(os.path.join(str(tmp_path), 'AAAUSDT_5m')))
+    assert 'close.1.bin' in arquivos and 'close.bin' not in arquivos
+
+    cache.load('AAAUSDT', '5m', _ms(0) - 10 * PASSO, _ms(2999))
+    assert _meta(str(tmp_path))['inicio_listagem'] == _ms(0)
+    assert _meta(str(tmp_path))['geracao'] == 1
+
+
+def test_paginacao_em_lotes_do_limite(tmp_path):
+    client = _ClienteKlines(2 * LIMITE_POR_REQUISICAO + 10)
+    cache = KlineCache(client, str(tmp_path))
+
+    colunas = cache.load('AAAUSDT', '5m', _ms(0), _ms(len(client.open_time)))
+
+    assert len(client.pedidos) == 3
+    assert len(colunas['open_time']) == len(client.open_time)
+
+
+def test_linhas_alem_do_meta_sao_ignoradas(tmp_path):
+    client = _ClienteKlines(100)
+    cache = KlineCache(client, str(tmp_path))
+    cache.load('AAAUSDT', '5m', _ms(0), _ms(99))
+    # Escrita interrompida: bytes gravados numa coluna sem atualizar meta.json
+    with open(os.path.join(str(tmp_path), 'AAAUSDT_5m', 'close.bin'), 'ab') as f:
+        f.write(np.zeros(5).tobytes())
+
+    offline = KlineCache(None, str(tmp_path), offline=True)
+    assert len(offline.read('AAAUSDT', '5m')['close']) == 100
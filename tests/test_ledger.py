@@ -0,0 +1,71 @@
+import math
+
+import numpy as np
+import pytest
+
+from ledger import MOTIVO_CODIGO, Estatisticas, TradeLedger
+
+PARES = ['AAAUSDT', 'BBBUSDT', 'CCCUSDT']
+
+
+def _recalcular(lucros):
+    """Métricas recalculadas do zero sobre todos os lucros"""
+    acumulado = np.cumsum(lucros)
+    picos = np.maximum(np.maximum.accumulate(acumulado), 0.0)
+    ganhos, perdas = lucros[lucros > 0].sum(), -lucros[lucros < 0].sum()
+    return {
+        'operacoes': len(lucros),
+        'lucro': acumulado[-1],
+        'max_drawdown': np.max(picos - acumulado),
+        'taxa_acerto': np.count_nonzero(lucros > 0) / len(lucros),
+        'fator_lucro': ganhos / perdas,
+        'sharpe': lucros.mean() / lucros.std(ddof=1)
+    }
+
+
+def test_lotes_incrementais_iguais_ao_recalculo():
+    rng = np.random.default_rng(3)
+    ledger = TradeLedger(PARES, capacidade=4)
+    lucros_pares, todos = [], []
+
+    for tamanho in (1, 5, 17, 0, 64, 2):
+        par = rng.integers(0, len(PARES), tamanho)
+        lucro = rng.normal(0.1, 1.0, tamanho)
+        ledger.extend(par, np.arange(tamanho), np.arange(tamanho) + 60, 100.0, 101.0, motivo=np.zeros(tamanho, np.int8),
+                      lucro=lucro)
+        lucros_pares.append(par)
+        todos.append(lucro)
+
+    lucros, pares = np.concatenate(todos), np.concatenate(lucros_pares)
+    assert len(ledger) == len(lucros) == 89
+    for chave, valor in _recalcular(lucros).items():
+        assert ledger.resumo()[chave] == pytest.approx(valor, rel=1e-9), chave
+    np.testing.assert_allclose(ledger.operacoes['patrimonio'], np.cumsum(lucros))
+
+    for codigo, pair in enumerate(PARES):
+        do_par = ledger.do_par(pair)
+        np.testing.assert_allclose(do_par['lucro'], lucros[pares == codigo])
+        np.testing.assert_allclose(do_par['acumulado_par'], np.cumsum(lucros[pares == codigo]))
+        assert ledger.resumo(pair)['lucro'] == pytest.approx(lucros[pares == codigo].sum())
+
+
+def test_registrar_calcula_o_lucro_liquido():
+    ledger = TradeLedger(PARES)
+    ledger.registrar('BBBUSDT', 10, 70, 100.0, 110.0, quantidade=2.0, taxas=0.5, motivo='take_profit')
+    ledger.registrar('BBBUSDT', 80, 90, 110.0, 100.0, quantidade=1.0, motivo='stop_loss')
+
+    operacoes = ledger.operacoes
+    assert list(operacoes['lucro']) == [19.5, -10.0]
+    assert list(operacoes['motivo']) == [MOTIVO_CODIGO['take_profit'], MOTIVO_CODIGO['stop_loss']]
+    assert ledger.resumo('BBBUSDT')['max_drawdown'] == 10.0
+    assert ledger.resumo('AAAUSDT')['operacoes'] == 0
+    assert list(ledger.mascara_par('BBBUSDT')) == [True, True]
+
+
+def test_casos_sem_perdas_e_sem_variancia():
+    estatisticas = Estatisticas()
+    assert estatisticas.resumo()['fator_lucro'] == 0.0
+    estatisticas.adicionar([1.0, 1.0])
+    assert estatisticas.fator_lucro == math.inf
+    assert estatisticas.sharpe == 0.0
+    assert len(estatisticas.adicionar([])) == 0
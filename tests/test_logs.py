@@ -0,0 +1,59 @@
+import json
+import logging
+from decimal import Decimal
+
+import numpy as np
+
+from logs import EventLog, iniciar_fila_logs
+
+
+class _Relogio:
+    def time(self):
+        return 1700000000.5
+
+
+class _Guardar(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.mensagens = []
+
+    def emit(self, record):
+        self.mensagens.append(self.format(record))
+
+
+def test_eventos_em_jsonl_compacto(tmp_path):
+    arquivo = tmp_path / 'eventos.jsonl'
+    eventos = EventLog(str(arquivo), clock=_Relogio())
+    eventos.registrar('sinal', pair='BTCUSDT', score=np.float64(0.75), qtd=Decimal('0.001'))
+    eventos.registrar('ordem', pair='BTCUSDT', precos=np.array([1.5, 2.0]), n=np.int64(3))
+    eventos.close()
+    eventos.registrar('depois', pair='BTCUSDT')  # Já encerrado: ignorado
+
+    linhas = arquivo.read_text().splitlines()
+    assert linhas[0] == '{"ts":1700000000.5,"tipo":"sinal","pair":"BTCUSDT","score":0.75,"qtd":"0.001"}'
+    assert json.loads(linhas[1]) == {'ts': 1700000000.5, 'tipo': 'ordem', 'pair': 'BTCUSDT', 'precos': [1.5, 2.0], 'n': 3}
+    assert len(linhas) == 2
+
+
+def test_sem_arquivo_nao_registra():
+    eventos = EventLog(None)
+    eventos.registrar('sinal', pair='BTCUSDT')
+    assert eventos._fila.empty()
+    eventos.close()
+
+
+def test_fila_formata_na_thread_de_escrita():
+    logger = logging.getLogger('test_logs.fila')
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    destino = _Guardar()
+    destino.setLevel(logging.INFO)
+    listener = iniciar_fila_logs(logger, destino)
+    try:
+        logger.debug("ignorada pelo nível do handler")
+        logger.info("preço %s", 42)
+    finally:
+        listener.stop()
+        logger.handlers.clear()
+
+    assert destino.mensagens == ['preço 42']
@@ -0,0 +1,71 @@
+from market_cache import AccountSnapshot, PriceCache
+
+
+class _Relogio:
+    def __init__(self, agora):
+        self.agora = agora
+
+    def time(self):
+        return self.agora
+
+    def sleep(self, segundos):
+        self.agora += segundos
+
+
+class _Cliente:
+    def __init__(self):
+        self.precos = {'BTCUSDT': '30000.0', 'ETHUSDT': '2000.0'}
+        self.saldos = [{'asset': 'USDT', 'free': '100.0', 'locked': '0'},
+                       {'asset': 'BTC', 'free': '0', 'locked': '0.5'},
+                       {'asset': 'ETH', 'free': '0', 'locked': '0'}]
+        self.chamadas = {'get_all_tickers': 0, 'get_account': 0}
+
+    def get_all_tickers(self):
+        self.chamadas['get_all_tickers'] += 1
+        return [{'symbol': s, 'price': p} for s, p in self.precos.items()]
+
+    def get_account(self):
+        self.chamadas['get_account'] += 1
+        return {'balances': self.saldos}
+
+
+def test_um_snapshot_serve_todos_os_pares_ate_envelhecer():
+    client, relogio = _Cliente(), _Relogio(1000)
+    precos = PriceCache(client, max_idade=5, clock=relogio)
+
+    assert precos.price('BTCUSDT') == 30000.0
+    assert precos.price('ETHUSDT') == 2000.0
+    assert client.chamadas['get_all_tickers'] == 1
+
+    client.precos['BTCUSDT'] = '31000.0'
+    relogio.sleep(6)
+    assert precos.price('BTCUSDT') == 31000.0
+    assert client.chamadas['get_all_tickers'] == 2
+
+
+def test_preco_do_feed_renova_so_o_par():
+    client, relogio = _Cliente(), _Relogio(1000)
+    precos = PriceCache(client, max_idade=5, clock=relogio)
+    precos.refresh()
+
+    relogio.sleep(10)
+    precos.update('BTCUSDT', 30500.0)
+    assert precos.age('BTCUSDT') == 0
+    assert precos.age('XRPUSDT') == float('inf')
+    assert precos.price('BTCUSDT') == 30500.0
+    assert client.chamadas['get_all_tickers'] == 1
+
+
+def test_saldos_com_valor_e_invalidacao():
+    client, relogio = _Cliente(), _Relogio(1000)
+    conta = AccountSnapshot(client, max_idade=30, clock=relogio)
+
+    assert conta.balances() == {'USDT': (100.0, 0.0), 'BTC': (0.0, 0.5)}
+    assert conta.balance('ETH') == (0.0, 0.0)
+    assert conta.balance('XRP') == (0.0, 0.0)
+    assert client.chamadas['get_account'] == 1
+
+    client.saldos[0]['free'] = '40.0'
+    conta.invalidate()
+    assert conta.balance('USDT') == (40.0, 0.0)
+    assert client.chamadas['get_account'] == 2
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('binance')
+
+from market_feed import BinanceStreamFeed, ReplayFeed
+from sim_exchange import gerar_candles_sinteticos
+
+
+def _series():
+    # BBB começa um candle depois de AAA: os eventos precisam se intercalar pelo horário
+    aaa = gerar_candles_sinteticos(3, '5m', seed=1)
+    bbb = gerar_candles_sinteticos(2, '5m', seed=2, inicio_ms=int(aaa['open_time'][1]))
+    return {'AAAUSDT': aaa, 'BBBUSDT': bbb}
+
+
+def test_replay_intercala_pares_e_segue_o_caminho_intrabarra():
+    series = _series()
+    feed = ReplayFeed(series)
+    eventos = []
+    feed.run(
+        lambda pair, kline, fechado: eventos.append(('kline', pair, kline[0], fechado)),
+        lambda pair, preco: eventos.append(('preco', pair, preco, feed.clock.time()))
+    )
+
+    klines = [(pair, t) for tipo, pair, t, _ in eventos if tipo == 'kline']
+    assert [t for _, t in klines] == sorted(t for _, t in klines)
+    assert [pair for pair, _ in klines] == ['AAAUSDT', 'AAAUSDT', 'BBBUSDT', 'AAAUSDT', 'BBBUSDT']
+
+    # Quatro preços antes de cada kline fechado: abertura, extremos na ordem do candle, fechamento
+    c = series['AAAUSDT']
+    precos = [preco for tipo, pair, preco, _ in eventos[:4]]
+    extremos = (c['low'][0], c['high'][0]) if c['close'][0] >= c['open'][0] else (c['high'][0], c['low'][0])
+    np.testing.assert_allclose(precos, [c['open'][0], *extremos, c['close'][0]])
+    horarios = [agora for tipo, _, _, agora in eventos if tipo == 'preco']
+    assert horarios == sorted(horarios)
+
+
+def test_stream_converte_kline_e_mini_ticker():
+    feed = BinanceStreamFeed('k', 's', ['BTCUSDT'], '5m')
+    klines, precos = [], []
+    kline = {'t': 0, 'o': '1', 'h': '2', 'l': '0.5', 'c': '1.5', 'v': '10', 'T': 299_999, 'x': True}
+
+    feed._handle({'stream': 'btcusdt@kline_5m', 'data': {'e': 'kline', 's': 'BTCUSDT', 'k': kline}},
+                 lambda *a: klines.append(a), lambda *a: precos.append(a))
+    feed._handle({'e': '24hrMiniTicker', 's': 'BTCUSDT', 'c': '1.75'},
+                 lambda *a: klines.append(a), lambda *a: precos.append(a))
+
+    assert klines == [('BTCUSDT', [0, '1', '2', '0.5', '1.5', '10', 299_999], True)]
+    assert precos == [('BTCUSDT', 1.5), ('BTCUSDT', 1.75)]
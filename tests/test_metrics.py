@@ -0,0 +1,66 @@
+import pytest
+
+from metrics import ClienteInstrumentado, Metricas
+
+
+class _Cliente:
+    limite = 6000
+
+    def get_klines(self, symbol):
+        return [symbol]
+
+    def create_order(self, **kwargs):
+        raise RuntimeError('recusada')
+
+
+def test_janela_movel_e_percentis():
+    metricas = Metricas(janela=100)
+    for ms in range(1, 201):
+        metricas.observar('indicadores', ms / 1000)
+
+    # Só as 100 últimas ficam na janela; soma e contagem são de todas
+    p = metricas.percentis('indicadores')
+    assert p[0.5] == pytest.approx(0.1505)
+    assert p[0.99] == pytest.approx(0.19901)
+    assert metricas.percentis('inexistente') == {}
+    texto = metricas.exportar()
+    assert 'bot_trader_latencia_segundos_count{etapa="indicadores"} 200' in texto
+    assert 'bot_trader_latencia_segundos_sum{etapa="indicadores"} 20.100000' in texto
+
+
+def test_cliente_instrumentado_conta_chamadas_e_erros():
+    metricas = Metricas()
+    client = ClienteInstrumentado(ClienteInstrumentado(_Cliente(), metricas), metricas)
+
+    assert isinstance(client.client, _Cliente)
+    assert client.limite == 6000
+    assert client.get_klines('BTCUSDT') == ['BTCUSDT']
+    with pytest.raises(RuntimeError):
+        client.create_order(symbol='BTCUSDT')
+
+    texto = metricas.exportar()
+    assert 'bot_trader_requisicoes_total{endpoint="get_klines"} 1' in texto
+    assert 'bot_trader_erros_total{endpoint="get_klines"} 0' in texto
+    assert 'bot_trader_erros_total{endpoint="create_order"} 1' in texto
+    assert 'bot_trader_latencia_segundos_count{etapa="api_create_order"} 1' in texto
+
+
+def test_sinal_ate_execucao_so_com_sinal_pendente():
+    metricas = Metricas()
+    metricas.execucao('BTCUSDT', 'BUY')
+    assert metricas.percentis('sinal_ate_execucao_BUY') == {}
+
+    metricas.sinal('BTCUSDT', 'BUY')
+    metricas.execucao('BTCUSDT', 'BUY')
+    metricas.execucao('BTCUSDT', 'BUY')
+    assert 'bot_trader_latencia_segundos_count{etapa="sinal_ate_execucao_BUY"} 1' in metricas.exportar()
+
+
+def test_salvar_grava_o_arquivo_completo(tmp_path):
+    metricas = Metricas()
+    metricas.observar('scan', 0.5)
+    arquivo = tmp_path / 'bot.prom'
+
+    metricas.salvar(arquivo)
+    assert arquivo.read_text() == metricas.exportar()
+    assert not (tmp_path / 'bot.prom.tmp').exists()
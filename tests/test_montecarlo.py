@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from montecarlo import ELEMENTOS_POR_LOTE, METODOS, analisar, reamostrar
+
+
+def _lucros(n=500, seed=0):
+    return np.random.default_rng(seed).normal(0.2, 5.0, n)
+
+
+@pytest.mark.parametrize('metodo', METODOS)
+def test_mesmo_resultado_com_qualquer_numero_de_workers(metodo):
+    lucros = _lucros()
+    simulacoes = 20_000
+    assert simulacoes > ELEMENTOS_POR_LOTE // len(lucros) * 2  # Ao menos três lotes
+
+    resultados = [analisar(lucros, simulacoes, metodo, seed=7, capital=100.0, workers=w) for w in (1, 2, 3)]
+    assert resultados[0] == resultados[1] == resultados[2]
+    assert analisar(lucros, simulacoes, metodo, seed=8, capital=100.0, workers=1) != resultados[0]
+
+
+def test_embaralhar_mantem_o_lucro_final():
+    lucros = _lucros(200)
+    resultado = analisar(lucros, 2000, 'embaralhar', capital=100.0, workers=1)
+    assert resultado['lucro']['min'] == pytest.approx(lucros.sum(), abs=1e-6 * np.abs(lucros).sum())
+    assert resultado['lucro']['max'] == pytest.approx(lucros.sum(), abs=1e-6 * np.abs(lucros).sum())
+    assert resultado['prob_prejuizo'] == float(lucros.sum() < 0)
+
+
+def test_blocos_sao_trechos_contiguos_circulares():
+    lucros = np.arange(10.0)
+    caminhos = reamostrar(lucros, 'blocos', 50, np.random.default_rng(0), bloco=4)
+    assert caminhos.shape == (50, 10)
+    for caminho in caminhos:
+        for bloco in caminho[:8].reshape(2, 4):
+            assert np.all(np.diff(bloco) % 10 == 1)
+
+
+def test_entradas_invalidas():
+    with pytest.raises(ValueError):
+        analisar([], 100)
+    with pytest.raises(ValueError):
+        analisar(_lucros(), 100, metodo='outro')
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from ledger import TradeLedger
+from plots import lttb, minmax, reduzir
+
+
+def _curva(n, seed=0):
+    rng = np.random.default_rng(seed)
+    x = 1_700_000_000 + np.cumsum(rng.integers(60, 3600, n))
+    return x, np.cumsum(rng.normal(0, 1, n))
+
+
+@pytest.mark.parametrize('metodo', [lttb, minmax])
+@pytest.mark.parametrize('n, pontos', [(10_000, 200), (10_007, 203), (5_000, 4999)])
+def test_preserva_extremidades_e_ordem(metodo, n, pontos):
+    x, y = _curva(n)
+    rx, ry = metodo(x, y, pontos)
+
+    assert len(rx) <= pontos
+    assert (rx[0], ry[0]) == (x[0], y[0])
+    assert (rx[-1], ry[-1]) == (x[-1], y[-1])
+    assert np.all(np.diff(rx) > 0)
+    # Só pontos da curva original
+    indices = np.searchsorted(x, rx)
+    np.testing.assert_array_equal(y[indices], ry)
+
+
+def test_minmax_mantem_o_pico_e_o_vale():
+    x, y = _curva(50_000, seed=1)
+    _, ry = minmax(x, y, 400)
+    assert ry.max() == y.max() and ry.min() == y.min()
+
+
+def test_lttb_usa_exatamente_os_pontos_pedidos():
+    x, y = _curva(10_000)
+    assert len(lttb(x, y, 500)[0]) == 500
+
+
+@pytest.mark.parametrize('metodo', ['lttb', 'minmax'])
+def test_curvas_curtas_nao_sao_reduzidas(metodo):
+    x, y = _curva(100)
+    rx, ry = reduzir(x, y, 2000, metodo)
+    assert len(rx) == 100
+    np.testing.assert_array_equal(ry, y)
+
+
+def test_grafico_do_ledger(tmp_path):
+    pytest.importorskip('matplotlib')
+    from plots import grafico_ledger
+
+    ledger = TradeLedger(['AAAUSDT', 'BBBUSDT'])
+    x, y = _curva(3000)
+    ledger.extend(np.arange(3000) % 2, x - 60, x, 100.0, 100.0, lucro=np.diff(y, prepend=0.0))
+
+    arquivo = tmp_path / 'lucro.png'
+    assert grafico_ledger(ledger, arquivo, pontos=300) == ['AAAUSDT', 'BBBUSDT']
+    assert arquivo.stat().st_size > 0
+    assert grafico_ledger(TradeLedger(['AAAUSDT']), tmp_path / 'vazio.png') == []
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from position_store import PositionStore
+
+PARES = ['AAAUSDT', 'BBBUSDT']
+
+
+def _posicao(quantity=10.0):
+    return {'pair': 'AAAUSDT', 'entry_price': 1.0, 'quantity': quantity, 'opened_at': 1_700_000_000.0,
+            'entry_time': 1_700_000_000.0, 'expansions': 1, 'stop_loss': 0.98, 'take_profit': 1.02}
+
+
+def test_snapshot_ida_e_volta(tmp_path):
+    store = PositionStore(str(tmp_path / 'posicao.json'))
+    assert store.load() == (False, None)
+
+    store.save(_posicao())
+    assert store.load() == (True, _posicao())
+    store.save(None)
+    assert store.load() == (True, None)
+    assert os.listdir(tmp_path) == ['posicao.json']
+
+
+@pytest.mark.parametrize('conteudo', ['', '{"position": ', '[]', '{"outra": 1}'])
+def test_snapshot_ilegivel_e_invalido(tmp_path, conteudo):
+    arquivo = tmp_path / 'posicao.json'
+    arquivo.write_text(conteudo)
+    assert PositionStore(str(arquivo)).load() == (False, None)
+
+
+def test_sem_arquivo_nao_grava():
+    store = PositionStore(None)
+    store.save(_posicao())
+    assert store.load() == (False, None)
+
+
+@pytest.fixture
+def iniciar_trader(tmp_path):
+    pytest.importorskip('binance')
+    import config as cfg
+    from bot_trader import CryptoTrader
+    from sim_exchange import SimulatedClient
+
+    arquivo = str(tmp_path / 'posicao.json')
+
+    def iniciar(saldo_base):
+        config = {nome: getattr(cfg, nome) for nome in dir(cfg) if nome.isupper()}
+        config.update(
+            PARES_MONITORADOS=PARES, LOG_FILE=os.devnull, LOG_LEVEL='ERROR', EVENTOS_ARQUIVO=None,
+            POSICAO_ARQUIVO=arquivo, LIMITE_PESO_MINUTO=None, WATCHDOG_ATIVO=False
+        )
+        client = SimulatedClient.synthetic(PARES, 500, config['INTERVALO'], saldo_inicial=0)
+        client.saldos['AAA'] = saldo_base
+        return CryptoTrader(config, client=client, clock=client.clock)
+
+    return arquivo, iniciar
+
+
+def test_restaura_a_posicao_limitada_ao_saldo(iniciar_trader):
+    arquivo, iniciar = iniciar_trader
+    PositionStore(arquivo).save(_posicao(quantity=10.0))
+
+    trader = iniciar(saldo_base=9.99)  # Taxa paga no ativo comprado
+    assert trader.current_position == _posicao(quantity=9.99)
+    assert trader.client.client.chamadas.get('get_klines', 0) == 0
+    assert PositionStore(arquivo).load() == (True, _posicao(quantity=9.99))
+
+
+def test_descarta_a_posicao_vendida_fora_do_bot(iniciar_trader):
+    arquivo, iniciar = iniciar_trader
+    PositionStore(arquivo).save(_posicao())
+
+    trader = iniciar(saldo_base=0.0)
+    assert trader.current_position is None
+    assert PositionStore(arquivo).load() == (True, None)
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+pytest.importorskip('binance')
+
+from fake_binance import FakeBinance, simular
+from rate_limit import FRACAO_LIMITE, PRIORIDADE_NORMAL, PRIORIDADE_SAIDA, PRIORIDADE_SCAN, RequestScheduler
+from sim_exchange import RelogioSimulado
+
+LIMITE = 400
+
+
+@pytest.fixture
+def servidor():
+    # Minutos de peso no relógio simulado: só avançam quando o agendador espera
+    servidor = FakeBinance(LIMITE, latencia=0, clock=RelogioSimulado(0)).iniciar()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+class _Resposta:
+    def __init__(self, usado):
+        self.headers = {'X-MBX-USED-WEIGHT-1M': str(usado)}
+
+
+class _ClienteComHeaders:
+    """Guarda só a última resposta, como o Client da Binance; `lenta` espera `liberar`"""
+
+    def __init__(self):
+        self.response = None
+        self.liberar = threading.Event()
+        self.iniciou = threading.Event()
+
+    def lenta(self, usado):
+        self.iniciou.set()
+        self.liberar.wait(5)
+        self.response = _Resposta(usado)
+
+    def rapida(self, usado):
+        self.response = _Resposta(usado)
+
+
+def test_prioridade_aninhada_mantem_a_mais_alta():
+    agendador = RequestScheduler(object())
+    with agendador.prioridade(PRIORIDADE_SCAN):
+        assert agendador._local.prioridade == PRIORIDADE_SCAN
+        with agendador.prioridade(PRIORIDADE_SAIDA):
+            assert agendador._local.prioridade == PRIORIDADE_SAIDA
+        with agendador.prioridade(PRIORIDADE_NORMAL):
+            assert agendador._local.prioridade == PRIORIDADE_NORMAL
+        assert agendador._local.prioridade == PRIORIDADE_SCAN
+    assert agendador._local.prioridade is None
+
+
+def test_headers_so_valem_sem_requisicoes_sobrepostas():
+    client = _ClienteComHeaders()
+    agendador = RequestScheduler(client, LIMITE, RelogioSimulado(0))
+
+    agendador.rapida(100)
+    assert agendador.usado() == 100
+
+    lenta = threading.Thread(target=agendador.lenta, args=(50,))
+    lenta.start()
+    client.iniciou.wait(5)
+    # A resposta da rápida é sobrescrita pela lenta (e vice-versa): nenhuma é confiável
+    agendador.rapida(300)
+    client.liberar.set()
+    lenta.join(5)
+    assert agendador.usado() == 100 + 2
+
+    agendador.rapida(300)
+    assert agendador.usado() == 300
+
+
+def test_sem_429_e_scan_dentro_da_fracao(servidor):
+    resultado = simular(servidor, usar_agendador=True, duracao=180, scanners=8)
+
+    assert servidor.respostas_429 == 0
+    assert resultado['scan_erros'] == 0
+    assert resultado['saida_erros'] == 0
+    assert resultado['saida_ok'] > 0
+    assert servidor.picos_rota['/api/v3/klines'] <= LIMITE * FRACAO_LIMITE[PRIORIDADE_SCAN]
+    assert servidor.pico <= LIMITE
+
+
+def test_sem_agendador_o_servidor_responde_429(servidor):
+    # Sem ninguém esperando o relógio não anda: tudo cai no mesmo minuto de peso
+    simular(servidor, usar_agendador=False, duracao=60, scanners=8, requisicoes=LIMITE)
+
+    # Cada klines pesa 2: no máximo LIMITE / 2 passam, o resto é 429
+    assert servidor.respostas_429 >= LIMITE // 2
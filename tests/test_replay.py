@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip('binance')
+
+import config as cfg
+from candles import klines_to_arrays
+from ledger import MOTIVO_CODIGO
+from replay import ReplayEngine
+from sim_exchange import SimulatedClient
+
+PARES = ['AAAUSDT', 'BBBUSDT']
+
+
+def _config():
+    config = {nome: getattr(cfg, nome) for nome in dir(cfg) if nome.isupper()}
+    config.update(LOG_FILE=os.devnull, LOG_LEVEL='ERROR', EVENTOS_ARQUIVO=None)
+    return config
+
+
+def test_colunas_iguais_as_klines_no_meio_do_candle():
+    client = SimulatedClient.synthetic(PARES, 500, '5m')
+    client.clock.agora += 100   # Candle atual em formação: o último valor é o parcial
+    klines = klines_to_arrays(client.get_klines(symbol=PARES[0], interval='5m', limit=20))
+    colunas = client.get_klines_columns(PARES[0], '5m', 20)
+
+    for coluna in ('open', 'high', 'low', 'close', 'volume', 'close_time'):
+        np.testing.assert_allclose(colunas[coluna], klines[coluna], rtol=1e-12)
+    assert set(client.get_klines_columns(PARES[0], '5m', 20, ('close',))) == {'close'}
+
+
+def test_ledger_com_uma_linha_por_venda():
+    config = _config()
+    series = SimulatedClient.synthetic(PARES, 5000, config['INTERVALO']).series
+    engine = ReplayEngine(config, series)
+    engine.run()
+
+    vendas = [o for o in engine.client.ordens if o['side'] == 'SELL']
+    operacoes = engine.ledger.operacoes
+    assert len(vendas) > 0 and len(operacoes) == len(vendas)
+    assert engine._saidas == []
+    np.testing.assert_array_equal(operacoes['saida_ts'], [o['transactTime'] // 1000 for o in vendas])
+    np.testing.assert_allclose(
+        operacoes['preco_saida'], [float(o['cummulativeQuoteQty']) / float(o['executedQty']) for o in vendas]
+    )
+    assert set(operacoes['par']) <= {0, 1}
+    assert set(operacoes['motivo']) <= set(MOTIVO_CODIGO.values())
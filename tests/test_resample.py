@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from candles import COLUNAS
+from resample import MultiTimeframe, Resampler, resample
+
+MINUTO = 60_000
+INICIO = 1_700_000_100_000 // (60 * MINUTO) * (60 * MINUTO)
+
+
+def _candles_1m(n, seed=0, remover=()):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    opens = np.concatenate(([100.0], closes[:-1]))
+    open_time = INICIO + np.arange(n, dtype=np.int64) * MINUTO
+    colunas = {
+        'open_time': open_time,
+        'open': opens,
+        'high': np.maximum(opens, closes) * (1 + rng.random(n) * 0.001),
+        'low': np.minimum(opens, closes) * (1 - rng.random(n) * 0.001),
+        'close': closes,
+        'volume': rng.lognormal(3, 0.5, n),
+        'close_time': open_time + MINUTO - 1
+    }
+    manter = np.setdiff1d(np.arange(n), remover)
+    return {coluna: valores[manter] for coluna, valores in colunas.items()}
+
+
+def _linha(columns, i):
+    return {coluna: columns[coluna][i] for coluna in ('open_time',) + COLUNAS}
+
+
+@pytest.mark.parametrize('intervalo', ['5m', '15m', '1h'])
+def test_incremental_igual_ao_vetorizado_com_barra_parcial(intervalo):
+    # 137 minutos e um buraco: termina no meio de uma barra de qualquer intervalo
+    base = _candles_1m(137, remover=(40, 41, 42))
+    barras = resample(base, intervalo)
+    resampler = Resampler(intervalo)
+
+    fechadas = []
+    for i in range(len(base['open_time'])):
+        barra, fechou = resampler.update(_linha(base, i))
+        if fechou:
+            fechadas.append(barra)
+
+    assert len(fechadas) == len(barras['open_time']) - 1
+    for k, barra in enumerate(fechadas + [resampler.barra()]):
+        for coluna in ('open_time',) + COLUNAS:
+            assert barra[coluna] == pytest.approx(barras[coluna][k], rel=1e-12), (k, coluna)
+
+    completas = resample(base, intervalo, incluir_parcial=False)
+    assert len(completas['open_time']) == len(fechadas)
+
+
+def test_revisao_do_candle_base_em_formacao_nao_soma_duas_vezes():
+    base = _candles_1m(3)
+    resampler = Resampler('5m')
+    resampler.update(_linha(base, 0))
+
+    parcial = dict(_linha(base, 1), close=base['open'][1], high=base['open'][1], low=base['open'][1], volume=1.0)
+    barra, fechou = resampler.update(parcial, fechado=False)
+    assert not fechou
+    assert barra['volume'] == pytest.approx(base['volume'][0] + 1.0)
+
+    barra, _ = resampler.update(_linha(base, 1))
+    esperado = resample({c: v[:2] for c, v in base.items()}, '5m')
+    assert barra['volume'] == pytest.approx(esperado['volume'][0])
+    assert barra['high'] == esperado['high'][0] and barra['low'] == esperado['low'][0]
+
+
+def test_candle_atrasado_e_intervalo_invalido():
+    base = _candles_1m(10)
+    resampler = Resampler('5m')
+    resampler.update(_linha(base, 6))
+    assert resampler.update(_linha(base, 2)) == (None, False)
+
+    with pytest.raises(ValueError):
+        Resampler('5m', base='3m')
+    assert len(resample({c: v[:0] for c, v in base.items()}, '5m')['close']) == 0
+
+
+def test_multitimeframe_continua_do_historico():
+    base = _candles_1m(130)
+    completo = MultiTimeframe(['5m', '15m'], 100)
+    completo.load('BTCUSDT', base)
+
+    # Mesmo histórico entregue em duas partes: carga inicial e depois candle a candle
+    incremental = MultiTimeframe(['5m', '15m'], 100)
+    incremental.load('BTCUSDT', {c: v[:62] for c, v in base.items()})
+    fechados = [incremental.update('BTCUSDT', _linha(base, i)) for i in range(62, 130)]
+
+    # O candle do minuto 119 fecha as barras de 5m e 15m; o do 129 só a de 5m
+    assert fechados[119 - 62] == ['5m', '15m']
+    assert fechados[-1] == ['5m']
+    assert fechados[-2] == []
+    for intervalo in ('5m', '15m'):
+        esperado = completo.candles[intervalo]['BTCUSDT'].window()
+        obtido = incremental.candles[intervalo]['BTCUSDT'].window()
+        for coluna in COLUNAS:
+            np.testing.assert_allclose(obtido[coluna], esperado[coluna], rtol=1e-12)
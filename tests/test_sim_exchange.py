@@ -0,0 +1,69 @@
+import pytest
+
+pytest.importorskip('binance')
+
+from binance.exceptions import BinanceAPIException
+
+from sim_exchange import FimDaSimulacao, RelogioSimulado, SimulatedClient
+
+PAR = 'AAAUSDT'
+
+
+@pytest.fixture
+def client():
+    # Par com preço inicial 1: passo de quantidade 0.01 e notional mínimo 5
+    return SimulatedClient.synthetic([PAR], 500, '5m', saldo_inicial=1000.0, slippage=0.001, taxa=0.001)
+
+
+def test_compra_e_venda_com_slippage_e_taxa(client):
+    preco = float(client.get_symbol_ticker(symbol=PAR)['price'])
+
+    compra = client.create_order(symbol=PAR, side='BUY', type='MARKET', quoteOrderQty=100)
+    qtd = float(compra['executedQty'])
+    assert float(compra['fills'][0]['price']) == pytest.approx(preco * 1.001)
+    assert compra['fills'][0]['commissionAsset'] == 'AAA'
+    assert client.saldos['USDT'] == pytest.approx(900.0)
+    assert client.saldos['AAA'] == pytest.approx(qtd * 0.999)
+
+    venda = client.create_order(symbol=PAR, side='SELL', type='MARKET', quantity='6.00')
+    assert float(venda['fills'][0]['price']) == pytest.approx(preco * 0.999)
+    assert venda['fills'][0]['commissionAsset'] == 'USDT'
+    assert client.saldos['USDT'] == pytest.approx(900.0 + 6 * preco * 0.999 * 0.999)
+    assert [o['orderId'] for o in client.ordens] == [1, 2]
+
+
+@pytest.mark.parametrize('kwargs, code', [
+    ({'side': 'BUY', 'quantity': '10.005'}, -1013),         # fora do stepSize
+    ({'side': 'BUY', 'quantity': '1.00'}, -1013),           # abaixo do notional mínimo
+    ({'side': 'BUY', 'quoteOrderQty': 5000}, -2010),        # saldo insuficiente
+    ({'side': 'SELL', 'quantity': '10.00'}, -2010),         # sem o ativo
+    ({'side': 'BUY', 'quantity': '10.00', 'type': 'LIMIT'}, -1116),
+])
+def test_ordens_recusadas_nao_mexem_no_saldo(client, kwargs, code):
+    with pytest.raises(BinanceAPIException) as erro:
+        client.create_order(symbol=PAR, **{'type': 'MARKET', **kwargs})
+
+    assert erro.value.code == code
+    assert client.saldos == {'USDT': 1000.0}
+    assert client.ordens == []
+
+
+def test_candle_em_formacao_nao_olha_o_futuro(client):
+    c = client.series[PAR]
+    i = client._indice(PAR, int(client.clock.time() * 1000))
+    client.clock.agora = int(c['open_time'][i]) / 1000
+
+    kline = client.get_klines(symbol=PAR, interval='5m', limit=1)[0]
+    assert float(kline[4]) == c['open'][i]
+    assert float(kline[5]) == 0.0
+
+    client.clock.agora = int(c['close_time'][i] + 1) / 1000
+    fechado = client.get_klines(symbol=PAR, interval='5m', limit=2)[0]
+    assert float(fechado[4]) == c['close'][i]
+
+
+def test_relogio_encerra_no_fim_dos_dados():
+    relogio = RelogioSimulado(0, fim=10)
+    relogio.sleep(10)
+    with pytest.raises(FimDaSimulacao):
+        relogio.sleep(0.5)
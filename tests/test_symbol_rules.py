@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+from symbol_rules import SymbolRules
+
+
+def _info(symbol, step='0.001', tick='0.01', min_qty='0.001', min_notional='5'):
+    return {'symbol': symbol, 'filters': [
+        {'filterType': 'PRICE_FILTER', 'tickSize': tick},
+        {'filterType': 'LOT_SIZE', 'stepSize': step, 'minQty': min_qty, 'maxQty': '9000'},
+        {'filterType': 'NOTIONAL', 'minNotional': min_notional}
+    ]}
+
+
+class _Cliente:
+    def __init__(self, simbolos, exchange_info_ok=True):
+        self.simbolos = simbolos
+        self.exchange_info_ok = exchange_info_ok
+        self.chamadas = {'get_exchange_info': 0, 'get_symbol_info': 0}
+
+    def get_exchange_info(self):
+        self.chamadas['get_exchange_info'] += 1
+        if not self.exchange_info_ok:
+            raise ConnectionError('sem rede')
+        return {'symbols': list(self.simbolos.values())}
+
+    def get_symbol_info(self, pair):
+        self.chamadas['get_symbol_info'] += 1
+        return self.simbolos[pair]
+
+
+class _Relogio:
+    agora = 1_700_000_000.0
+
+    def time(self):
+        return self.agora
+
+
+def test_arredondamento_exato_em_decimal():
+    regras = SymbolRules(_Cliente({'BTCUSDT': _info('BTCUSDT', step='0.00001', tick='0.01')}), clock=_Relogio())
+
+    # 0.1 + 0.2 em float é 0.30000000000000004: o piso no passo não pode virar 0.29999
+    assert regras.round_quantity('BTCUSDT', 0.1 + 0.2) == Decimal('0.3')
+    assert regras.round_quantity('BTCUSDT', 0.123456789) == Decimal('0.12345')
+    assert regras.round_price('BTCUSDT', 27123.456) == Decimal('27123.45')
+    assert format(regras.round_quantity('BTCUSDT', 5), 'f') == '5'
+
+
+def test_check_order_recusa_abaixo_dos_minimos():
+    regras = SymbolRules(_Cliente({'ADAUSDT': _info('ADAUSDT', min_qty='1', min_notional='5')}), clock=_Relogio())
+
+    assert regras.check_order('ADAUSDT', 0.5, 10) is not None
+    assert 'Valor' in regras.check_order('ADAUSDT', 2, 1)
+    assert regras.check_order('ADAUSDT', 20, 1) is None
+
+
+def test_cache_recarrega_por_ttl_e_invalidate():
+    client = _Cliente({'BTCUSDT': _info('BTCUSDT')})
+    relogio = _Relogio()
+    regras = SymbolRules(client, ttl=60, clock=relogio)
+
+    for _ in range(3):
+        regras.get('BTCUSDT')
+    assert client.chamadas['get_exchange_info'] == 1
+
+    relogio.agora += 61
+    regras.get('BTCUSDT')
+    assert client.chamadas['get_exchange_info'] == 2
+
+    regras.invalidate('BTCUSDT')
+    regras.get('BTCUSDT')
+    assert client.chamadas == {'get_exchange_info': 2, 'get_symbol_info': 1}
+
+
+def test_sem_exchange_info_consulta_so_o_par():
+    client = _Cliente({'BTCUSDT': _info('BTCUSDT', step='0.1')}, exchange_info_ok=False)
+    regras = SymbolRules(client, clock=_Relogio())
+
+    assert regras.get('BTCUSDT')['step_size'] == Decimal('0.1')
+    regras.get('BTCUSDT')
+    assert client.chamadas == {'get_exchange_info': 1, 'get_symbol_info': 1}
@@ -0,0 +1,35 @@
+from universe import filtrar_universo
+
+CONFIG = {'VOLUME_MINIMO_24H_USD': 1_000_000, 'VOLATILIDADE_MINIMA': 0.02, 'SPREAD_MAXIMO': 0.001, 'UNIVERSO_TOP_K': 2}
+
+
+def _ticker(symbol, volume, high=105.0, low=100.0, last=102.0, bid=101.99, ask=102.01):
+    return {'symbol': symbol, 'quoteVolume': str(volume), 'highPrice': str(high), 'lowPrice': str(low),
+            'lastPrice': str(last), 'bidPrice': str(bid), 'askPrice': str(ask)}
+
+
+def test_filtra_e_ordena_por_volume():
+    tickers = [
+        _ticker('ETHUSDT', 5_000_000),
+        _ticker('BTCUSDT', 9_000_000),
+        _ticker('SOLUSDT', 7_000_000),
+        _ticker('BTCBRL', 50_000_000),                     # não é USDT
+        _ticker('BTCUPUSDT', 50_000_000),                  # alavancado
+        _ticker('USDCUSDT', 50_000_000),                   # stablecoin
+        _ticker('XRPUSDT', 500_000),                       # pouco volume
+        _ticker('ADAUSDT', 8_000_000, high=101, low=100),  # pouca volatilidade
+        _ticker('DOGEUSDT', 8_000_000, bid=101, ask=103),  # spread largo
+        _ticker('LUNAUSDT', 8_000_000, last=0),            # sem preço
+    ]
+
+    assert filtrar_universo(tickers, CONFIG) == ['BTCUSDT', 'SOLUSDT']
+    assert filtrar_universo(tickers, {**CONFIG, 'UNIVERSO_TOP_K': 10}) == ['BTCUSDT', 'SOLUSDT', 'ETHUSDT']
+
+
+def test_sem_book_o_spread_e_infinito():
+    ticker = _ticker('BTCUSDT', 9_000_000)
+    del ticker['bidPrice'], ticker['askPrice']
+
+    assert filtrar_universo([ticker], CONFIG) == []
+    assert filtrar_universo([ticker], {k: v for k, v in CONFIG.items() if k != 'SPREAD_MAXIMO'}) == ['BTCUSDT']
+    assert filtrar_universo([], CONFIG) == []
@@ -0,0 +1,41 @@
+import numpy as np
+
+# Tokens alavancados e stablecoins não entram na varredura
+_SUFIXOS_EXCLUIDOS = ('UPUSDT', 'DOWNUSDT', 'BULLUSDT', 'BEARUSDT')
+_STABLES = {'USDCUSDT', 'BUSDUSDT', 'TUSDUSDT', 'FDUSDUSDT', 'USDPUSDT', 'DAIUSDT', 'EURUSDT'}
+
+
+def filtrar_universo(tickers, config):
+    """
+    Primeira etapa barata: a partir das estatísticas de 24h de todos os símbolos
+    (uma única chamada get_ticker), mantém os pares USDT com volume, volatilidade
+    e spread aceitáveis e devolve os UNIVERSO_TOP_K de maior volume em USDT.
+    """
+    pares, colunas = [], []
+    for t in tickers:
+        symbol = t['symbol']
+        if not symbol.endswith('USDT') or symbol.endswith(_SUFIXOS_EXCLUIDOS) or symbol in _STABLES:
+            continue
+        pares.append(symbol)
+        colunas.append((
+            float(t['quoteVolume']), float(t['highPrice']), float(t['lowPrice']),
+            float(t['lastPrice']), float(t.get('bidPrice') or 0), float(t.get('askPrice') or 0)
+        ))
+    if not pares:
+        return []
+
+    quote_volume, high, low, last, bid, ask = np.array(colunas).T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        volatilidade = (high - low) / last
+        meio = (bid + ask) / 2
+        spread = np.where(meio > 0, (ask - bid) / meio, np.inf)
+
+    mascara = (
+        (last > 0) &
+        (quote_volume >= config.get('VOLUME_MINIMO_24H_USD', 0)) &
+        (volatilidade >= config.get('VOLATILIDADE_MINIMA', 0)) &
+        (spread <= config.get('SPREAD_MAXIMO', np.inf))
+    )
+    candidatos = np.flatnonzero(mascara)
+    ordem = candidatos[np.argsort(-quote_volume[candidatos], kind='stable')]
+    return [pares[i] for i in ordem[:config.get('UNIVERSO_TOP_K', 10)]]